@@ -9,10 +9,11 @@ License: MIT License
 Copyright (c) 2025 Gustavo Adrián Salvini
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 # Public API exports
 from gsupload.config import load_config, load_config_with_sources, get_host_config
-from gsupload.protocols.ftp import upload_ftp, list_remote_ftp
-from gsupload.protocols.sftp import upload_sftp, list_remote_sftp
 
 __version__ = "1.0.1b2"
 DEFAULT_MAX_DEPTH = 20
@@ -28,3 +29,28 @@ __all__ = [
     "list_remote_ftp",
     "list_remote_sftp",
 ]
+
+if TYPE_CHECKING:
+    from gsupload.protocols import (
+        list_remote_ftp,
+        list_remote_sftp,
+        upload_ftp,
+        upload_sftp,
+    )
+
+# Protocol functions are imported on first access (PEP 562), so that e.g. the
+# CLI doesn't import paramiko unless an SFTP host is used. gsupload.protocols
+# owns the lazy registry; this module just forwards to it.
+
+
+def __getattr__(name: str) -> Any:
+    """Fetch a protocol function from gsupload.protocols and cache it."""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("gsupload.protocols"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
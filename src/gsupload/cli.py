@@ -21,10 +21,17 @@ from gsupload.config import (
 )
 
 from gsupload.excludes import show_ignored_files
-from gsupload.protocols.ftp import upload_ftp
-from gsupload.protocols.sftp import upload_sftp
-from gsupload.tree import display_tree_comparison
-from gsupload.utils import display_comment, expand_patterns
+from gsupload.tree import (
+    display_tree_comparison,
+    invalidate_remote_listing,
+    update_remote_listing,
+)
+from gsupload.utils import (
+    display_comment,
+    expand_patterns,
+    format_elapsed,
+    sort_upload_order,
+)
 
 # Suppress paramiko's verbose error messages
 logging.getLogger("paramiko").setLevel(logging.CRITICAL)
@@ -77,6 +84,11 @@ def version_callback(ctx: click.Context, param: click.Parameter, value: bool) ->
     is_flag=True,
     help="Show summary statistics only, skip tree display in visual check",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Rescan the remote tree in visual check even if the binding's cache_ttl allows reusing a recent listing",
+)
 @click.option(
     "-f",
     "--force",
@@ -118,6 +130,7 @@ def main(
     visual_check_complete: bool,
     max_depth: int,
     tree_summary: bool,
+    no_cache: bool,
     force: bool,
     binding_alias: Optional[str],
     show_config: bool,
@@ -227,10 +240,11 @@ def main(
                 f"Error: Local basepath '{local_basepath}' does not exist.", err=True
             )
             sys.exit(1)
+        local_basepath = local_basepath.resolve()
 
         global_excludes = config.get("global_excludes", [])
         host_excludes = host_config.get("excludes", [])
-        all_excludes = global_excludes + host_excludes
+        all_excludes = list(dict.fromkeys(global_excludes + host_excludes))
 
         # Display excludes comments if present
         if "global_excludes_comments" in config:
@@ -299,9 +313,13 @@ def main(
         )
         sys.exit(1)
 
+    # Canonicalize once; expansion, sorting, comparison and upload all share it
+    local_basepath = local_basepath.resolve()
+
     global_excludes = config.get("global_excludes", [])
     host_excludes = host_config.get("excludes", [])
-    all_excludes = global_excludes + host_excludes
+    # Drop patterns repeated between global and host excludes
+    all_excludes = list(dict.fromkeys(global_excludes + host_excludes))
 
     # Display excludes comments if present
     if "global_excludes_comments" in config:
@@ -310,7 +328,11 @@ def main(
         display_comment(host_config["excludes_comments"], prefix="🚫")
 
     files_to_upload = expand_patterns(
-        list(patterns), all_excludes, local_basepath, recursive
+        list(patterns),
+        all_excludes,
+        local_basepath,
+        recursive,
+        max_workers=host_config["max_workers"],
     )
 
     if not files_to_upload:
@@ -318,15 +340,7 @@ def main(
         sys.exit(0)
 
     # Sort files by depth (external first) then alphabetically for consistent ordering
-    def sort_key(f: Path) -> Tuple[int, str]:
-        try:
-            rel_path = f.relative_to(local_basepath)
-            depth = len(rel_path.parts) - 1
-            return (depth, str(rel_path).lower())
-        except ValueError:
-            return (999, str(f).lower())
-
-    files_to_upload = sorted(files_to_upload, key=sort_key)
+    files_to_upload = sort_upload_order(files_to_upload, local_basepath)
 
     protocol = host_config.get("protocol", "ftp").lower()
 
@@ -344,6 +358,7 @@ def main(
             max_depth,
             tree_summary,
             complete_tree=show_complete_tree,
+            use_cache=not no_cache,
         )
 
         if not click.confirm("\n⚠️  Proceed with upload?", default=False):
@@ -352,40 +367,38 @@ def main(
 
         click.echo("")
 
+    # The upload changes the remote tree: the cached listing is dropped now
+    # and written back with the uploaded files once the upload finishes
+    cached_listing = None
+    if host_config.get("cache_ttl"):
+        cached_listing = invalidate_remote_listing(host_config, protocol)
+
     # Start timer
     start_time = time.time()
 
+    # Protocol modules are imported on demand: the SFTP one pulls in paramiko,
+    # which takes longer to import than the rest of gsupload together
     if protocol == "ftp":
-        upload_ftp(
+        from gsupload.protocols.ftp import upload_ftp
+
+        uploaded = upload_ftp(
             host_config, files_to_upload, local_basepath, use_pasv=not ftp_active
         )
     elif protocol == "sftp":
-        upload_sftp(host_config, files_to_upload, local_basepath)
+        from gsupload.protocols.sftp import upload_sftp
+
+        uploaded = upload_sftp(host_config, files_to_upload, local_basepath)
     else:
         click.echo(
             f"Error: Unsupported protocol '{protocol}'. Use 'ftp' or 'sftp'.", err=True
         )
         sys.exit(1)
 
-    # Calculate elapsed time
-    elapsed = time.time() - start_time
-    days = int(elapsed // 86400)
-    hours = int((elapsed % 86400) // 3600)
-    minutes = int((elapsed % 3600) // 60)
-    seconds = elapsed % 60
-
-    # Format time output
-    time_parts = []
-    if days > 0:
-        time_parts.append(f"{days}d")
-    if hours > 0 or days > 0:
-        time_parts.append(f"{hours}h")
-    if minutes > 0 or hours > 0 or days > 0:
-        time_parts.append(f"{minutes}m")
-    time_parts.append(f"{seconds:.2f}s")
+    if cached_listing is not None:
+        update_remote_listing(host_config, protocol, cached_listing, uploaded)
 
     click.echo()
-    click.echo(f"⏱️  Upload completed in {' '.join(time_parts)}")
+    click.echo(f"⏱️  Upload completed in {format_elapsed(time.time() - start_time)}")
 
 
 if __name__ == "__main__":
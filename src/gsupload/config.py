@@ -5,6 +5,7 @@ Handles hierarchical configuration from global and project-level files.
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -34,26 +35,27 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
     ]
 
     for loc in global_locations:
-        if loc.exists():
+        if os.path.isfile(loc):
             try:
-                with open(loc, "r") as f:
-                    configs_to_merge.append((loc, json.load(f)))
+                with open(loc, "rb") as f:
+                    configs_to_merge.append((loc, json.loads(f.read())))
                     source_map["config_files"].append(str(loc))
                     break
             except json.JSONDecodeError as e:
                 click.echo(f"Warning: Failed to parse '{loc}': {e}", err=True)
 
     # Collect all .gsupload.json files from root down to cwd
+    # Ascend with plain strings: one isfile() stat per level, no Path objects
     project_configs: List[Path] = []
-    current_dir = Path.cwd()
+    current_dir = os.fspath(Path.cwd())
 
     while True:
-        candidate = current_dir / ".gsupload.json"
-        if candidate.exists():
-            project_configs.append(candidate)
+        candidate = os.path.join(current_dir, ".gsupload.json")
+        if os.path.isfile(candidate):
+            project_configs.append(Path(candidate))
 
         # Move to parent directory
-        parent = current_dir.parent
+        parent = os.path.dirname(current_dir)
         if parent == current_dir:
             # Reached filesystem root
             break
@@ -65,8 +67,8 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
     # Load project configs
     for config_path in project_configs:
         try:
-            with open(config_path, "r") as f:
-                configs_to_merge.append((config_path, json.load(f)))
+            with open(config_path, "rb") as f:
+                configs_to_merge.append((config_path, json.loads(f.read())))
                 source_map["config_files"].append(str(config_path))
         except json.JSONDecodeError as e:
             click.echo(f"Warning: Failed to parse '{config_path}': {e}", err=True)
@@ -81,7 +83,7 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
 
     # Merge all configs with source tracking
     merged_config: Dict[str, Any] = {}
-    all_global_excludes: List[str] = []
+    exclude_sources: Dict[str, List[str]] = source_map["global_excludes"]
 
     for config_path, config in configs_to_merge:
         config_path_str = str(config_path)
@@ -89,10 +91,7 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
         # Track global_excludes with source
         if "global_excludes" in config:
             for pattern in config["global_excludes"]:
-                if pattern not in source_map["global_excludes"]:
-                    source_map["global_excludes"][pattern] = []
-                source_map["global_excludes"][pattern].append(config_path_str)
-            all_global_excludes.extend(config["global_excludes"])
+                exclude_sources.setdefault(pattern, []).append(config_path_str)
 
         # Merge bindings with source tracking
         if "bindings" in config:
@@ -101,15 +100,14 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
 
             for binding_name, binding_config in config["bindings"].items():
                 # Track binding source
-                if binding_name not in source_map["bindings"]:
-                    source_map["bindings"][binding_name] = {
+                binding_sources = source_map["bindings"].get(binding_name)
+                if binding_sources is None:
+                    binding_sources = source_map["bindings"][binding_name] = {
                         "defined_in": [],
                         "properties": {},
                     }
 
-                source_map["bindings"][binding_name]["defined_in"].append(
-                    config_path_str
-                )
+                binding_sources["defined_in"].append(config_path_str)
 
                 # Resolve local_basepath relative to config file location
                 if "local_basepath" in binding_config:
@@ -117,30 +115,20 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
                     local_basepath_path = Path(local_basepath_str).expanduser()
 
                     if not local_basepath_path.is_absolute():
-                        local_basepath_path = (
-                            config_path.parent / local_basepath_path
-                        ).resolve()
-                    else:
-                        local_basepath_path = local_basepath_path.resolve()
+                        local_basepath_path = config_path.parent / local_basepath_path
 
                     binding_config = binding_config.copy()
-                    binding_config["local_basepath"] = str(local_basepath_path)
+                    binding_config["local_basepath"] = _resolve_basepath(
+                        str(local_basepath_path)
+                    )
                 elif binding_name not in merged_config["bindings"]:
                     binding_config = binding_config.copy()
                     binding_config["local_basepath"] = str(config_path.parent.resolve())
 
                 # Track each property's source
-                for prop_key, prop_value in binding_config.items():
-                    if (
-                        prop_key
-                        not in source_map["bindings"][binding_name]["properties"]
-                    ):
-                        source_map["bindings"][binding_name]["properties"][
-                            prop_key
-                        ] = []
-                    source_map["bindings"][binding_name]["properties"][prop_key].append(
-                        config_path_str
-                    )
+                property_sources = binding_sources["properties"]
+                for prop_key in binding_config:
+                    property_sources.setdefault(prop_key, []).append(config_path_str)
 
                 if binding_name in merged_config["bindings"]:
                     merged_config["bindings"][binding_name].update(binding_config)
@@ -152,13 +140,31 @@ def load_config_with_sources() -> Tuple[Dict[str, Any], Dict[str, Any]]:
             if key not in ["global_excludes", "bindings"]:
                 merged_config[key] = config[key]
 
-    # Set the combined global_excludes
-    if all_global_excludes:
-        merged_config["global_excludes"] = all_global_excludes
+    # Set the combined global_excludes: every pattern once, in first-seen order
+    # (exclude_sources is keyed by pattern), so the same pattern repeated at
+    # several config levels isn't matched against every path several times
+    if exclude_sources:
+        merged_config["global_excludes"] = list(exclude_sources)
 
     return merged_config, source_map
 
 
+def _resolve_basepath(path_str: str) -> str:
+    """
+    Expand ~ and resolve a local_basepath.
+
+    Not memoized: a relative path resolves against the current directory,
+    and config is loaded once per process anyway.
+
+    Args:
+        path_str: Path as written in a config (or already resolved).
+
+    Returns:
+        Resolved absolute path as a string.
+    """
+    return str(Path(path_str).expanduser().resolve())
+
+
 def load_config() -> Dict[str, Any]:
     """
     Load and merge configuration files with inheritance.
@@ -214,38 +220,41 @@ def show_config(merged_config: Dict[str, Any], source_map: Dict[str, Any]) -> No
         merged_config: The final merged configuration.
         source_map: Dictionary tracking sources for each config item.
     """
+    # Lines are collected and written with a single echo at the end
+    lines: List[str] = []
+
     # Display config files in merge order
-    click.echo(
+    lines.append(
         click.style("\n📋 Configuration Files (merge order):", fg="cyan", bold=True)
     )
     for i, config_file in enumerate(source_map["config_files"], 1):
-        click.echo(f"  {i}. {config_file}")
+        lines.append(f"  {i}. {config_file}")
 
     # Display merged configuration with colors
-    click.echo(click.style("\n🔀 Merged Configuration:", fg="cyan", bold=True))
+    lines.append(click.style("\n🔀 Merged Configuration:", fg="cyan", bold=True))
     formatted_json = json.dumps(merged_config, indent=2)
-    click.echo(click.style(formatted_json, fg="green"))
+    lines.append(click.style(formatted_json, fg="green"))
 
     # Display source annotations
-    click.echo(click.style("\n📍 Source Annotations:", fg="cyan", bold=True))
+    lines.append(click.style("\n📍 Source Annotations:", fg="cyan", bold=True))
 
     # Global excludes
     if source_map.get("global_excludes"):
-        click.echo(click.style("\n  global_excludes:", fg="yellow", bold=True))
+        lines.append(click.style("\n  global_excludes:", fg="yellow", bold=True))
         for pattern, sources in source_map["global_excludes"].items():
             sources_str = ", ".join(str(s) for s in sources)
-            click.echo(f"    • {click.style(pattern, fg='white')}")
-            click.echo(f"      ↳ from: {click.style(sources_str, fg='blue')}")
+            lines.append(f"    • {click.style(pattern, fg='white')}")
+            lines.append(f"      ↳ from: {click.style(sources_str, fg='blue')}")
 
     # Bindings
     if source_map.get("bindings"):
-        click.echo(click.style("\n  bindings:", fg="yellow", bold=True))
+        lines.append(click.style("\n  bindings:", fg="yellow", bold=True))
         for binding_name, binding_info in source_map["bindings"].items():
-            click.echo(f"    • {click.style(binding_name, fg='white', bold=True)}")
+            lines.append(f"    • {click.style(binding_name, fg='white', bold=True)}")
 
             # Show where binding was defined
             defined_in_str = ", ".join(str(s) for s in binding_info["defined_in"])
-            click.echo(
+            lines.append(
                 f"      ↳ defined in: {click.style(defined_in_str, fg='blue', dim=True)}"
             )
 
@@ -253,10 +262,12 @@ def show_config(merged_config: Dict[str, Any], source_map: Dict[str, Any]) -> No
             if binding_info.get("properties"):
                 for prop, sources in binding_info["properties"].items():
                     sources_str = ", ".join(str(s) for s in sources)
-                    click.echo(
+                    lines.append(
                         f"        - {click.style(prop, fg='magenta')}: from {click.style(sources_str, fg='blue', dim=True)}"
                     )
 
+    click.echo("\n".join(lines))
+
 
 def auto_detect_binding(config: Dict[str, Any]) -> Optional[str]:
     """
@@ -276,37 +287,40 @@ def auto_detect_binding(config: Dict[str, Any]) -> Optional[str]:
     if not bindings:
         return None
 
-    cwd = Path.cwd().resolve()
+    cwd_str = str(Path.cwd().resolve())
 
-    # Find all bindings where cwd is within or equals local_basepath
-    matches: List[Tuple[str, Path, Dict[str, Any]]] = []
+    # Find the most specific binding (deepest path by component count) whose
+    # local_basepath contains or equals cwd, in a single pass. Bindings that
+    # point at that same path are all kept so the user can choose.
+    best_depth = -1
+    best_match_path: Optional[str] = None
+    same_path_bindings: List[Tuple[str, Dict[str, Any]]] = []
     for alias, binding_config in bindings.items():
         local_basepath_str = binding_config.get("local_basepath", "")
         if not local_basepath_str:
             continue
 
-        # Expand ~ and resolve to absolute path
-        local_basepath = Path(local_basepath_str).expanduser().resolve()
+        # Expand ~ and resolve to absolute path (usually already done by the
+        # config loader)
+        basepath_str = _resolve_basepath(local_basepath_str)
 
-        try:
-            # Check if cwd is within this binding's basepath
-            cwd.relative_to(local_basepath)
-            matches.append((alias, local_basepath, binding_config))
-        except ValueError:
-            # cwd is not within this basepath
+        # Check if cwd is within this binding's basepath (plain string prefix,
+        # no exception raised for the common non-matching case)
+        if cwd_str != basepath_str and not cwd_str.startswith(
+            basepath_str.rstrip(os.sep) + os.sep
+        ):
             continue
 
-    if not matches:
-        return None
-
-    # Return the most specific match (longest/deepest path)
-    matches.sort(key=lambda x: len(str(x[1])), reverse=True)
+        depth = len(Path(basepath_str).parts)
+        if depth > best_depth:
+            best_depth = depth
+            best_match_path = basepath_str
+            same_path_bindings = [(alias, binding_config)]
+        elif basepath_str == best_match_path:
+            same_path_bindings.append((alias, binding_config))
 
-    # Check if multiple bindings point to the exact same local_basepath
-    best_match_path = matches[0][1]
-    same_path_bindings = [
-        (alias, cfg) for alias, path, cfg in matches if path == best_match_path
-    ]
+    if not same_path_bindings:
+        return None
 
     if len(same_path_bindings) > 1:
         # Multiple bindings for the same path - let user choose
@@ -372,4 +386,4 @@ def auto_detect_binding(config: Dict[str, Any]) -> Optional[str]:
                 click.echo("\nOperation cancelled.")
                 sys.exit(0)
 
-    return matches[0][0]
+    return same_path_bindings[0][0]
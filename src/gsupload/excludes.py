@@ -6,11 +6,23 @@ Handles .gsupload_ignore files, pattern matching, and directory walking.
 
 import fnmatch
 import os
-from pathlib import Path
-from typing import List
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path, PurePath
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 import click
 
+# Parsed .gsupload_ignore files keyed by path, invalidated by mtime
+_IGNORE_FILE_CACHE: Dict[Path, Tuple[Tuple[int, int], List[str]]] = {}
+
+
+@lru_cache(maxsize=1024)
+def _resolve_path(path: Path) -> Path:
+    """Return path.resolve(), memoized to avoid repeated realpath syscalls."""
+    return path.resolve()
+
 
 def load_ignore_file(path: Path) -> List[str]:
     """
@@ -22,16 +34,63 @@ def load_ignore_file(path: Path) -> List[str]:
     Returns:
         List of exclude patterns (empty if file doesn't exist or can't be read).
     """
-    if not path.exists():
+    try:
+        st = path.stat()
+    except OSError:
         return []
+
+    # Size guards against rewrites landing within the filesystem's mtime tick
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _IGNORE_FILE_CACHE.get(path)
+    if cached is not None and cached[0] == key:
+        return list(cached[1])
+
     try:
-        with open(path, "r") as f:
-            return [
-                line.strip() for line in f if line.strip() and not line.startswith("#")
-            ]
+        lines = path.read_text().splitlines()
     except Exception:
         return []
 
+    patterns = [
+        line.strip() for line in lines if line.strip() and not line.startswith("#")
+    ]
+    _IGNORE_FILE_CACHE[path] = (key, patterns)
+    return list(patterns)
+
+
+def _load_dir_ignore_patterns(directory: Path, rel_dir: str) -> List[str]:
+    """
+    Load a single directory's .gsupload_ignore, anchoring path patterns to it.
+
+    Args:
+        directory: Directory that may contain a .gsupload_ignore file.
+        rel_dir: directory relative to local_basepath, POSIX style ("." for the base).
+
+    Returns:
+        Patterns adjusted to be relative to local_basepath.
+    """
+    adjusted_excludes: List[str] = []
+
+    # load_ignore_file() returns [] for missing files, so no exists() probe
+    for p in load_ignore_file(directory / ".gsupload_ignore"):
+        if "/" in p.rstrip("/"):
+            # Pattern has path components - anchor it to current directory
+            clean_p = p
+            if clean_p.startswith("/"):
+                clean_p = clean_p[1:]
+
+            # Construct pattern relative to local_basepath
+            if rel_dir == ".":
+                new_p = "/" + clean_p
+            else:
+                new_p = "/" + rel_dir + "/" + clean_p
+
+            adjusted_excludes.append(new_p)
+        else:
+            # Simple name pattern - applies anywhere
+            adjusted_excludes.append(p)
+
+    return adjusted_excludes
+
 
 def collect_ignore_patterns(directory: Path, local_basepath: Path) -> List[str]:
     """
@@ -47,59 +106,141 @@ def collect_ignore_patterns(directory: Path, local_basepath: Path) -> List[str]:
         List of exclude patterns from all .gsupload_ignore files found.
     """
     all_excludes: List[str] = []
-    current = directory
 
-    # Walk up from directory to local_basepath, collecting ignore files
+    # Resolve both ends once; the walk itself is purely lexical
+    try:
+        base_resolved = _resolve_path(local_basepath)
+        current = _resolve_path(directory)
+    except (ValueError, OSError):
+        return all_excludes
+
+    # Walk up from directory to local_basepath, collecting ignore files. Both
+    # ends are resolved once; the walk itself is lexical string slicing.
+    base_str = str(base_resolved)
+    base_prefix = base_str.rstrip(os.sep) + os.sep
+    current_str = str(current)
     while True:
-        ignore_file = current / ".gsupload_ignore"
-        if ignore_file.exists():
-            local_excludes = load_ignore_file(ignore_file)
-
-            # Adjust patterns to be relative to local_basepath
-            adjusted_excludes: List[str] = []
-            try:
-                rel_dir = current.relative_to(local_basepath)
-            except ValueError:
-                rel_dir = Path(".")
-
-            for p in local_excludes:
-                if "/" in p.rstrip("/"):
-                    # Pattern has path components - anchor it to current directory
-                    clean_p = p
-                    if clean_p.startswith("/"):
-                        clean_p = clean_p[1:]
-
-                    # Construct pattern relative to local_basepath
-                    rel_dir_str = str(rel_dir).replace(os.sep, "/")
-                    if rel_dir_str == ".":
-                        new_p = "/" + clean_p
-                    else:
-                        new_p = "/" + rel_dir_str + "/" + clean_p
-
-                    adjusted_excludes.append(new_p)
-                else:
-                    # Simple name pattern - applies anywhere
-                    adjusted_excludes.append(p)
-
-            all_excludes.extend(adjusted_excludes)
+        if current_str.startswith(base_prefix):
+            rel_dir = current_str[len(base_prefix) :].replace(os.sep, "/")
+        else:
+            # local_basepath itself, or a directory outside it
+            rel_dir = "."
+        all_excludes.extend(_load_dir_ignore_patterns(Path(current_str), rel_dir))
 
         # Stop if we've reached local_basepath or filesystem root
-        try:
-            if current.resolve() == local_basepath.resolve():
-                break
-        except (ValueError, OSError):
+        if current_str == base_str:
             break
 
-        parent = current.parent
-        if parent == current:
+        parent = os.path.dirname(current_str)
+        if parent == current_str:
             # Reached filesystem root
             break
-        current = parent
+        current_str = parent
 
     return all_excludes
 
 
-def is_excluded(path: Path, excludes: List[str], local_basepath: Path) -> bool:
+class _CompiledExcludes(NamedTuple):
+    """Exclude patterns grouped and compiled for matching."""
+
+    # Union regex over simple name patterns (no slash), or None if there are none
+    name_match: Optional[Callable[[str], Any]]
+    # Same, for directory-only name patterns (trailing slash)
+    dir_name_match: Optional[Callable[[str], Any]]
+    # Union regex over anchored path patterns, keyed by segment count
+    path_match: Dict[int, Callable[[str], Any]]
+    # Same, for directory-only path patterns
+    dir_path_match: Dict[int, Callable[[str], Any]]
+
+
+def _union_match(patterns: List[str], flags: int) -> Optional[Callable[[str], Any]]:
+    """Compile fnmatch patterns into one alternation regex and return its match."""
+    if not patterns:
+        return None
+    union = "|".join(f"(?:{fnmatch.translate(p)})" for p in patterns)
+    return re.compile(union, flags).match
+
+
+def _segment_match(patterns: List[str], flags: int) -> Dict[int, Callable[[str], Any]]:
+    """
+    Compile anchored path patterns into one regex per segment count.
+
+    Mirrors PurePath("/", rel).match(pattern) for an anchored pattern: the
+    path must have exactly as many segments as the pattern, and each segment
+    is matched with fnmatch. Within a bucket every "/" of the path is consumed
+    by a literal "/" of the pattern, so wildcards can never cross segments and
+    the joined translations can be matched against the "/"-joined path.
+    """
+    root = PurePath("/").anchor
+    buckets: Dict[int, List[str]] = {}
+    for pattern in patterns:
+        pure = PurePath(pattern)
+        if pure.anchor != root:
+            # e.g. "//x": PurePath.match() compares anchors, which never agree
+            continue
+        segments = pure.parts[1:]
+        # fnmatch.translate() returns "(?s:...)\Z"; drop the end anchor so
+        # segments can be joined, and re-anchor the whole path once
+        regex = "/".join(fnmatch.translate(seg)[:-2] for seg in segments)
+        buckets.setdefault(len(segments), []).append(regex)
+
+    return {
+        count: re.compile(
+            "(?:" + "|".join(f"(?:{r})" for r in regexes) + r")\Z", flags
+        ).match
+        for count, regexes in buckets.items()
+    }
+
+
+@lru_cache(maxsize=32)
+def _compile_excludes(excludes: Tuple[str, ...]) -> _CompiledExcludes:
+    """
+    Parse and compile exclude patterns once per distinct pattern list.
+
+    All name patterns are folded into a single regex, so matching a name costs
+    one regex call regardless of how many patterns there are.
+
+    Args:
+        excludes: Exclude patterns as a tuple (hashable cache key).
+
+    Returns:
+        Compiled exclude patterns.
+    """
+    # fnmatch.fnmatch() normalizes case on case-insensitive platforms
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    names: List[str] = []
+    dir_names: List[str] = []
+    paths: List[str] = []
+    dir_paths: List[str] = []
+
+    for pattern in excludes:
+        p = pattern
+        must_be_dir = False
+        if p.endswith("/"):
+            p = p[:-1]
+            must_be_dir = True
+
+        if "/" not in p:
+            (dir_names if must_be_dir else names).append(p)
+        else:
+            # Unanchored path patterns are treated as anchored to the base
+            anchored = p if p.startswith("/") else "/" + p
+            (dir_paths if must_be_dir else paths).append(anchored)
+
+    return _CompiledExcludes(
+        _union_match(names, flags),
+        _union_match(dir_names, flags),
+        _segment_match(paths, flags),
+        _segment_match(dir_paths, flags),
+    )
+
+
+def is_excluded(
+    path: Path,
+    excludes: List[str],
+    local_basepath: Path,
+    is_dir: Optional[bool] = None,
+) -> bool:
     """
     Check if a path matches any exclude pattern.
 
@@ -109,53 +250,121 @@ def is_excluded(path: Path, excludes: List[str], local_basepath: Path) -> bool:
         path: Path to check.
         excludes: List of exclude patterns.
         local_basepath: Base directory for relative path calculation.
+        is_dir: Whether path is a directory, if the caller already knows;
+            otherwise it is checked on disk when directory-only patterns exist.
 
     Returns:
         True if path should be excluded, False otherwise.
     """
-    try:
-        rel_path = path.relative_to(local_basepath)
-    except ValueError:
-        return False
+    # Plain string prefix check for the common case; relative_to() only for
+    # the rest (the base itself, or spellings that differ only lexically)
+    path_str = str(path)
+    base_prefix = str(local_basepath).rstrip(os.sep) + os.sep
+    if path_str.startswith(base_prefix):
+        rel_path = path_str[len(base_prefix) :]
+    else:
+        try:
+            rel_path = str(path.relative_to(local_basepath))
+        except ValueError:
+            return False
+
+    return _matches_excludes(
+        _compile_excludes(tuple(excludes)),
+        rel_path,
+        path.name,
+        path.is_dir if is_dir is None else lambda: is_dir,
+    )
+
+
+def is_excluded_str(
+    path_str: str,
+    excludes: List[str],
+    local_basepath: Path,
+    is_dir: Optional[bool] = None,
+) -> bool:
+    """
+    Same as is_excluded(), but take the path as a plain string.
 
-    name = path.name
+    Paths inside local_basepath are matched without building a Path, so
+    callers filtering many candidates only pay for one on the survivors.
 
-    # Create a "rooted" path for matching to ensure anchors work correctly
-    rooted_rel_path = Path("/") / rel_path
+    Args:
+        path_str: Absolute path to check.
+        excludes: List of exclude patterns.
+        local_basepath: Base directory for relative path calculation.
+        is_dir: Whether path is a directory, if the caller already knows.
 
-    for pattern in excludes:
-        p = pattern
-        must_be_dir = False
-        if p.endswith("/"):
-            p = p[:-1]
-            must_be_dir = True
+    Returns:
+        True if path should be excluded, False otherwise.
+    """
+    base_prefix = str(local_basepath).rstrip(os.sep) + os.sep
+    if not path_str.startswith(base_prefix):
+        return is_excluded(Path(path_str), excludes, local_basepath, is_dir)
+
+    return _matches_excludes(
+        _compile_excludes(tuple(excludes)),
+        path_str[len(base_prefix) :],
+        os.path.basename(path_str),
+        (lambda: os.path.isdir(path_str)) if is_dir is None else lambda: is_dir,
+    )
+
+
+def _matches_excludes(
+    compiled: _CompiledExcludes,
+    rel_path: str,
+    name: str,
+    is_dir: Callable[[], bool],
+) -> bool:
+    """
+    Match a path against compiled exclude patterns.
 
-        if must_be_dir and not path.is_dir():
-            continue
+    Args:
+        compiled: Patterns from _compile_excludes().
+        rel_path: Path relative to local_basepath (native separators).
+        name: Final path component.
+        is_dir: Callable reporting whether the path is a directory; only
+            invoked when directory-only patterns exist.
 
-        # Check if it's a simple filename match (no slash in pattern)
-        if "/" not in p:
-            # Simple name match (e.g. "*.log", "node_modules")
-            if fnmatch.fnmatch(name, p):
+    Returns:
+        True if any pattern matches.
+    """
+    # Simple name match (e.g. "*.log", "node_modules")
+    if compiled.name_match is not None and compiled.name_match(name):
+        return True
+
+    check_dir_paths = False
+    if compiled.dir_name_match is not None or compiled.dir_path_match:
+        if is_dir():
+            if compiled.dir_name_match is not None and compiled.dir_name_match(name):
                 return True
-        else:
-            # Pattern involves paths (e.g. "src/*.tmp", "/build", "foo/bar")
-            match_pattern = p
-            if match_pattern.startswith("/"):
-                # Pattern is anchored - match against rooted_rel_path
-                if rooted_rel_path.match(match_pattern):
-                    return True
-            else:
-                # Pattern is not anchored - treat as anchored to base
-                match_pattern = "/" + match_pattern
-                if rooted_rel_path.match(match_pattern):
-                    return True
+            check_dir_paths = bool(compiled.dir_path_match)
 
+    if not compiled.path_match and not check_dir_paths:
+        return False
+
+    # Pattern involves paths (e.g. "src/*.tmp", "/build", "foo/bar").
+    # Patterns are anchored, so only those with as many segments as the path
+    # can match.
+    # Count separators rather than splitting, so no per-path list is built
+    if rel_path in ("", "."):
+        joined, segment_count = "", 0
+    else:
+        joined = rel_path if os.sep == "/" else rel_path.replace(os.sep, "/")
+        segment_count = joined.count("/") + 1
+    match = compiled.path_match.get(segment_count)
+    if match is not None and match(joined):
+        return True
+    if check_dir_paths:
+        match = compiled.dir_path_match.get(segment_count)
+        return match is not None and match(joined) is not None
     return False
 
 
 def walk_directory(
-    directory: Path, excludes: List[str], local_basepath: Path
+    directory: Path,
+    excludes: List[str],
+    local_basepath: Path,
+    max_workers: int = 1,
 ) -> List[Path]:
     """
     Recursively walk a directory, applying exclude patterns.
@@ -164,33 +373,214 @@ def walk_directory(
         directory: Directory to walk.
         excludes: List of exclude patterns.
         local_basepath: Base directory for relative path calculation.
+        max_workers: Number of threads listing directories (default: 1).
 
     Returns:
         List of file paths that are not excluded.
     """
-    files: List[Path] = []
+    return [
+        Path(p)
+        for p in walk_directory_strs(directory, excludes, local_basepath, max_workers)
+    ]
+
+
+def walk_directory_strs(
+    directory: Path,
+    excludes: List[str],
+    local_basepath: Path,
+    max_workers: int = 1,
+) -> List[str]:
+    """
+    Same as walk_directory(), but return the file paths as plain strings.
 
-    # Collect all .gsupload_ignore files from this directory up to local_basepath
-    ignore_excludes = collect_ignore_patterns(directory, local_basepath)
+    The walk works on strings throughout; building a Path per file is most of
+    its cost, so callers that only need strings (or only some of the Paths)
+    should use this.
 
-    # Combine with passed excludes
-    current_excludes = excludes + ignore_excludes
+    Args:
+        directory: Directory to walk.
+        excludes: List of exclude patterns.
+        local_basepath: Base directory for relative path calculation.
+        max_workers: Number of threads listing directories (default: 1).
 
+    Returns:
+        List of file paths that are not excluded.
+    """
+    files: List[str] = []
+
+    base_prefix = str(local_basepath).rstrip(os.sep) + os.sep
+
+    # Collect all .gsupload_ignore files from this directory up to local_basepath,
+    # combined with passed excludes. Subdirectories then inherit their parent's
+    # list, already compiled, plus their own .gsupload_ignore. Each item also
+    # carries the directory's POSIX relative path, or None when its own ignore
+    # file is already accounted for (the start directory) or it lies outside
+    # the base.
+    start_excludes = excludes + collect_ignore_patterns(directory, local_basepath)
+    pending: List[Tuple[str, List[str], _CompiledExcludes, Optional[str]]] = [
+        (
+            str(directory),
+            start_excludes,
+            _compile_excludes(tuple(start_excludes)),
+            None,
+        )
+    ]
+
+    # Level-by-level walk, as in find_files_by_name(): with max_workers > 1
+    # each level's directories are listed concurrently. Matching stays on
+    # this thread.
+    executor = ThreadPoolExecutor(max_workers) if max_workers > 1 else None
     try:
-        entries = list(directory.iterdir())
-    except OSError:
-        return []
+        while pending:
+            dir_paths = [item[0] for item in pending]
+            # A level with a single directory gains nothing from a thread hop
+            listings = (
+                executor.map(_scandir_entries, dir_paths)
+                if executor and len(dir_paths) > 1
+                else map(_scandir_entries, dir_paths)
+            )
+            next_pending: List[
+                Tuple[str, List[str], _CompiledExcludes, Optional[str]]
+            ] = []
+
+            for (dir_path, current_excludes, patterns, rel_dir), entries in zip(
+                pending, listings
+            ):
+                # The listing already says whether there is an ignore file, so
+                # most directories need no extra stat() probe for it
+                if rel_dir is not None and any(
+                    e.name == ".gsupload_ignore" for e in entries
+                ):
+                    own = _load_dir_ignore_patterns(Path(dir_path), rel_dir)
+                    if own:
+                        current_excludes = current_excludes + own
+                        patterns = _compile_excludes(tuple(current_excludes))
+
+                for entry in entries:
+                    # DirEntry caches type information, so these rarely stat()
+                    if entry.path.startswith(base_prefix):
+                        rel_path = entry.path[len(base_prefix) :]
+                        if _matches_excludes(
+                            patterns, rel_path, entry.name, entry.is_dir
+                        ):
+                            continue
+                    else:
+                        rel_path = None
+
+                    if entry.is_file():
+                        files.append(entry.path)
+                    elif entry.is_dir():
+                        child_rel = (
+                            None if rel_path is None else rel_path.replace(os.sep, "/")
+                        )
+                        next_pending.append(
+                            (entry.path, current_excludes, patterns, child_rel)
+                        )
+
+            pending = next_pending
+    finally:
+        if executor:
+            executor.shutdown()
 
-    for entry in entries:
-        if is_excluded(entry, current_excludes, local_basepath):
-            continue
+    return files
 
-        if entry.is_file():
-            files.append(entry)
-        elif entry.is_dir():
-            files.extend(walk_directory(entry, current_excludes, local_basepath))
 
-    return files
+def find_files_by_name(
+    directory: Path,
+    patterns: List[str],
+    excludes: List[str],
+    local_basepath: Path,
+    max_workers: int = 1,
+) -> Dict[str, List[str]]:
+    """
+    Recursively find files whose names match any of the patterns.
+
+    The tree is walked once with os.scandir regardless of how many patterns
+    are given. Excluded directories are pruned rather than descended into,
+    and like Path.rglob(), symlinked directories are not followed. Files
+    themselves are not checked against excludes; callers filter them.
+
+    Args:
+        directory: Directory to search from.
+        patterns: File name patterns (fnmatch syntax).
+        excludes: List of exclude patterns.
+        local_basepath: Base directory for relative path calculation.
+        max_workers: Number of threads listing directories (default: 1).
+
+    Returns:
+        Mapping of each pattern to the matching file paths, in walk order.
+    """
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    results: Dict[str, List[str]] = {p: [] for p in patterns}
+    match_any = _union_match(list(results), flags)
+    if match_any is None:
+        return results
+
+    # With a single pattern (the common "gsupload '*.css'" case) the union
+    # match already says which pattern matched, so skip per-pattern matching
+    single: Optional[List[str]] = None
+    compiled: List[Tuple[str, Callable[[str], Any]]] = []
+    if len(results) == 1:
+        single = next(iter(results.values()))
+    else:
+        compiled = [(p, re.compile(fnmatch.translate(p), flags).match) for p in results]
+
+    compiled_excludes = _compile_excludes(tuple(excludes))
+    base_prefix = str(local_basepath).rstrip(os.sep) + os.sep
+
+    # Level-by-level walk; with max_workers > 1 each level's directories are
+    # listed concurrently (scandir releases the GIL), which hides per-directory
+    # latency on network mounts
+    executor = ThreadPoolExecutor(max_workers) if max_workers > 1 else None
+    try:
+        pending = [str(directory)]
+        while pending:
+            listings = (
+                executor.map(_scandir_entries, pending)
+                if executor and len(pending) > 1
+                else map(_scandir_entries, pending)
+            )
+            next_pending: List[str] = []
+
+            for entries in listings:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path.startswith(base_prefix) and _matches_excludes(
+                            compiled_excludes,
+                            entry.path[len(base_prefix) :],
+                            entry.name,
+                            lambda: True,
+                        ):
+                            continue
+                        next_pending.append(entry.path)
+                    elif match_any(entry.name) and entry.is_file():
+                        if single is not None:
+                            single.append(entry.path)
+                            continue
+                        for pattern, match in compiled:
+                            if match(entry.name):
+                                results[pattern].append(entry.path)
+
+            pending = next_pending
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return results
+
+
+def _sorted_entries(path: str) -> List[os.DirEntry]:
+    """List a directory's entries ordered like sorted(Path.iterdir())."""
+    return sorted(_scandir_entries(path), key=lambda e: os.path.normcase(e.name))
+
+
+def _scandir_entries(path: str) -> List[os.DirEntry]:
+    """List a directory's entries, returning [] if it can't be read."""
+    try:
+        with os.scandir(path) as it:
+            return list(it)
+    except OSError:
+        return []
 
 
 def show_ignored_files(
@@ -213,40 +603,46 @@ def show_ignored_files(
         return
 
     # Display active exclude patterns
-    click.echo(click.style("Active exclude patterns:", fg="yellow"))
-    for pattern in excludes:
-        click.echo(f"  • {click.style(pattern, fg='white')}")
-    click.echo()
+    white_on, white_off = click.style("\0", fg="white").split("\0")
+    click.echo(
+        "\n".join(
+            [click.style("Active exclude patterns:", fg="yellow")]
+            + [f"  • {white_on}{pattern}{white_off}" for pattern in excludes]
+        )
+        + "\n"
+    )
 
     ignored_items: List[tuple] = []
     scanned_count = 0
 
-    def scan_directory(directory: Path, depth: int = 0) -> None:
-        nonlocal scanned_count
+    compiled = _compile_excludes(tuple(excludes))
+    base_prefix = str(local_basepath).rstrip(os.sep) + os.sep
+
+    # Depth-first, in sorted order; each frame is an iterator over one
+    # directory's entries, so deep trees don't hit the recursion limit
+    stack: List[Tuple[Iterator[os.DirEntry], int]] = [
+        (iter(_sorted_entries(str(local_basepath))), 0)
+    ]
+    while stack:
+        entries, depth = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
 
-        try:
-            entries = sorted(directory.iterdir())
-        except (OSError, PermissionError):
-            return
-
-        for entry in entries:
-            scanned_count += 1
-
-            # Check if this item is excluded
-            if is_excluded(entry, excludes, local_basepath):
-                try:
-                    rel_path = entry.relative_to(local_basepath)
-                    item_type = "📁" if entry.is_dir() else "📄"
-                    ignored_items.append((str(rel_path), item_type, depth))
-                except ValueError:
-                    pass
-                continue  # Don't descend into excluded directories
+        scanned_count += 1
 
-            # If not excluded and it's a directory, scan it recursively
-            if recursive and entry.is_dir():
-                scan_directory(entry, depth + 1)
+        # Check if this item is excluded
+        if entry.path.startswith(base_prefix):
+            rel_path = entry.path[len(base_prefix) :]
+            if _matches_excludes(compiled, rel_path, entry.name, entry.is_dir):
+                item_type = "📁" if entry.is_dir() else "📄"
+                ignored_items.append((rel_path, item_type, depth))
+                continue  # Don't descend into excluded directories
 
-    scan_directory(local_basepath)
+        # If not excluded and it's a directory, scan it recursively
+        if recursive and entry.is_dir():
+            stack.append((iter(_sorted_entries(entry.path)), depth + 1))
 
     # Display ignored items
     if ignored_items:
@@ -257,9 +653,16 @@ def show_ignored_files(
         )
         click.echo()
 
-        for rel_path, item_type, depth in ignored_items:
-            indent = "  " * depth
-            click.echo(f"{indent}{item_type} {click.style(rel_path, fg='bright_red')}")
+        # Style once and wrap each path in the resulting escape codes instead
+        # of calling click.style() per item
+        red_on, red_off = click.style("\0", fg="bright_red").split("\0")
+        # One write for the whole listing rather than one per item
+        click.echo(
+            "\n".join(
+                f"{'  ' * depth}{item_type} {red_on}{rel_path}{red_off}"
+                for rel_path, item_type, depth in ignored_items
+            )
+        )
     else:
         click.echo(click.style("No ignored files or directories found.", fg="green"))
 
@@ -1,15 +1,54 @@
 """
 Protocols subpackage for gsupload.
 
-Re-exports FTP and SFTP protocol functions.
+Re-exports FTP and SFTP protocol functions. The submodules are imported on
+first attribute access (PEP 562), so using one protocol doesn't pay for
+importing the other; the SFTP module pulls in paramiko.
 """
 
-from gsupload.protocols.ftp import list_remote_ftp, upload_ftp
-from gsupload.protocols.sftp import list_remote_sftp, upload_sftp
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from gsupload.protocols.ftp import (
+        list_remote_ftp,
+        list_remote_ftp_dirs,
+        upload_ftp,
+    )
+    from gsupload.protocols.sftp import (
+        list_remote_sftp,
+        list_remote_sftp_dirs,
+        upload_sftp,
+    )
+
+_LAZY_EXPORTS = {
+    "list_remote_ftp": "gsupload.protocols.ftp",
+    "list_remote_ftp_dirs": "gsupload.protocols.ftp",
+    "upload_ftp": "gsupload.protocols.ftp",
+    "list_remote_sftp": "gsupload.protocols.sftp",
+    "list_remote_sftp_dirs": "gsupload.protocols.sftp",
+    "upload_sftp": "gsupload.protocols.sftp",
+}
 
 __all__ = [
     "list_remote_ftp",
+    "list_remote_ftp_dirs",
     "upload_ftp",
     "list_remote_sftp",
+    "list_remote_sftp_dirs",
     "upload_sftp",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the protocol module defining name and cache the attribute."""
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
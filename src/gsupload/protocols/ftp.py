@@ -6,15 +6,341 @@ Handles FTP file listing and upload operations.
 
 import ftplib
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import socket
+import stat
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
-from queue import Queue
-from threading import Lock
-from typing import Any, Dict, List, Set, Tuple
+from queue import Empty, Queue
+from threading import Lock, local
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import click
 
-from gsupload.utils import calculate_remote_path
+from gsupload.utils import (
+    calculate_remote_paths,
+    echo_upload_results,
+    enable_keepalive,
+    retry_delay,
+    sort_upload_order,
+)
+
+# Bytes read from the local file and sent per data-socket write
+_STORE_BLOCK_SIZE = 1024 * 1024
+
+# Per-thread send buffer, reused for every block of every file a worker sends
+_SEND_BUFFERS = local()
+
+# Times each file is tried before it is reported as failed
+_UPLOAD_ATTEMPTS = 3
+
+
+def _store_file(
+    ftp: ftplib.FTP,
+    remote_path: str,
+    fp: BinaryIO,
+    data_timeout: float,
+    blocksize: int = _STORE_BLOCK_SIZE,
+) -> None:
+    """
+    Upload a file like storbinary(), with its own data-channel timeout.
+
+    A stalled data transfer only costs the data socket: the server's reply
+    to the aborted STOR is read back, so the control connection stays in
+    sync and can be reused for the next file. Data is sent in large blocks
+    read into a reused buffer, so the loop runs once per megabyte rather
+    than once per 8 KiB as with storbinary()'s default.
+
+    Args:
+        ftp: Active FTP connection.
+        remote_path: Absolute remote file to write to.
+        fp: Open local file to read from.
+        data_timeout: Socket timeout in seconds for the data connection.
+        blocksize: Number of bytes sent per write (default: 1 MiB).
+
+    Raises:
+        ftplib.error_temp: If the data transfer timed out but the control
+            connection is still usable.
+        Exception: Any other error during the transfer, after the data
+            socket and the control connection have both been closed.
+    """
+    ftp.voidcmd("TYPE I")
+    conn = ftp.transfercmd(f"STOR {remote_path}")
+    timed_out = False
+    try:
+        conn.settimeout(data_timeout)
+        buf = getattr(_SEND_BUFFERS, "buf", None)
+        if buf is None or len(buf) != blocksize:
+            buf = _SEND_BUFFERS.buf = memoryview(bytearray(blocksize))
+        while True:
+            count = fp.readinto(buf)
+            if not count:
+                break
+            conn.sendall(buf[:count])
+    except socket.timeout:
+        timed_out = True
+    except BaseException:
+        # The reply to this STOR would be read by the next command instead
+        # of its own, so the control connection can't be reused either
+        ftp.close()
+        raise
+    finally:
+        conn.close()
+
+    if timed_out:
+        try:
+            ftp.getresp()
+        except (ftplib.error_temp, ftplib.error_perm):
+            pass
+        raise ftplib.error_temp(f"426 Data transfer timed out after {data_timeout}s")
+    ftp.voidresp()
+
+
+def _parse_list_line(line: str) -> Optional[Tuple[str, Optional[bool]]]:
+    """
+    Parse one line of a LIST response.
+
+    Understands the Unix ``ls -l`` format used by most servers, with or
+    without the group column, and the MS-DOS format used by IIS.
+
+    Args:
+        line: A single line returned by the LIST command.
+
+    Returns:
+        Tuple of (name, is_dir), or None if the line is not an entry.
+        is_dir is None for symlinks, whose target type LIST doesn't show.
+    """
+    if line[:1] in ("-", "d", "l"):
+        # The name follows size, month, day and time-or-year. Servers that
+        # omit the group column (some vsftpd, BusyBox and NAS setups) put
+        # the month one field earlier.
+        for month_index in (5, 4):
+            parts = line.split(None, month_index + 3)
+            if (
+                len(parts) == month_index + 4
+                and parts[month_index - 1].isdigit()
+                and parts[month_index].isalpha()
+                and parts[month_index + 1].isdigit()
+            ):
+                name = parts[-1]
+                if line[0] == "l":
+                    # Symlinks are listed as "name -> target"
+                    return (name.split(" -> ", 1)[0], None)
+                return (name, line[0] == "d")
+        return None
+
+    parts = line.split(None, 3)
+    if len(parts) == 4 and parts[0][:1].isdigit():
+        return (parts[3], parts[2] == "<DIR>")
+
+    return None
+
+
+def _probe_ftp_entries(
+    conn: ftplib.FTP, path: str, names: Iterable[str]
+) -> List[Tuple[str, bool]]:
+    """
+    Tell directories from files by trying to CWD into each name.
+
+    Args:
+        conn: Active FTP connection.
+        path: Absolute remote directory holding the names.
+        names: Entry names to probe.
+
+    Returns:
+        List of (name, is_dir) for the probed entries.
+    """
+    entries: List[Tuple[str, bool]] = []
+    current = conn.pwd()
+    for name in names:
+        try:
+            conn.cwd(path.rstrip("/") + "/" + name)
+            conn.cwd(current)
+            is_dir = True
+        except ftplib.error_perm:
+            is_dir = False
+        entries.append((name, is_dir))
+    return entries
+
+
+def _scan_ftp_directory(
+    conn: ftplib.FTP, path: str, remote_base: str
+) -> Tuple[List[str], List[str]]:
+    """
+    Scan a single remote directory.
+
+    Args:
+        conn: Active FTP connection.
+        path: Absolute remote directory to scan.
+        remote_base: Remote root that returned file paths are relative to.
+
+    Returns:
+        Tuple of (files relative to remote_base, absolute subdirectory paths).
+    """
+    found_files: List[str] = []
+    found_dirs: List[str] = []
+
+    # Entry paths are built by plain concatenation onto prefixes computed
+    # once per directory, rather than normalizing every entry's path
+    abs_prefix = path if path.endswith("/") else path + "/"
+    base_prefix = remote_base + "/"
+    rel_prefix = (
+        abs_prefix[len(base_prefix) :]
+        if abs_prefix.startswith(base_prefix)
+        else abs_prefix
+    )
+
+    try:
+        # Try using MLSD for better metadata (if supported)
+        entries: List[Tuple[str, bool]] = []
+        try:
+            for name, facts in conn.mlsd(path):
+                if name in ("", ".", ".."):
+                    continue
+                entries.append((name, facts.get("type") == "dir"))
+        except (ftplib.error_perm, AttributeError):
+            # MLSD not supported: a single LIST carries the entry types, so
+            # there is no need to probe each name with CWD
+            lines: List[str] = []
+            try:
+                conn.retrlines(f"LIST {path}", lines.append)
+            except ftplib.error_perm:
+                return (found_files, found_dirs)
+            unparsed = False
+            # Symlinks may point at directories: probed like before LIST
+            to_probe: List[str] = []
+            for line in lines:
+                if not line.strip() or line.startswith("total "):
+                    continue
+                parsed = _parse_list_line(line)
+                if parsed is None:
+                    unparsed = True
+                elif parsed[0] in ("", ".", ".."):
+                    continue
+                elif parsed[1] is None:
+                    to_probe.append(parsed[0])
+                else:
+                    entries.append((parsed[0], parsed[1]))
+            if unparsed:
+                # Don't drop entries in a listing format we don't know: the
+                # names LIST didn't describe are found with NLST and probed
+                known = {name for name, _ in entries}.union(to_probe)
+                for full_path in conn.nlst(path):
+                    name = os.path.basename(full_path)
+                    if name not in ("", ".", "..") and name not in known:
+                        to_probe.append(name)
+            if to_probe:
+                entries.extend(_probe_ftp_entries(conn, path, to_probe))
+
+        for name, is_dir in entries:
+            full_path = abs_prefix + name
+
+            if is_dir:
+                found_dirs.append(full_path)
+            else:
+                found_files.append(rel_prefix + name)
+
+    except Exception:
+        pass  # Ignore permission errors or inaccessible directories
+
+    return (found_files, found_dirs)
+
+
+def _scan_ftp_levels(
+    ftp: ftplib.FTP,
+    paths: List[str],
+    remote_base: str,
+    max_workers: int,
+    connect: Optional[Callable[[], ftplib.FTP]],
+    recursive: bool = True,
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    List remote directories level by level, in parallel where possible.
+
+    When connect is given, the directories of each level are listed over up
+    to max_workers connections, since listing is bound by round trips rather
+    than bandwidth. Extra connections are closed when the scan finishes.
+
+    Args:
+        ftp: Active FTP connection.
+        paths: Absolute remote directories to list first.
+        remote_base: Remote base directory, without trailing slash.
+        max_workers: Number of parallel scanning connections.
+        connect: Optional callable returning a new logged-in connection.
+        recursive: If True, also list every subdirectory found.
+
+    Yields:
+        (found_files, found_dirs) for each directory listed.
+    """
+    # Idle connections; extra ones are opened on demand, up to one per worker
+    idle: Queue = Queue()
+    idle.put(ftp)
+    opened: List[ftplib.FTP] = []
+    can_connect = connect is not None
+
+    def scan(path: str) -> Tuple[List[str], List[str]]:
+        """List one directory on an idle connection."""
+        nonlocal can_connect
+        conn: Optional[ftplib.FTP] = None
+        try:
+            conn = idle.get_nowait()
+        except Empty:
+            if can_connect:
+                try:
+                    conn = connect()  # type: ignore[misc]
+                    opened.append(conn)
+                except Exception:
+                    # Server refused another connection; share the open ones
+                    can_connect = False
+            if conn is None:
+                conn = idle.get()
+        try:
+            return _scan_ftp_directory(conn, path, remote_base)
+        finally:
+            idle.put(conn)
+
+    workers = max_workers if connect is not None else 1
+    if not recursive:
+        # A single level: no use for more workers than directories
+        workers = min(workers, len(paths))
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        level = paths
+        while level:
+            next_level: List[str] = []
+            if executor:
+                results = executor.map(scan, level)
+            else:
+                # Serial scan: use the one connection directly, skipping the
+                # locked idle-connection queue that only parallel scans need
+                results = (
+                    _scan_ftp_directory(ftp, path, remote_base) for path in level
+                )
+            for found in results:
+                yield found
+                if recursive:
+                    next_level.extend(found[1])
+            level = next_level
+    finally:
+        if executor:
+            executor.shutdown()
+        for conn in opened:
+            try:
+                conn.quit()
+            except Exception:
+                conn.close()
 
 
 def list_remote_ftp(
@@ -22,17 +348,24 @@ def list_remote_ftp(
     remote_basepath: str,
     timeout: int = 60,
     progress_bar: Any = None,
+    max_workers: int = 1,
+    connect: Optional[Callable[[], ftplib.FTP]] = None,
 ) -> Set[str]:
     """
     Recursively list all files on FTP server starting from remote_basepath.
 
-    Uses iterative BFS approach for directory scanning.
+    Uses a level-by-level BFS. When connect is given, the directories of
+    each level are listed in parallel over up to max_workers connections,
+    since listing is bound by round trips rather than bandwidth.
 
     Args:
         ftp: Active FTP connection.
         remote_basepath: Remote root directory to start listing from.
         timeout: Socket timeout in seconds (default: 60).
         progress_bar: Optional click progressbar to update as files are found.
+        max_workers: Number of parallel scanning connections (default: 1).
+        connect: Optional callable returning a new logged-in connection,
+            used to open the extra scanning connections.
 
     Returns:
         Set of relative file paths from remote_basepath.
@@ -41,68 +374,10 @@ def list_remote_ftp(
     remote_base = remote_basepath.rstrip("/")
     dirs_scanned = 0
     files_found = 0
-    dirs_queue: Queue = Queue()
-    dirs_queue.put(remote_base)
-
-    def scan_directory(path: str, conn: ftplib.FTP) -> Tuple[List[str], List[str]]:
-        """Scan a single directory and return (files, subdirs)."""
-        found_files: List[str] = []
-        found_dirs: List[str] = []
-
-        try:
-            # Try using MLSD for better metadata (if supported)
-            entries: List[Tuple[str, bool]] = []
-            try:
-                for name, facts in conn.mlsd(path):
-                    if name in (".", ".."):
-                        continue
-                    entries.append((name, facts.get("type") == "dir"))
-            except (ftplib.error_perm, AttributeError):
-                # MLSD not supported, fall back to NLST + checking each
-                try:
-                    names = conn.nlst(path)
-                    for full_path in names:
-                        name = os.path.basename(full_path)
-                        if name in (".", ".."):
-                            continue
-                        # Try to detect if it's a directory
-                        is_dir = False
-                        try:
-                            current = conn.pwd()
-                            conn.cwd(full_path)
-                            conn.cwd(current)
-                            is_dir = True
-                        except ftplib.error_perm:
-                            is_dir = False
-                        entries.append((name, is_dir))
-                except ftplib.error_perm:
-                    return (found_files, found_dirs)
-
-            for name, is_dir in entries:
-                full_path = f"{path}/{name}".replace("//", "/")
-
-                if is_dir:
-                    found_dirs.append(full_path)
-                else:
-                    # Calculate relative path from remote_basepath
-                    if full_path.startswith(remote_base + "/"):
-                        rel_path = full_path[len(remote_base) + 1 :]
-                    elif full_path == remote_base:
-                        rel_path = ""
-                    else:
-                        rel_path = full_path
-
-                    if rel_path:
-                        found_files.append(rel_path)
-
-        except Exception:
-            pass  # Ignore permission errors or inaccessible directories
-
-        return (found_files, found_dirs)
-
-    while not dirs_queue.empty():
-        path = dirs_queue.get()
 
+    for found_files, _ in _scan_ftp_levels(
+        ftp, [remote_base or "/"], remote_base, max_workers, connect
+    ):
         dirs_scanned += 1
         if dirs_scanned % 5 == 0:
             click.echo(
@@ -110,14 +385,9 @@ def list_remote_ftp(
                 nl=False,
             )
 
-        found_files, found_dirs = scan_directory(path, ftp)
-
         remote_files.update(found_files)
         files_found += len(found_files)
 
-        for d in found_dirs:
-            dirs_queue.put(d)
-
     # Clear the progress line and show final count
     click.echo(
         f"\r✅ Found {files_found} files in {dirs_scanned} directories" + " " * 20
@@ -126,12 +396,105 @@ def list_remote_ftp(
     return remote_files
 
 
+def list_remote_ftp_dirs(
+    ftp: ftplib.FTP,
+    remote_basepath: str,
+    rel_dirs: Iterable[str],
+    max_workers: int = 1,
+    connect: Optional[Callable[[], ftplib.FTP]] = None,
+) -> Set[str]:
+    """
+    List files in specific remote directories without recursing.
+
+    Used for "changes only" comparisons, where only the directories that
+    local files will be uploaded into matter, so the cost depends on the
+    upload set rather than on the size of the remote tree.
+
+    Args:
+        ftp: Active FTP connection.
+        remote_basepath: Remote root directory.
+        rel_dirs: Directories relative to remote_basepath ("" for the root).
+        max_workers: Number of parallel scanning connections (default: 1).
+        connect: Optional callable returning a new logged-in connection,
+            used to open the extra scanning connections.
+
+    Returns:
+        Set of relative file paths found in those directories.
+    """
+    remote_files: Set[str] = set()
+    remote_base = remote_basepath.rstrip("/")
+    dirs_scanned = 0
+
+    paths = [
+        (f"{remote_base}/{rel_dir}" if rel_dir else remote_base) or "/"
+        for rel_dir in sorted(set(rel_dirs))
+    ]
+    for found_files, _ in _scan_ftp_levels(
+        ftp, paths, remote_base, max_workers, connect, recursive=False
+    ):
+        remote_files.update(found_files)
+        dirs_scanned += 1
+
+    click.echo(
+        f"\r✅ Found {len(remote_files)} files in {dirs_scanned} target directories"
+        + " " * 20
+    )
+
+    return remote_files
+
+
+def _create_remote_dirs(ftp: ftplib.FTP, remote_dirs: Iterable[str]) -> None:
+    """
+    Create remote directories, and any missing parents, over one connection.
+
+    Each distinct path component is probed or created once, shallowest
+    first, so the cost depends on the number of distinct directories rather
+    than on the number of files uploaded into them.
+
+    Args:
+        ftp: Active FTP connection.
+        remote_dirs: Absolute remote directories that must exist.
+    """
+    created_dirs: Set[str] = set()
+    # Directories made here rather than found: their children can't exist yet
+    made_dirs: Set[str] = set()
+    # Negative cache: directories that could be neither entered nor created
+    failed_dirs: Set[str] = set()
+
+    for remote_dir in sorted(set(remote_dirs)):
+        current_path = ""
+        # Once a component is missing, its descendants are too: skip the CWD
+        # probe and go straight to MKD
+        parent_missing = False
+        for part in remote_dir.split("/"):
+            if not part:
+                continue
+            current_path += "/" + part
+            if current_path in created_dirs or current_path in failed_dirs:
+                parent_missing = current_path in made_dirs
+                continue
+            if not parent_missing:
+                try:
+                    ftp.cwd(current_path)
+                    created_dirs.add(current_path)
+                    continue
+                except ftplib.error_perm:
+                    parent_missing = True
+            try:
+                ftp.mkd(current_path)
+                created_dirs.add(current_path)
+                made_dirs.add(current_path)
+            except ftplib.error_perm:
+                # Directory might exist; don't probe it again
+                failed_dirs.add(current_path)
+
+
 def upload_ftp(
     host_config: Dict[str, Any],
     files: List[Path],
     local_basepath: Path,
     use_pasv: bool = True,
-) -> None:
+) -> List[str]:
     """
     Upload files via FTP with parallel connections.
 
@@ -140,6 +503,9 @@ def upload_ftp(
         files: List of local file paths to upload.
         local_basepath: Local base directory.
         use_pasv: Use passive mode (default: True).
+
+    Returns:
+        Remote paths of the files that were uploaded successfully.
     """
     hostname = host_config["hostname"]
     port = host_config.get("port", 21)
@@ -147,90 +513,155 @@ def upload_ftp(
     password = host_config["password"]
     remote_basepath = host_config["remote_basepath"]
     max_workers = host_config.get("max_workers", 5)
+    # Data sockets get their own timeout, so a stalled transfer doesn't cost
+    # the (reused) control connection
+    data_timeout = host_config.get("data_timeout", 60)
 
     # Sort files by depth (external first) then alphabetically
-    def sort_key(f: Path) -> Tuple[int, str]:
-        try:
-            rel_path = f.relative_to(local_basepath)
-            depth = len(rel_path.parts) - 1
-            return (depth, str(rel_path).lower())
-        except ValueError:
-            return (999, str(f).lower())
-
-    sorted_files = sorted(files, key=sort_key)
+    sorted_files = sort_upload_order(files, local_basepath)
 
-    # Cache for created directories (shared across threads)
-    created_dirs: Set[str] = set()
-    dir_lock = Lock()
+    # Stat each file once: directories are skipped, and the sizes decide the
+    # dispatch order. Unreadable and special files get -1 and go last.
+    file_sizes: Dict[Path, int] = {}
+    for f in sorted_files:
+        try:
+            st = f.stat()
+        except OSError:
+            file_sizes[f] = -1
+            continue
+        if stat.S_ISREG(st.st_mode):
+            file_sizes[f] = st.st_size
+        elif not stat.S_ISDIR(st.st_mode):
+            file_sizes[f] = -1
+
+    # Remote destination of every file, computed once up front
+    remote_paths = calculate_remote_paths(file_sizes, local_basepath, remote_basepath)
 
     # Progress tracking
     completed = 0
-    completed_lock = Lock()
-    total_files = len([f for f in sorted_files if not f.is_dir()])
+    # Remote paths of successful uploads, returned to the caller
+    uploaded: List[str] = []
+    total_files = len(remote_paths)
+
+    # Each worker thread logs in once and reuses its connection for every
+    # file it uploads; all connections are closed after the pool finishes
+    worker_state = local()
+    connections: List[ftplib.FTP] = []
+    connections_lock = Lock()
+    # Connections opened outside the pool, adopted by the first worker
+    spare: List[ftplib.FTP] = []
+
+    def open_connection() -> ftplib.FTP:
+        """Open and log in a new FTP connection."""
+        ftp = ftplib.FTP()
+        ftp.connect(hostname, port, timeout=60)
+        enable_keepalive(ftp.sock)
+        ftp.login(username, password)
+        ftp.set_pasv(use_pasv)
+        with connections_lock:
+            connections.append(ftp)
+        return ftp
+
+    def get_connection() -> ftplib.FTP:
+        """Return this thread's FTP connection, opening it on first use."""
+        ftp = getattr(worker_state, "ftp", None)
+        if ftp is None:
+            with connections_lock:
+                ftp = spare.pop() if spare else None
+            if ftp is None:
+                ftp = open_connection()
+            worker_state.ftp = ftp
+        return ftp
+
+    def drop_connection() -> None:
+        """Discard this thread's connection so the next file reconnects."""
+        ftp = getattr(worker_state, "ftp", None)
+        worker_state.ftp = None
+        if ftp is not None:
+            with connections_lock:
+                connections.remove(ftp)
+            ftp.close()
 
     def upload_single_file(local_file: Path) -> Tuple[bool, str, str]:
         """Upload a single file. Returns (success, local_path, message)."""
-        if local_file.is_dir():
-            return (True, str(local_file), "skipped (directory)")
-
-        try:
-            # Each thread needs its own FTP connection
-            ftp = ftplib.FTP()
-            ftp.connect(hostname, port, timeout=60)
-            ftp.login(username, password)
-            ftp.set_pasv(use_pasv)
-
-            remote_path = calculate_remote_path(
-                local_file, local_basepath, remote_basepath
-            )
-            remote_dir = os.path.dirname(remote_path)
-
-            # Ensure remote directory exists (with caching)
-            with dir_lock:
-                if remote_dir not in created_dirs:
-                    path_parts = remote_dir.split("/")
-                    current_path = ""
-                    for part in path_parts:
-                        if not part:
-                            continue
-                        current_path += "/" + part
-                        if current_path not in created_dirs:
-                            try:
-                                ftp.cwd(current_path)
-                                created_dirs.add(current_path)
-                            except ftplib.error_perm:
-                                try:
-                                    ftp.mkd(current_path)
-                                    created_dirs.add(current_path)
-                                except ftplib.error_perm:
-                                    pass  # Directory might exist
-
-            # Upload the file
-            with open(local_file, "rb") as f:
-                ftp.storbinary(f"STOR {remote_path}", f)
-
-            ftp.quit()
-            return (True, str(local_file), remote_path)
+        remote_path = remote_paths[local_file]
 
-        except Exception as e:
-            return (False, str(local_file), str(e))
+        # Transient failures (4xx replies, dropped connections) are retried;
+        # permanent 5xx refusals are reported straight away
+        for attempt in range(_UPLOAD_ATTEMPTS):
+            if attempt:
+                time.sleep(retry_delay(attempt))
+            try:
+                ftp = get_connection()
+
+                # Upload the file
+                with open(local_file, "rb", buffering=0) as f:
+                    _store_file(ftp, remote_path, f, data_timeout)
+
+                return (True, str(local_file), remote_path)
+
+            except ftplib.error_perm as e:
+                return (False, str(local_file), str(e))
+            except ftplib.error_temp as e:
+                # The server aborted this file; unless it is closing the
+                # session (421), the connection is still usable
+                if str(e).startswith("421"):
+                    drop_connection()
+                error: Exception = e
+            except OSError as e:
+                ftp_conn = getattr(worker_state, "ftp", None)
+                if e.filename is None or ftp_conn is None or not ftp_conn.sock:
+                    # The connection dropped, or _store_file closed it after
+                    # a transfer was cut short
+                    drop_connection()
+                if e.filename is not None:
+                    # The local file itself can't be read
+                    return (False, str(local_file), str(e))
+                error = e
+            except Exception as e:
+                drop_connection()
+                error = e
+
+        return (False, str(local_file), str(error))
+
+    # Create every destination directory once, before any worker starts, so
+    # uploads never serialize on directory creation
+    try:
+        bootstrap = open_connection()
+        _create_remote_dirs(bootstrap, map(os.path.dirname, remote_paths.values()))
+        spare.append(bootstrap)
+    except Exception as e:
+        click.echo(f"❌ Could not create remote directories ({e})", err=True)
 
     click.echo(f"Uploading with parallel connections (max: {max_workers})...")
 
     # Upload files in parallel
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_file = {
-            executor.submit(upload_single_file, f): f for f in sorted_files
+        # Largest files first, so a big file picked up late doesn't leave one
+        # worker busy long after the others have finished
+        to_submit = iter(sorted(remote_paths, key=file_sizes.__getitem__, reverse=True))
+        # Keep a bounded window of submitted uploads instead of one future per
+        # file, topping it up as uploads finish
+        pending = {
+            executor.submit(upload_single_file, f)
+            for f in islice(to_submit, max_workers * 2)
         }
 
-        for future in as_completed(future_to_file):
-            success, local_path, message = future.result()
+        # Report every upload that finished since the last wake-up at once
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            completed = echo_upload_results(
+                (future.result() for future in done), total_files, completed, uploaded
+            )
+            pending.update(
+                executor.submit(upload_single_file, f)
+                for f in islice(to_submit, len(done))
+            )
 
-            with completed_lock:
-                completed += 1
-                click.echo(f"[{completed}/{total_files}] ", nl=False)
+    for ftp in connections:
+        try:
+            ftp.quit()
+        except Exception:
+            ftp.close()
 
-            if success:
-                click.echo(f"✅ {local_path} → {message}")
-            else:
-                click.echo(f"❌ {local_path} ({message})", err=True)
+    return uploaded
@@ -4,18 +4,285 @@ SFTP protocol implementation for gsupload.
 Handles SFTP file listing and upload operations.
 """
 
+import errno
 import os
+import posixpath
+import shlex
+import socket
 import stat
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 from pathlib import Path
-from queue import Queue
-from threading import Lock
-from typing import Any, Dict, List, Set, Tuple
+from queue import Empty, Queue
+from threading import Event, Lock, local
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import click
 import paramiko
 
-from gsupload.utils import calculate_remote_path
+from gsupload.utils import (
+    calculate_remote_paths,
+    echo_upload_results,
+    enable_keepalive,
+    retry_delay,
+    sort_upload_order,
+)
+
+# Chunk size for reading local files and handing them to the SFTP channel
+_LOCAL_READ_BUFFER_SIZE = 1024 * 1024
+
+# Per-thread read buffer, reused for every chunk of every file a worker sends
+_READ_BUFFERS = local()
+
+# Times each file is tried before it is reported as failed
+_UPLOAD_ATTEMPTS = 3
+
+# SFTP/exec channels opened on one SSH connection before another connection
+# is started; stock OpenSSH refuses sessions beyond MaxSessions (10)
+_CHANNELS_PER_CONNECTION = 8
+
+# Destination directories from which one remote `find` is run instead of
+# probing each directory with stat(); fewer cost only a few round trips
+_FIND_MIN_DIRS = 16
+
+# Errors worth retrying on a fresh attempt; server refusals such as
+# permission denied are reported straight away
+_TRANSIENT_ERRORS = (EOFError, socket.timeout, paramiko.SSHException)
+
+# Extensions of formats that are already compressed; SSH compression only
+# spends CPU on them without making the transfer any smaller
+_COMPRESSED_SUFFIXES = frozenset(
+    {
+        ".7z",
+        ".avif",
+        ".br",
+        ".bz2",
+        ".gif",
+        ".gz",
+        ".jpeg",
+        ".jpg",
+        ".mov",
+        ".mp3",
+        ".mp4",
+        ".parquet",
+        ".png",
+        ".webm",
+        ".webp",
+        ".woff",
+        ".woff2",
+        ".xz",
+        ".zip",
+        ".zst",
+    }
+)
+
+
+def _reset_tar_owner(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    """
+    Drop local ownership and permissions from a tar member.
+
+    Extracted files then belong to the remote user and get the same 0644
+    mode a per-file upload creates, rather than the local file's mode.
+    """
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    info.mode = 0o644
+    return info
+
+
+def _write_remote_file(
+    sftp: paramiko.SFTPClient,
+    local_file: Path,
+    remote_path: str,
+    mode: str = "wb",
+    start: int = 0,
+    length: Optional[int] = None,
+) -> None:
+    """
+    Copy a local file, or one byte range of it, into a remote file.
+
+    Writes are pipelined, so paramiko keeps many WRITE requests in flight
+    instead of waiting for each ack, and are handed over in large chunks
+    rather than putfo()'s 32 KiB reads. Write errors still surface when the
+    remote file is closed, so no confirming stat() round trip is needed.
+
+    Args:
+        sftp: Active SFTP connection.
+        local_file: Local file to read from.
+        remote_path: Absolute remote file to write to.
+        mode: Remote open mode ("r+b" to write into an existing file).
+        start: Offset to copy from, in both files.
+        length: Number of bytes to copy, or None to copy up to end of file.
+    """
+    with open(local_file, "rb", buffering=0) as f:
+        with sftp.open(remote_path, mode) as remote:
+            remote.set_pipelined(True)
+            if start:
+                f.seek(start)
+                remote.seek(start)
+            # Read into one reusable buffer rather than allocating a new bytes
+            # object per chunk; the remote file copies what it is given into
+            # its own write buffer, so the view can be overwritten right after
+            buf = getattr(_READ_BUFFERS, "buf", None)
+            if buf is None:
+                buf = _READ_BUFFERS.buf = memoryview(bytearray(_LOCAL_READ_BUFFER_SIZE))
+            remaining = length
+            while remaining is None or remaining > 0:
+                view = buf if remaining is None else buf[: min(len(buf), remaining)]
+                count = f.readinto(view)
+                if not count:
+                    break
+                remote.write(view[:count])
+                if remaining is not None:
+                    remaining -= count
+
+
+def _scan_sftp_directory(
+    sftp: paramiko.SFTPClient, path: str, remote_base: str
+) -> Tuple[List[str], List[str]]:
+    """
+    Scan a single remote directory.
+
+    Args:
+        sftp: Active SFTP connection.
+        path: Absolute remote directory to scan.
+        remote_base: Remote root that returned file paths are relative to.
+
+    Returns:
+        Tuple of (files relative to remote_base, absolute subdirectory paths).
+    """
+    found_files: List[str] = []
+    found_dirs: List[str] = []
+
+    # Entry paths are built by plain concatenation onto prefixes computed
+    # once per directory, rather than normalizing every entry's path
+    abs_prefix = path if path.endswith("/") else path + "/"
+    base_prefix = remote_base + "/"
+    rel_prefix = (
+        abs_prefix[len(base_prefix) :]
+        if abs_prefix.startswith(base_prefix)
+        else abs_prefix
+    )
+
+    try:
+        # listdir_iter() keeps a batch of READDIR requests in flight instead
+        # of waiting for each reply like listdir_attr(), and like it returns
+        # each entry's mode with the listing itself. Errors, including a
+        # failure part way through, end the listing of this directory.
+        for entry in sftp.listdir_iter(path):
+            filename = entry.filename
+            if filename in ("", ".", ".."):
+                continue
+
+            full_path = abs_prefix + filename
+
+            st_mode = entry.st_mode
+            if st_mode is None:
+                # The server omitted permissions for this entry: a stat()
+                # is one small round trip, unlike listing it to find out
+                try:
+                    st_mode = sftp.stat(full_path).st_mode
+                except Exception:
+                    st_mode = None
+            is_dir = st_mode is not None and stat.S_ISDIR(st_mode)
+
+            if is_dir:
+                found_dirs.append(full_path)
+            else:
+                found_files.append(rel_prefix + filename)
+
+    except Exception:
+        pass  # Ignore all errors
+
+    return (found_files, found_dirs)
+
+
+def _scan_sftp_levels(
+    sftp: paramiko.SFTPClient,
+    paths: List[str],
+    remote_base: str,
+    max_workers: int,
+    recursive: bool = True,
+) -> Iterator[Tuple[List[str], List[str]]]:
+    """
+    List remote directories level by level, in parallel where possible.
+
+    The directories of each level are listed over up to max_workers SFTP
+    sessions opened on the same SSH transport, since listing is bound by
+    round trips rather than bandwidth. Extra sessions are closed when the
+    scan finishes.
+
+    Args:
+        sftp: Active SFTP connection.
+        paths: Absolute remote directories to list first.
+        remote_base: Remote base directory, without trailing slash.
+        max_workers: Number of parallel scanning sessions.
+        recursive: If True, also list every subdirectory found.
+
+    Yields:
+        (found_files, found_dirs) for each directory listed.
+    """
+    # Extra sessions share the existing transport; without one, scan serially
+    channel = sftp.get_channel()
+    transport = channel.get_transport() if channel else None
+
+    # Idle sessions; extra ones are opened on demand, up to one per worker
+    idle: Queue = Queue()
+    idle.put(sftp)
+    opened: List[paramiko.SFTPClient] = []
+    can_connect = transport is not None
+
+    def scan(path: str) -> Tuple[List[str], List[str]]:
+        """List one directory on an idle session."""
+        nonlocal can_connect
+        conn: Optional[paramiko.SFTPClient] = None
+        try:
+            conn = idle.get_nowait()
+        except Empty:
+            if can_connect:
+                try:
+                    conn = paramiko.SFTPClient.from_transport(transport)
+                    if conn is not None:
+                        opened.append(conn)
+                except Exception:
+                    # Server refused another session; share the open ones
+                    can_connect = False
+            if conn is None:
+                conn = idle.get()
+        try:
+            return _scan_sftp_directory(conn, path, remote_base)
+        finally:
+            idle.put(conn)
+
+    workers = max_workers if transport is not None else 1
+    if not recursive:
+        # A single level: no use for more workers than directories
+        workers = min(workers, len(paths))
+    executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        level = paths
+        while level:
+            next_level: List[str] = []
+            if executor:
+                results = executor.map(scan, level)
+            else:
+                # Serial scan: use the one connection directly, skipping the
+                # locked idle-connection queue that only parallel scans need
+                results = (
+                    _scan_sftp_directory(sftp, path, remote_base) for path in level
+                )
+            for found in results:
+                yield found
+                if recursive:
+                    next_level.extend(found[1])
+            level = next_level
+    finally:
+        if executor:
+            executor.shutdown()
+        for conn in opened:
+            conn.close()
 
 
 def list_remote_sftp(
@@ -28,14 +295,16 @@ def list_remote_sftp(
     """
     Recursively list all files on SFTP server starting from remote_basepath.
 
-    Uses iterative approach with single connection for SFTP compatibility.
+    Uses a level-by-level BFS. The directories of each level are listed in
+    parallel over up to max_workers SFTP sessions opened on the same SSH
+    transport, since listing is bound by round trips rather than bandwidth.
 
     Args:
         sftp: Active SFTP connection.
         remote_basepath: Remote root directory to start listing from.
         timeout: Keepalive interval in seconds (default: 60).
         progress_bar: Optional click progressbar to update as files are found.
-        max_workers: Number of parallel scanning workers (default: 3, unused).
+        max_workers: Number of parallel scanning sessions (default: 3).
 
     Returns:
         Set of relative file paths from remote_basepath.
@@ -44,121 +313,184 @@ def list_remote_sftp(
     remote_base = remote_basepath.rstrip("/")
     dirs_scanned = 0
     files_found = 0
-    files_lock = Lock()
-    dirs_queue: Queue = Queue()
-    dirs_queue.put(remote_base)
 
-    def scan_directory(
-        path: str, worker_sftp: paramiko.SFTPClient
-    ) -> Tuple[List[str], List[str]]:
-        """Scan a single directory and return (files, subdirs)."""
-        found_files: List[str] = []
-        found_dirs: List[str] = []
+    for found_files, _ in _scan_sftp_levels(
+        sftp, [remote_base or "/"], remote_base, max_workers
+    ):
+        dirs_scanned += 1
+        if dirs_scanned % 3 == 0:
+            click.echo(
+                f"\r🔍 Scanning... {dirs_scanned} dirs, {files_found} files found",
+                nl=False,
+            )
 
-        try:
-            # Try listdir_attr first (provides file attributes)
-            entries: List[Tuple[str, int | None]] = []
-            use_attr = False
-            try:
-                attr_entries = worker_sftp.listdir_attr(path)
-                entries = [(e.filename, e.st_mode) for e in attr_entries]
-                use_attr = True
-            except Exception:
-                # Fallback to simple listdir if listdir_attr not supported
-                try:
-                    simple_entries = worker_sftp.listdir(path)
-                    entries = [(name, None) for name in simple_entries]
-                except Exception:
-                    return (found_files, found_dirs)
+        remote_files.update(found_files)
+        files_found += len(found_files)
 
-            for filename, st_mode in entries:
-                if filename in (".", ".."):
-                    continue
+    # Clear the progress line and show final count
+    click.echo(
+        f"\r✅ Found {files_found} files in {dirs_scanned} directories" + " " * 20
+    )
 
-                full_path = f"{path}/{filename}".replace("//", "/")
+    return remote_files
 
-                # Check if it's a directory
-                is_dir = False
-                if use_attr and st_mode is not None:
-                    is_dir = stat.S_ISDIR(st_mode)
-                else:
-                    # Try to list it as a directory to determine type
-                    try:
-                        worker_sftp.listdir(full_path)
-                        is_dir = True
-                    except Exception:
-                        is_dir = False
-
-                if is_dir:
-                    found_dirs.append(full_path)
-                else:
-                    # Calculate relative path from remote_basepath
-                    if full_path.startswith(remote_base + "/"):
-                        rel_path = full_path[len(remote_base) + 1 :]
-                    elif full_path == remote_base:
-                        rel_path = ""
-                    else:
-                        rel_path = full_path
 
-                    if rel_path:
-                        found_files.append(rel_path)
+def list_remote_sftp_dirs(
+    sftp: paramiko.SFTPClient,
+    remote_basepath: str,
+    rel_dirs: Iterable[str],
+    max_workers: int = 1,
+) -> Set[str]:
+    """
+    List files in specific remote directories without recursing.
 
-        except Exception:
-            pass  # Ignore all errors
+    Used for "changes only" comparisons, where only the directories that
+    local files will be uploaded into matter, so the cost depends on the
+    upload set rather than on the size of the remote tree.
 
-        return (found_files, found_dirs)
+    Args:
+        sftp: Active SFTP connection.
+        remote_basepath: Remote root directory.
+        rel_dirs: Directories relative to remote_basepath ("" for the root).
+        max_workers: Number of parallel scanning sessions (default: 1).
 
-    # Get SSH connection info
-    channel = sftp.get_channel()
-    if not channel:
-        # Fallback to single-threaded if no channel available
-        while not dirs_queue.empty():
-            path = dirs_queue.get()
-            dirs_scanned += 1
-            if dirs_scanned % 5 == 0:
-                click.echo(
-                    f"\r🔍 Scanning... {dirs_scanned} dirs, {files_found} files found",
-                    nl=False,
-                )
-            found_files, found_dirs = scan_directory(path, sftp)
-            remote_files.update(found_files)
-            files_found += len(found_files)
-            for d in found_dirs:
-                dirs_queue.put(d)
-    else:
-        transport = channel.get_transport()
-        if transport:
-            # Use iterative approach with single connection for better SFTP compatibility
-            while not dirs_queue.empty():
-                path = dirs_queue.get()
-
-                dirs_scanned += 1
-                if dirs_scanned % 3 == 0:
-                    click.echo(
-                        f"\r🔍 Scanning... {dirs_scanned} dirs, {files_found} files found",
-                        nl=False,
-                    )
-
-                found_files, found_dirs = scan_directory(path, sftp)
-                remote_files.update(found_files)
-                files_found += len(found_files)
-
-                for d in found_dirs:
-                    dirs_queue.put(d)
+    Returns:
+        Set of relative file paths found in those directories.
+    """
+    remote_files: Set[str] = set()
+    remote_base = remote_basepath.rstrip("/")
+    dirs_scanned = 0
+
+    paths = [
+        (f"{remote_base}/{rel_dir}" if rel_dir else remote_base) or "/"
+        for rel_dir in sorted(set(rel_dirs))
+    ]
+    for found_files, _ in _scan_sftp_levels(
+        sftp, paths, remote_base, max_workers, recursive=False
+    ):
+        remote_files.update(found_files)
+        dirs_scanned += 1
 
-    # Clear the progress line and show final count
     click.echo(
-        f"\r✅ Found {files_found} files in {dirs_scanned} directories" + " " * 20
+        f"\r✅ Found {len(remote_files)} files in {dirs_scanned} target directories"
+        + " " * 20
     )
 
     return remote_files
 
 
+def _find_remote_dirs(
+    ssh: paramiko.SSHClient, remote_basepath: str, max_depth: int
+) -> Optional[Set[str]]:
+    """
+    List the directories under remote_basepath with one remote `find`.
+
+    Args:
+        ssh: Connected SSH client.
+        remote_basepath: Absolute remote directory to search.
+        max_depth: Levels below remote_basepath to list; deeper directories
+            are not needed by the upload.
+
+    Returns:
+        The absolute paths of remote_basepath, its ancestors and every
+        directory up to max_depth below it, or None if the command failed
+        (no shell access, missing basepath, unreadable subdirectory) and
+        directories must be probed.
+    """
+    if not remote_basepath.startswith("/"):
+        return None
+    try:
+        _, stdout, _ = ssh.exec_command(
+            f"find {shlex.quote(remote_basepath)} -maxdepth {max_depth} -type d"
+            " 2>/dev/null",
+            timeout=60,
+        )
+        output = stdout.read().decode("utf-8", "replace")
+        if stdout.channel.recv_exit_status() != 0:
+            return None
+    except Exception:
+        return None
+
+    found = {posixpath.normpath(line) for line in output.splitlines() if line}
+    base = posixpath.normpath(remote_basepath)
+    if base not in found:
+        return None
+    # A directory that exists implies its parents do too
+    while base != "/":
+        found.add(base)
+        base = posixpath.dirname(base)
+    return found
+
+
+def _create_remote_dirs(
+    sftp: paramiko.SFTPClient,
+    remote_dirs: Iterable[str],
+    existing_dirs: Iterable[str] = (),
+    listed_root: Optional[str] = None,
+) -> None:
+    """
+    Create remote directories, and any missing parents, over one session.
+
+    Each distinct path component is probed or created once, shallowest
+    first, so the cost depends on the number of distinct directories rather
+    than on the number of files uploaded into them.
+
+    Args:
+        sftp: Active SFTP connection.
+        remote_dirs: Absolute remote directories that must exist.
+        existing_dirs: Directories already known to exist, which are
+            neither probed nor created.
+        listed_root: Directory whose subdirectories are all in
+            existing_dirs; anything else below it is created without a
+            stat() probe.
+    """
+    created_dirs: Set[str] = set(existing_dirs)
+    listed_prefix = listed_root.rstrip("/") + "/" if listed_root else None
+    # Directories made here rather than found: their children can't exist yet
+    made_dirs: Set[str] = set()
+    # Negative cache: directories that could be neither entered nor created
+    failed_dirs: Set[str] = set()
+
+    for remote_dir in sorted(set(remote_dirs)):
+        current_path = ""
+        # Once a component is missing, its descendants are too: skip the
+        # stat() probe and go straight to mkdir()
+        parent_missing = False
+        for part in remote_dir.split("/"):
+            if not part:
+                continue
+            current_path += "/" + part
+            if current_path in created_dirs or current_path in failed_dirs:
+                parent_missing = current_path in made_dirs
+                continue
+            if listed_prefix and current_path.startswith(listed_prefix):
+                parent_missing = True
+            if not parent_missing:
+                try:
+                    sftp.stat(current_path)
+                    created_dirs.add(current_path)
+                    continue
+                except Exception:
+                    parent_missing = True
+            try:
+                sftp.mkdir(current_path)
+                created_dirs.add(current_path)
+                made_dirs.add(current_path)
+            except IOError as e:
+                if e.errno == errno.EEXIST:
+                    created_dirs.add(current_path)
+                else:
+                    # Directory might exist; don't probe it again
+                    failed_dirs.add(current_path)
+            except Exception:
+                failed_dirs.add(current_path)
+
+
 def upload_sftp(
     host_config: Dict[str, Any],
     files: List[Path],
     local_basepath: Path,
-) -> None:
+) -> List[str]:
     """
     Upload files via SFTP with parallel connections.
 
@@ -166,6 +498,9 @@ def upload_sftp(
         host_config: Host configuration with connection details.
         files: List of local file paths to upload.
         local_basepath: Local base directory.
+
+    Returns:
+        Remote paths of the files that were uploaded successfully.
     """
     hostname = host_config["hostname"]
     port = host_config.get("port", 22)
@@ -174,38 +509,84 @@ def upload_sftp(
     key_filename = host_config.get("key_filename")
     remote_basepath = host_config["remote_basepath"]
     max_workers = host_config.get("max_workers", 5)
+    # Files at least this large are uploaded as max_workers byte ranges on
+    # separate SFTP channels; unset disables split uploads
+    split_threshold_mb = host_config.get("split_threshold_mb")
+    split_threshold = (
+        int(split_threshold_mb * 1024 * 1024) if split_threshold_mb else None
+    )
+    # Files smaller than this are sent together as one tar stream extracted
+    # by a remote shell command; unset disables batching
+    batch_threshold_kb = host_config.get("batch_threshold_kb")
+    # SSH compression: True/False, or unset to decide from the files
+    compress = host_config.get("compress")
+    # Worker channels sharing one SSH connection; 1 gives every worker its
+    # own connection, transport thread and TCP stream
+    channel_limit = max(
+        1, host_config.get("channels_per_connection", _CHANNELS_PER_CONNECTION)
+    )
 
     # Sort files by depth (external first) then alphabetically
-    def sort_key(f: Path) -> Tuple[int, str]:
-        try:
-            rel_path = f.relative_to(local_basepath)
-            depth = len(rel_path.parts) - 1
-            return (depth, str(rel_path).lower())
-        except ValueError:
-            return (999, str(f).lower())
-
-    sorted_files = sorted(files, key=sort_key)
+    sorted_files = sort_upload_order(files, local_basepath)
 
-    # Cache for created directories (shared across threads)
-    created_dirs: Set[str] = set()
-    dir_lock = Lock()
+    # Stat each file once: directories are skipped, and the sizes decide tar
+    # batching, split uploads and the dispatch order without further stat()
+    # calls. Unreadable and special files get -1 and take the per-file path.
+    file_sizes: Dict[Path, int] = {}
+    for f in sorted_files:
+        try:
+            st = f.stat()
+        except OSError:
+            file_sizes[f] = -1
+            continue
+        if stat.S_ISREG(st.st_mode):
+            file_sizes[f] = st.st_size
+        elif not stat.S_ISDIR(st.st_mode):
+            file_sizes[f] = -1
+
+    if compress is None:
+        # Compress unless most of the bytes are already-compressed media
+        compressed_bytes = sum(
+            size
+            for f, size in file_sizes.items()
+            if size > 0 and f.suffix.lower() in _COMPRESSED_SUFFIXES
+        )
+        total_bytes = sum(size for size in file_sizes.values() if size > 0)
+        compress = compressed_bytes * 2 <= total_bytes
+
+    # Remote destination of every file, computed once up front
+    remote_paths = calculate_remote_paths(file_sizes, local_basepath, remote_basepath)
 
     # Progress tracking
     completed = 0
-    completed_lock = Lock()
-    total_files = len([f for f in sorted_files if not f.is_dir()])
-
-    def upload_single_file(local_file: Path) -> Tuple[bool, str, str]:
-        """Upload a single file. Returns (success, local_path, message)."""
-        if local_file.is_dir():
-            return (True, str(local_file), "skipped (directory)")
+    # Remote paths of successful uploads, returned to the caller
+    uploaded: List[str] = []
+    total_files = len(remote_paths)
+
+    # Workers share SSH connections: each thread opens its own SFTP channel
+    # on one and reuses it for every file it uploads, so key exchange and
+    # authentication happen once per channel_limit workers instead of once
+    # per worker. Connections are closed after the pool finishes.
+    worker_state = local()
+    connections: List[paramiko.SSHClient] = []
+    connections_lock = Lock()
+    # Channels currently open on each connection
+    channel_counts: Dict[paramiko.SSHClient, int] = {}
+    # Connections whose server refused a further channel
+    full_connections: Set[paramiko.SSHClient] = set()
+    # Sessions opened outside the pool, adopted by the first worker
+    spare: List[Tuple[paramiko.SSHClient, paramiko.SFTPClient]] = []
+    # Connection being opened outside the lock: "done" is set once it is
+    # registered or has failed, "slots" counts the channels reserved on it
+    # meanwhile and "ssh" holds it on success
+    connecting: Optional[Dict[str, Any]] = None
+
+    def connect_ssh() -> paramiko.SSHClient:
+        """Open a new authenticated SSH connection."""
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
         try:
-            # Each thread needs its own SSH/SFTP connection
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            # Enable SSH compression for faster uploads
             if key_filename:
                 ssh.connect(
                     hostname,
@@ -214,69 +595,350 @@ def upload_sftp(
                     key_filename=key_filename,
                     password=password,  # Used as passphrase for encrypted keys
                     timeout=60,
-                    compress=True,
+                    compress=compress,
                 )
             else:
                 ssh.connect(
-                    hostname, port, username, password, timeout=60, compress=True
+                    hostname, port, username, password, timeout=60, compress=compress
                 )
-
-            sftp_conn = ssh.open_sftp()
-
-            remote_path = calculate_remote_path(
-                local_file, local_basepath, remote_basepath
-            )
-            remote_dir = os.path.dirname(remote_path)
-
-            # Ensure remote directory exists (with caching)
-            with dir_lock:
-                if remote_dir not in created_dirs:
-                    path_parts = remote_dir.split("/")
-                    current_path = ""
-                    for part in path_parts:
-                        if not part:
-                            continue
-                        current_path += "/" + part
-                        if current_path not in created_dirs:
-                            try:
-                                sftp_conn.stat(current_path)
-                                created_dirs.add(current_path)
-                            except Exception:
-                                try:
-                                    sftp_conn.mkdir(current_path)
-                                    created_dirs.add(current_path)
-                                except Exception:
-                                    pass  # Directory might exist
-
-            # Upload the file
-            sftp_conn.put(str(local_file), remote_path)
-
-            sftp_conn.close()
+        except BaseException:
+            # Don't leave a half-open transport behind
             ssh.close()
-            return (True, str(local_file), remote_path)
+            raise
+        # SSH-level keepalives stop NAT gateways dropping the shared
+        # connection while workers are busy on their channels
+        transport = ssh.get_transport()
+        if transport is not None:
+            transport.set_keepalive(30)
+            enable_keepalive(transport.sock)
+        return ssh
+
+    def reserve_channel() -> paramiko.SSHClient:
+        """Return a connection with a free channel slot, connecting if needed."""
+        nonlocal connecting
+        while True:
+            with connections_lock:
+                for ssh in connections:
+                    if (
+                        ssh not in full_connections
+                        and channel_counts[ssh] < channel_limit
+                    ):
+                        channel_counts[ssh] += 1
+                        return ssh
+                # Connect without holding the lock, so workers with a channel
+                # aren't stalled behind the handshake. Workers arriving
+                # meanwhile take a slot on the pending connection rather than
+                # opening one each.
+                waiting = connecting
+                if waiting is not None and waiting["slots"] < channel_limit:
+                    waiting["slots"] += 1
+                else:
+                    waiting = None
+                    connecting = {"done": Event(), "slots": 1, "ssh": None}
+                    own = connecting
 
+            if waiting is not None:
+                waiting["done"].wait()
+                if waiting["ssh"] is not None:
+                    return waiting["ssh"]
+                # Its connect failed: try again on our own
+                continue
+
+            try:
+                ssh = connect_ssh()
+            except BaseException:
+                with connections_lock:
+                    if connecting is own:
+                        connecting = None
+                own["done"].set()
+                raise
+            with connections_lock:
+                connections.append(ssh)
+                channel_counts[ssh] = own["slots"]
+                if connecting is own:
+                    connecting = None
+            own["ssh"] = ssh
+            own["done"].set()
+            return ssh
+
+    def release_channel(ssh: paramiko.SSHClient, refused: bool = False) -> int:
+        """Free a channel slot; returns the channels left open on ssh."""
+        with connections_lock:
+            if ssh not in channel_counts:
+                return 0
+            channel_counts[ssh] -= 1
+            if refused:
+                full_connections.add(ssh)
+            return channel_counts[ssh]
+
+    def open_connection() -> Tuple[paramiko.SSHClient, paramiko.SFTPClient]:
+        """Open an SFTP channel, on another connection if the server refuses."""
+        while True:
+            ssh = reserve_channel()
+            try:
+                return (ssh, ssh.open_sftp())
+            except paramiko.ChannelException:
+                # The server's MaxSessions is below channel_limit: stop
+                # opening channels here and move on to a new connection,
+                # unless not even one channel is allowed
+                if not release_channel(ssh, refused=True):
+                    raise
+            except Exception:
+                release_channel(ssh)
+                raise
+
+    def get_connection() -> paramiko.SFTPClient:
+        """Return this thread's SFTP client, connecting on first use."""
+        sftp_conn = getattr(worker_state, "sftp", None)
+        if sftp_conn is None:
+            with connections_lock:
+                session = spare.pop() if spare else None
+            if session is None:
+                session = open_connection()
+            worker_state.ssh, sftp_conn = session
+            worker_state.sftp = sftp_conn
+        return sftp_conn
+
+    def drop_connection() -> None:
+        """Discard this thread's session so the next file reconnects."""
+        ssh = getattr(worker_state, "ssh", None)
+        worker_state.ssh = None
+        worker_state.sftp = None
+        if ssh is None:
+            return
+        # The first worker to notice a dead connection closes it; the others
+        # just forget their channel and reopen one on its replacement
+        with connections_lock:
+            if ssh not in connections:
+                return
+            connections.remove(ssh)
+            channel_counts.pop(ssh, None)
+            full_connections.discard(ssh)
+        ssh.close()
+
+    # Byte ranges of split uploads run on one pool shared by every file, so
+    # at most max_workers parts are in flight however many large files are
+    # uploading. Each part uses a dedicated SSH connection, so the ranges
+    # travel over separate TCP streams; idle ones are reused by later parts.
+    part_executor = (
+        ThreadPoolExecutor(max_workers=max_workers)
+        if split_threshold and max_workers > 1
+        else None
+    )
+    part_sessions: List[Tuple[paramiko.SSHClient, paramiko.SFTPClient]] = []
+
+    def upload_in_parts(
+        executor: ThreadPoolExecutor,
+        sftp_conn: paramiko.SFTPClient,
+        local_file: Path,
+        remote_path: str,
+        size: int,
+    ) -> None:
+        """Upload a large file as parallel byte ranges written in place."""
+        # Create and truncate the remote file once; each part then opens it
+        # on its own connection and writes its range at the right offset
+        with sftp_conn.open(remote_path, "wb"):
+            pass
+        bounds = [size * i // max_workers for i in range(max_workers + 1)]
+
+        def upload_part(start: int, end: int) -> None:
+            with connections_lock:
+                session = part_sessions.pop() if part_sessions else None
+            if session is None:
+                part_ssh = connect_ssh()
+                try:
+                    session = (part_ssh, part_ssh.open_sftp())
+                except Exception:
+                    part_ssh.close()
+                    raise
+            try:
+                _write_remote_file(
+                    session[1], local_file, remote_path, "r+b", start, end - start
+                )
+            except Exception:
+                session[0].close()
+                raise
+            with connections_lock:
+                part_sessions.append(session)
+
+        futures = [
+            executor.submit(upload_part, bounds[i], bounds[i + 1])
+            for i in range(max_workers)
+        ]
+        for future in futures:
+            future.result()
+
+    def upload_tar_batch(batch: List[Tuple[Path, str]]) -> Optional[str]:
+        """Upload (local_file, rel_path) pairs as one tar stream.
+
+        Returns None on success, or an error message.
+        """
+        try:
+            ssh = reserve_channel()
         except Exception as e:
-            return (False, str(local_file), str(e))
+            return str(e)
+        try:
+            # -m: stamp files with the extraction time, like a normal upload
+            command = f"tar -xmf - -C {shlex.quote(remote_basepath)}"
+            stdin, stdout, stderr = ssh.exec_command(command)
+            # dereference: send a symlink's target contents, as put() does
+            with tarfile.open(fileobj=stdin, mode="w|", dereference=True) as tar:
+                for local_file, rel_path in batch:
+                    tar.add(str(local_file), arcname=rel_path, filter=_reset_tar_owner)
+            stdin.channel.shutdown_write()
+            status = stdout.channel.recv_exit_status()
+            if status != 0:
+                message = stderr.read().decode("utf-8", "replace").strip()
+                return message or f"tar exited with status {status}"
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            release_channel(ssh)
+
+    def upload_single_file(local_file: Path) -> Tuple[bool, str, str]:
+        """Upload a single file. Returns (success, local_path, message)."""
+        remote_path = remote_paths[local_file]
+
+        for attempt in range(_UPLOAD_ATTEMPTS):
+            if attempt:
+                time.sleep(retry_delay(attempt))
+            try:
+                sftp_conn = get_connection()
+
+                if part_executor is not None and split_threshold:
+                    size = file_sizes[local_file]
+                    if size >= split_threshold:
+                        upload_in_parts(
+                            part_executor, sftp_conn, local_file, remote_path, size
+                        )
+                        return (True, str(local_file), remote_path)
+
+                _write_remote_file(sftp_conn, local_file, remote_path)
+
+                return (True, str(local_file), remote_path)
+
+            except Exception as e:
+                # Keep the session if only this file failed (e.g. permission
+                # denied); a dropped one is replaced on the next attempt
+                ssh = getattr(worker_state, "ssh", None)
+                transport = ssh.get_transport() if ssh is not None else None
+                dropped = transport is None or not transport.is_active()
+                if dropped:
+                    drop_connection()
+                if isinstance(e, paramiko.AuthenticationException) or not (
+                    dropped or isinstance(e, _TRANSIENT_ERRORS)
+                ):
+                    return (False, str(local_file), str(e))
+                error = e
+
+        return (False, str(local_file), str(error))
 
     click.echo("✅ SFTP connection established")
-    click.echo(
-        f"Uploading with compression + parallel connections (max: {max_workers})..."
-    )
+    mode = "compression + parallel" if compress else "parallel"
+    click.echo(f"Uploading with {mode} SFTP sessions (max: {max_workers})...")
+
+    if batch_threshold_kb:
+        batch: List[Tuple[Path, str]] = []
+        remaining: List[Path] = []
+        for f in sorted_files:
+            size = file_sizes.get(f, -1)
+            try:
+                rel_path = f.relative_to(local_basepath).as_posix()
+                small = 0 <= size < batch_threshold_kb * 1024
+            except ValueError:
+                small = False
+            if small:
+                batch.append((f, rel_path))
+            else:
+                remaining.append(f)
+
+        if len(batch) > 1:
+            click.echo(f"📦 Sending {len(batch)} small files in one tar stream...")
+            error = upload_tar_batch(batch)
+            if error is None:
+                remote_base = remote_basepath.rstrip("/")
+                completed = echo_upload_results(
+                    (
+                        (True, str(local_file), f"{remote_base}/{rel_path}")
+                        for local_file, rel_path in batch
+                    ),
+                    total_files,
+                    uploaded=uploaded,
+                )
+                sorted_files = remaining
+            else:
+                click.echo(
+                    f"⚠️  Tar batch failed ({error}); uploading files one by one",
+                    err=True,
+                )
+
+    # Create every destination directory once, before any worker starts, so
+    # uploads never serialize on directory creation
+    try:
+        bootstrap = open_connection()
+        target_dirs = {
+            os.path.dirname(remote_paths[f]) for f in sorted_files if f in remote_paths
+        }
+        # For many directories, one remote find limited to the depth they
+        # reach replaces a stat() each where a shell is available; otherwise
+        # every directory is probed as before
+        existing_dirs = None
+        if len(target_dirs) >= _FIND_MIN_DIRS:
+            base_prefix = remote_basepath.rstrip("/") + "/"
+            max_depth = max(
+                (
+                    d[len(base_prefix) :].count("/") + 1
+                    for d in target_dirs
+                    if d.startswith(base_prefix)
+                ),
+                default=0,
+            )
+            existing_dirs = _find_remote_dirs(bootstrap[0], remote_basepath, max_depth)
+        _create_remote_dirs(
+            bootstrap[1],
+            target_dirs,
+            existing_dirs or (),
+            remote_basepath if existing_dirs else None,
+        )
+        spare.append(bootstrap)
+    except Exception as e:
+        click.echo(f"❌ Could not create remote directories ({e})", err=True)
 
     # Upload files in parallel
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_file = {
-            executor.submit(upload_single_file, f): f for f in sorted_files
+        # Largest files first, so a big file picked up late doesn't leave one
+        # worker busy long after the others have finished
+        to_submit = iter(
+            sorted(
+                (f for f in sorted_files if f in remote_paths),
+                key=file_sizes.__getitem__,
+                reverse=True,
+            )
+        )
+        # Keep a bounded window of submitted uploads instead of one future per
+        # file, topping it up as uploads finish
+        pending = {
+            executor.submit(upload_single_file, f)
+            for f in islice(to_submit, max_workers * 2)
         }
 
-        for future in as_completed(future_to_file):
-            success, local_path, message = future.result()
+        # Report every upload that finished since the last wake-up at once
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            completed = echo_upload_results(
+                (future.result() for future in done), total_files, completed, uploaded
+            )
+            pending.update(
+                executor.submit(upload_single_file, f)
+                for f in islice(to_submit, len(done))
+            )
 
-            with completed_lock:
-                completed += 1
-                click.echo(f"[{completed}/{total_files}] ", nl=False)
+    if part_executor:
+        part_executor.shutdown()
+    for ssh, _ in part_sessions:
+        ssh.close()
+    for ssh in connections:
+        ssh.close()
 
-            if success:
-                click.echo(f"✅ {local_path} → {message}")
-            else:
-                click.echo(f"❌ {local_path} ({message})", err=True)
+    return uploaded
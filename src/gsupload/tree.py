@@ -4,18 +4,44 @@ Tree comparison display for gsupload.
 Displays visual diff between local and remote files before upload.
 """
 
+import gzip
+import hashlib
+import json
 import os
 import socket
 import sys
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Set, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import click
-import paramiko
 
 from gsupload import DEFAULT_MAX_DEPTH
-from gsupload.utils import display_comment
+from gsupload.utils import display_comment, enable_keepalive, format_elapsed
+
+if TYPE_CHECKING:
+    import paramiko
+
+# Number of tree lines buffered before each write to the terminal
+_TREE_ECHO_BATCH = 100
+
+# File status labels, styled once at import rather than once per file
+_COLORED = {
+    "[NEW]": click.style("[NEW]", fg="green", bold=True),
+    "[OVERWRITE]": click.style("[OVERWRITE]", fg="yellow", bold=True),
+    "[REMOTE ONLY]": click.style("[REMOTE ONLY]", fg="blue", dim=True),
+}
 
 
 def display_tree_comparison(
@@ -27,6 +53,7 @@ def display_tree_comparison(
     max_depth: int = DEFAULT_MAX_DEPTH,
     summary_only: bool = False,
     complete_tree: bool = False,
+    use_cache: bool = True,
 ) -> Tuple[int, int, int]:
     """
     Display tree comparison of local vs remote files before upload.
@@ -40,108 +67,80 @@ def display_tree_comparison(
         max_depth: Maximum tree depth to display (default: DEFAULT_MAX_DEPTH).
         summary_only: If True, show only statistics without tree (default: False).
         complete_tree: If True, show all files including remote-only (default: False).
+        use_cache: If False, rescan the remote tree even when the binding's
+            cache_ttl allows reusing a cached listing (default: True).
 
     Returns:
         Tuple of (new_files_count, overwrite_count, remote_only_count).
     """
-    from gsupload.protocols.ftp import list_remote_ftp
-    from gsupload.protocols.sftp import list_remote_sftp
-
-    hostname = host_config["hostname"]
-    port = host_config.get("port", 21 if protocol == "ftp" else 22)
-    username = host_config["username"]
-    password = host_config.get("password")
     remote_basepath = host_config["remote_basepath"]
 
     # Calculate local file relative paths
-    local_rel_paths: Set[str] = set()
-    for local_file in local_files:
-        try:
-            rel_path = local_file.relative_to(local_basepath)
-            local_rel_paths.add(str(rel_path).replace(os.sep, "/"))
-        except ValueError:
-            continue
+    local_rel_paths: FrozenSet[str] = frozenset(
+        _iter_local_rel_paths(local_files, local_basepath)
+    )
 
-    # Connect and list remote files
-    click.echo(f"🔍 Connecting to {hostname}...")
+    click.echo(f"🔍 Connecting to {host_config['hostname']}...")
     click.echo(f"📌 Binding in use: {binding_alias}")
 
     # Display binding comment if present
     if "comments" in host_config:
         display_comment(host_config["comments"], prefix="📝")
 
-    remote_files: Set[str] = set()
+    # A recent complete listing can be reused when the binding enables it
+    cache_ttl = host_config.get("cache_ttl", 0)
+    cache_file = (
+        _listing_cache_file(host_config, protocol)
+        if complete_tree and cache_ttl
+        else None
+    )
+    cached = (
+        _load_cached_listing(cache_file, cache_ttl)
+        if cache_file is not None and use_cache
+        else None
+    )
 
     try:
-        if protocol == "ftp":
-            import ftplib
-
-            ftp = ftplib.FTP()
-            ftp.connect(hostname, port, timeout=60)
-            ftp.login(username, password or "")
-            ftp.set_pasv(True)  # Use passive mode by default
-
-            scan_start = time.time()
-            remote_files = list_remote_ftp(ftp, remote_basepath, timeout=60)
-            scan_elapsed = time.time() - scan_start
-
-            # Display scan time
-            _display_scan_time(scan_elapsed)
-
-            ftp.quit()
-
-        elif protocol == "sftp":
-            key_filename = host_config.get("key_filename")
-
-            # Use SSHClient for better compatibility and automatic host key handling
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            try:
-                # Retry connection with multiple strategies for problematic servers
-                _connect_sftp_with_retry(
-                    ssh, hostname, port, username, password, key_filename
-                )
-
-                # Open SFTP session
-                sftp = ssh.open_sftp()
-
-                click.echo("🔍 Listing remote files...")
-                scan_start = time.time()
-                remote_files = list_remote_sftp(sftp, remote_basepath, timeout=60)
-                scan_elapsed = time.time() - scan_start
-
-                # Display scan time
-                _display_scan_time(scan_elapsed)
-
-                sftp.close()
-                ssh.close()
-
-            except Exception:
-                if ssh:
-                    ssh.close()
-                raise
-
+        if cached is not None:
+            remote_files, age = cached
+            click.echo(
+                f"📦 Using remote listing cached {format_elapsed(age)} ago"
+                " (--no-cache to rescan)"
+            )
+        else:
+            remote_files = _list_remote_files(
+                host_config, protocol, local_rel_paths, complete_tree
+            )
+            if cache_file is not None:
+                _save_cached_listing(cache_file, remote_files)
     except Exception as e:
         click.echo(
             f"\n⚠️  Warning: Failed to list remote files: {type(e).__name__}: {e}",
             err=True,
         )
-        import traceback
+        # Full tracebacks are only useful when debugging gsupload itself
+        if os.environ.get("GSUPLOAD_DEBUG"):
+            import traceback
 
-        click.echo(f"Traceback:\n{traceback.format_exc()}", err=True)
+            click.echo(f"Traceback:\n{traceback.format_exc()}", err=True)
         if not click.confirm("Proceed with upload without comparison?", default=False):
             sys.exit(0)
         return (len(local_files), 0, 0)
 
-    # Categorize files
-    new_files = local_rel_paths - remote_files
-    overwrite_files = local_rel_paths & remote_files
+    # Categorize files in a single pass over the local paths
+    new_files: List[str] = []
+    overwrite_files: List[str] = []
+    for rel_path in local_rel_paths:
+        if rel_path in remote_files:
+            overwrite_files.append(rel_path)
+        else:
+            new_files.append(rel_path)
 
     # Only calculate remote-only files if complete tree is requested (saves time)
-    remote_only_files: Set[str] = set()
+    # The difference is a fresh set that nothing mutates, so no frozenset copy
+    remote_only_files: Collection[str] = ()
     if complete_tree:
-        remote_only_files = remote_files - local_rel_paths
+        remote_only_files = remote_files.difference(local_rel_paths)
 
     # Build tree structure
     if not summary_only:
@@ -163,27 +162,267 @@ def display_tree_comparison(
     return (len(new_files), len(overwrite_files), len(remote_only_files))
 
 
-def _display_scan_time(elapsed: float) -> None:
-    """Display formatted scan time."""
-    days = int(elapsed // 86400)
-    hours = int((elapsed % 86400) // 3600)
-    minutes = int((elapsed % 3600) // 60)
-    seconds = elapsed % 60
+def _list_remote_files(
+    host_config: Dict[str, Any],
+    protocol: str,
+    local_rel_paths: Collection[str],
+    complete_tree: bool,
+) -> Set[str]:
+    """
+    Connect to the remote host and list the files to compare against.
 
-    time_parts = []
-    if days > 0:
-        time_parts.append(f"{days}d")
-    if hours > 0 or days > 0:
-        time_parts.append(f"{hours}h")
-    if minutes > 0 or hours > 0 or days > 0:
-        time_parts.append(f"{minutes}m")
-    time_parts.append(f"{seconds:.2f}s")
+    Args:
+        host_config: Host configuration with connection details.
+        protocol: 'ftp' or 'sftp'.
+        local_rel_paths: POSIX paths of the local files, relative to
+            local_basepath.
+        complete_tree: If True, list the whole remote tree; otherwise only
+            the directories the local files are uploaded into.
 
-    click.echo(f"⏱️  Scan completed in {' '.join(time_parts)}")
+    Returns:
+        Set of remote file paths relative to remote_basepath.
+    """
+    hostname = host_config["hostname"]
+    port = host_config.get("port", 21 if protocol == "ftp" else 22)
+    username = host_config["username"]
+    password = host_config.get("password")
+    remote_basepath = host_config["remote_basepath"]
+    max_workers = host_config.get("max_workers", 5)
+
+    remote_files: Set[str] = set()
+
+    if protocol == "ftp":
+        import ftplib
+
+        from gsupload.protocols.ftp import list_remote_ftp, list_remote_ftp_dirs
+
+        def connect_ftp() -> "ftplib.FTP":
+            """Open a logged-in FTP connection."""
+            conn = ftplib.FTP()
+            conn.connect(hostname, port, timeout=60)
+            enable_keepalive(conn.sock)
+            conn.login(username, password or "")
+            conn.set_pasv(True)  # Use passive mode by default
+            return conn
+
+        ftp = connect_ftp()
+
+        scan_start = time.time()
+        if complete_tree:
+            remote_files = list_remote_ftp(
+                ftp,
+                remote_basepath,
+                timeout=60,
+                max_workers=max_workers,
+                connect=connect_ftp,
+            )
+        else:
+            # Changes only: just list the directories being uploaded into
+            remote_files = list_remote_ftp_dirs(
+                ftp,
+                remote_basepath,
+                _parent_dirs(local_rel_paths),
+                max_workers=max_workers,
+                connect=connect_ftp,
+            )
+        scan_elapsed = time.time() - scan_start
+
+        # Display scan time
+        _display_scan_time(scan_elapsed)
+
+        ftp.quit()
+
+    elif protocol == "sftp":
+        # paramiko is slow to import; only load it for SFTP hosts
+        import paramiko
+
+        from gsupload.protocols.sftp import list_remote_sftp, list_remote_sftp_dirs
+
+        key_filename = host_config.get("key_filename")
+
+        # Use SSHClient for better compatibility and automatic host key handling
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+        try:
+            # Retry connection with multiple strategies for problematic servers
+            _connect_sftp_with_retry(
+                ssh, hostname, port, username, password, key_filename
+            )
+
+            # Open SFTP session
+            sftp = ssh.open_sftp()
+
+            click.echo("🔍 Listing remote files...")
+            scan_start = time.time()
+            if complete_tree:
+                remote_files = list_remote_sftp(
+                    sftp, remote_basepath, timeout=60, max_workers=max_workers
+                )
+            else:
+                # Changes only: just list the directories being uploaded into
+                remote_files = list_remote_sftp_dirs(
+                    sftp,
+                    remote_basepath,
+                    _parent_dirs(local_rel_paths),
+                    max_workers=max_workers,
+                )
+            scan_elapsed = time.time() - scan_start
+
+            # Display scan time
+            _display_scan_time(scan_elapsed)
+
+            sftp.close()
+            ssh.close()
+
+        except Exception:
+            if ssh:
+                ssh.close()
+            raise
+
+    return remote_files
+
+
+def _listing_cache_file(host_config: Dict[str, Any], protocol: str) -> Path:
+    """Return the cache file for a host's remote listing."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    key = "\0".join(
+        str(value)
+        for value in (
+            protocol,
+            host_config["hostname"],
+            host_config.get("port", ""),
+            host_config["username"],
+            host_config["remote_basepath"],
+        )
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return Path(cache_home) / "gsupload" / f"{digest}.json.gz"
+
+
+def _load_cached_listing(
+    cache_file: Path, ttl: float
+) -> Optional[Tuple[Set[str], float]]:
+    """
+    Load a cached remote listing if it is younger than ttl seconds.
+
+    Returns:
+        Tuple of (remote files, age in seconds), or None if there is no
+        usable cache entry.
+    """
+    try:
+        age = time.time() - cache_file.stat().st_mtime
+        if not 0 <= age < ttl:
+            return None
+        with gzip.open(cache_file, "rt", encoding="utf-8") as f:
+            return (set(json.load(f)), age)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cached_listing(cache_file: Path, remote_files: Set[str]) -> None:
+    """Write a remote listing to the cache; failures are ignored."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_file, "wt", encoding="utf-8") as f:
+            json.dump(sorted(remote_files), f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def invalidate_remote_listing(
+    host_config: Dict[str, Any], protocol: str
+) -> Optional[Tuple[Set[str], float]]:
+    """
+    Discard the cached remote listing for a host, e.g. before uploading.
+
+    The cache file is removed before the upload starts, so an interrupted
+    upload can't leave behind a listing that misses files already sent.
+
+    Args:
+        host_config: Host configuration with connection details.
+        protocol: 'ftp' or 'sftp'.
+
+    Returns:
+        Tuple of (remote files, cache mtime) if the discarded listing was
+        still within cache_ttl, to hand to update_remote_listing() once the
+        upload finishes; otherwise None.
+    """
+    cache_file = _listing_cache_file(host_config, protocol)
+    cached = _load_cached_listing(cache_file, host_config.get("cache_ttl", 0))
+    try:
+        cache_file.unlink()
+    except OSError:
+        pass
+    if cached is None:
+        return None
+    remote_files, age = cached
+    return (remote_files, time.time() - age)
+
+
+def update_remote_listing(
+    host_config: Dict[str, Any],
+    protocol: str,
+    listing: Tuple[Set[str], float],
+    uploaded: List[str],
+) -> None:
+    """
+    Write back a listing taken by invalidate_remote_listing(), with uploads added.
+
+    The cache keeps the timestamp of the scan that produced it, so cache_ttl
+    still counts from that scan rather than from the upload.
+
+    Args:
+        host_config: Host configuration with connection details.
+        protocol: 'ftp' or 'sftp'.
+        listing: Tuple of (remote files, cache mtime) from
+            invalidate_remote_listing().
+        uploaded: Absolute remote paths of the files uploaded successfully.
+    """
+    remote_files, mtime = listing
+    remote_prefix = host_config["remote_basepath"].rstrip("/") + "/"
+    remote_files.update(
+        path[len(remote_prefix) :]
+        for path in uploaded
+        if path.startswith(remote_prefix)
+    )
+    cache_file = _listing_cache_file(host_config, protocol)
+    _save_cached_listing(cache_file, remote_files)
+    try:
+        os.utime(cache_file, (mtime, mtime))
+    except OSError:
+        pass
+
+
+def _iter_local_rel_paths(
+    local_files: List[Path], local_basepath: Path
+) -> Iterator[str]:
+    """Yield POSIX-style paths of local_files relative to local_basepath."""
+    # Plain string slicing: avoids a Path allocation per relative_to() call
+    prefix = os.fspath(local_basepath.absolute()).rstrip(os.sep) + os.sep
+    prefix_len = len(prefix)
+    for local_file in local_files:
+        path_str = os.fspath(local_file.absolute())
+        if not path_str.startswith(prefix):
+            continue
+        rel_path = path_str[prefix_len:]
+        yield rel_path if os.sep == "/" else rel_path.replace(os.sep, "/")
+
+
+def _parent_dirs(rel_paths: Collection[str]) -> Set[str]:
+    """Return the distinct parent directories of POSIX relative paths."""
+    return {p.rpartition("/")[0] for p in rel_paths}
+
+
+def _display_scan_time(elapsed: float) -> None:
+    """Display formatted scan time."""
+    click.echo(f"⏱️  Scan completed in {format_elapsed(elapsed)}")
 
 
 def _connect_sftp_with_retry(
-    ssh: paramiko.SSHClient,
+    ssh: "paramiko.SSHClient",
     hostname: str,
     port: int,
     username: str,
@@ -191,6 +430,8 @@ def _connect_sftp_with_retry(
     key_filename: str | None,
 ) -> None:
     """Connect to SFTP with retry strategies for problematic servers."""
+    import paramiko
+
     max_retries = 4
     retry_count = 0
     connection_successful = False
@@ -269,6 +510,10 @@ def _connect_sftp_with_retry(
                 )
 
             connection_successful = True
+            transport = ssh.get_transport()
+            if transport is not None:
+                transport.set_keepalive(30)
+                enable_keepalive(transport.sock)
             click.echo("✅ SFTP connection established")
 
         except (
@@ -304,41 +549,56 @@ def _connect_sftp_with_retry(
 
 
 def _display_tree(
-    new_files: Set[str],
-    overwrite_files: Set[str],
-    remote_only_files: Set[str],
+    new_files: Collection[str],
+    overwrite_files: Collection[str],
+    remote_only_files: Collection[str],
     local_basepath: Path,
     remote_basepath: str,
     max_depth: int,
     complete_tree: bool,
 ) -> None:
     """Build and display tree structure."""
+    # Nested dicts keyed by name: a directory maps to the dict of its
+    # children and a file maps straight to its status string, so a file
+    # costs one dict entry rather than a dict of its own
     tree_structure: Dict[str, Any] = {}
 
-    def add_to_tree(path: str, status: str) -> None:
+    def add_to_tree(path: str, status: str) -> bool:
+        """Insert a file, returning False if it lies beyond max_depth."""
         parts = path.split("/")
         current = tree_structure
 
-        # Build directory structure
-        for part in parts[:-1]:
-            if part not in current:
-                current[part] = {"__type__": "dir", "__children__": {}}
-            current = current[part]["__children__"]
+        # Build directory structure, stopping at the deepest level shown
+        dir_count = max(0, min(len(parts) - 1, max_depth + 1))
+        for part in parts[:dir_count]:
+            child = current.get(part)
+            if not isinstance(child, dict):
+                child = current[part] = {}
+            current = child
+
+        # Files beyond max_depth are only counted, never stored
+        if len(parts) - 1 > max_depth:
+            return False
 
         # Add file with status
-        filename = parts[-1]
-        current[filename] = {"__type__": "file", "__status__": status}
+        current[parts[-1]] = status
+        return True
+
+    depth_exceeded_count = 0
 
     # Add all files to tree
     for path in new_files:
-        add_to_tree(path, "[NEW]")
+        if not add_to_tree(path, "[NEW]"):
+            depth_exceeded_count += 1
     for path in overwrite_files:
-        add_to_tree(path, "[OVERWRITE]")
+        if not add_to_tree(path, "[OVERWRITE]"):
+            depth_exceeded_count += 1
 
     # Only add remote-only files if complete tree is requested
     if complete_tree:
         for path in remote_only_files:
-            add_to_tree(path, "[REMOTE ONLY]")
+            if not add_to_tree(path, "[REMOTE ONLY]"):
+                depth_exceeded_count += 1
 
     # Display tree
     tree_mode = "Complete" if complete_tree else "Changes Only"
@@ -355,57 +615,46 @@ def _display_tree(
         )
 
     displayed_count = 0
-    depth_exceeded_count = 0
-
-    def display_node(node: dict, prefix: str = "", depth: int = 0) -> None:
-        nonlocal displayed_count, depth_exceeded_count
-
-        if depth > max_depth:
-
-            def count_items(n: dict) -> int:
-                count = 0
-                for key, value in n.items():
-                    if value.get("__type__") == "file":
-                        count += 1
-                    elif value.get("__type__") == "dir":
-                        count += count_items(value.get("__children__", {}))
-                return count
-
-            depth_exceeded_count += count_items(node)
-            return
-
-        items = sorted(node.items())
-        dirs = [(k, v) for k, v in items if v.get("__type__") == "dir"]
-        files = [(k, v) for k, v in items if v.get("__type__") == "file"]
-        all_items = dirs + files
+    lines: List[str] = []
+
+    # Iterative pre-order walk; each frame is (ordered children, next index,
+    # prefix, depth) so deep trees don't pay Python recursion overhead
+    stack: List[Tuple[List[Tuple[str, Any]], int, str, int]] = [
+        (_ordered_children(tree_structure), 0, "", 0)
+    ]
+
+    while stack:
+        children, idx, prefix, depth = stack[-1]
+        if idx >= len(children):
+            stack.pop()
+            continue
+        stack[-1] = (children, idx + 1, prefix, depth)
 
-        for idx, (name, value) in enumerate(all_items):
-            is_last = idx == len(all_items) - 1
-            connector = "└── " if is_last else "├── "
+        name, value = children[idx]
+        is_last = idx == len(children) - 1
+        connector = "└── " if is_last else "├── "
 
-            if value.get("__type__") == "dir":
-                click.echo(f"{prefix}{connector}{name}/")
-                displayed_count += 1
+        if isinstance(value, dict):
+            lines.append(f"{prefix}{connector}{name}/")
+            displayed_count += 1
 
+            # Directories at max_depth were built empty by add_to_tree
+            if depth + 1 <= max_depth:
                 extension = "    " if is_last else "│   "
-                display_node(
-                    value.get("__children__", {}), prefix + extension, depth + 1
+                stack.append(
+                    (_ordered_children(value), 0, prefix + extension, depth + 1)
                 )
+        else:
+            lines.append(f"{prefix}{connector}{name} {_COLORED.get(value, value)}")
+            displayed_count += 1
 
-            elif value.get("__type__") == "file":
-                status = value.get("__status__", "")
+        # Emit in batches to amortize terminal I/O
+        if len(lines) >= _TREE_ECHO_BATCH:
+            click.echo("\n".join(lines))
+            lines.clear()
 
-                if status == "[NEW]":
-                    colored_status = click.style(status, fg="green", bold=True)
-                elif status == "[OVERWRITE]":
-                    colored_status = click.style(status, fg="yellow", bold=True)
-                else:
-                    colored_status = click.style(status, fg="blue", dim=True)
-
-                click.echo(f"{prefix}{connector}{name} {colored_status}")
-                displayed_count += 1
-
-    display_node(tree_structure)
+    if lines:
+        click.echo("\n".join(lines))
 
     if depth_exceeded_count > 0:
         click.echo(
@@ -413,11 +662,25 @@ def _display_tree(
         )
 
 
+def _ordered_children(node: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """Return a tree node's children sorted by name, directories first."""
+    # Partition in one pass, then sort each side; names are unique within a
+    # directory so the tuple sort never has to compare the values
+    dirs: List[Tuple[str, Any]] = []
+    files: List[Tuple[str, Any]] = []
+    for item in node.items():
+        (dirs if isinstance(item[1], dict) else files).append(item)
+    dirs.sort()
+    files.sort()
+    dirs.extend(files)
+    return dirs
+
+
 def _display_summary(
-    new_files: Set[str],
-    overwrite_files: Set[str],
+    new_files: Collection[str],
+    overwrite_files: Collection[str],
     remote_files: Set[str],
-    remote_only_files: Set[str],
+    remote_only_files: Collection[str],
     complete_tree: bool,
 ) -> None:
     """Display summary statistics."""
@@ -435,7 +698,9 @@ def _display_summary(
             f"  {click.style('Remote only:       ', fg='blue')} {len(remote_only_files)}"
         )
     else:
+        # Only the target directories were listed in changes-only mode
         click.echo(
             f"  {click.style('Remote only:       ', fg='blue')} {remote_only_count}"
+            " (in target directories)"
         )
     click.echo(f"{'=' * 60}\n")
@@ -6,13 +6,35 @@ Contains helper functions for path calculations, file expansion, and display.
 
 import glob
 import os
+import random
+import re
+import socket
+import stat
 import sys
+from operator import itemgetter
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import click
 
-from gsupload.excludes import is_excluded, walk_directory
+from gsupload.excludes import (
+    find_files_by_name,
+    is_excluded_str,
+    walk_directory_strs,
+)
+
+# Anything that makes a pattern address paths rather than bare file names
+_PATH_PATTERN_RE = re.compile(r"[/\\]|\*\*")
+
+# Wildcard characters understood by glob
+_GLOB_MAGIC_RE = re.compile(r"[*?[]")
+
+# TCP keepalive: first probe after 30s idle, then every 10s, give up after 3
+_KEEPALIVE_OPTIONS = (
+    ("TCP_KEEPIDLE", 30),
+    ("TCP_KEEPINTVL", 10),
+    ("TCP_KEEPCNT", 3),
+)
 
 
 def display_comment(comment: str, prefix: str = "💬") -> None:
@@ -27,6 +49,112 @@ def display_comment(comment: str, prefix: str = "💬") -> None:
         click.echo(click.style(f"{prefix} {comment}", fg="cyan"))
 
 
+def echo_upload_results(
+    results: Iterable[Tuple[bool, str, str]],
+    total_files: int,
+    completed: int = 0,
+    uploaded: Optional[List[str]] = None,
+) -> int:
+    """
+    Display a numbered progress line for each finished upload.
+
+    Success lines are written with a single echo per call, so a batch of
+    uploads that finished together costs one write; a failure first writes
+    the lines before it, keeping the output in completion order.
+
+    Args:
+        results: (success, local_path, message) tuples, in completion order.
+        total_files: Total number of files being uploaded.
+        completed: Number of files already reported (default: 0).
+        uploaded: Optional list the remote path of each successful upload
+            is appended to.
+
+    Returns:
+        Number of files reported so far, including completed.
+    """
+    lines: List[str] = []
+    for success, local_path, message in results:
+        completed += 1
+        if success:
+            lines.append(f"[{completed}/{total_files}] ✅ {local_path} → {message}")
+            if uploaded is not None:
+                uploaded.append(message)
+        else:
+            lines.append(f"[{completed}/{total_files}] ")
+            click.echo("\n".join(lines), nl=False)
+            lines.clear()
+            click.echo(f"❌ {local_path} ({message})", err=True)
+
+    if lines:
+        click.echo("\n".join(lines))
+    return completed
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    Seconds to wait before retrying a failed upload.
+
+    The delay doubles with each attempt (0.5s, 1s, 2s, ...) plus up to 0.2s
+    of jitter, so workers that failed together don't retry in lockstep.
+
+    Args:
+        attempt: Number of the retry about to be made, starting at 1.
+
+    Returns:
+        Delay in seconds.
+    """
+    return 0.5 * 2 ** (attempt - 1) + random.random() * 0.2
+
+
+def enable_keepalive(sock: object) -> None:
+    """
+    Turn on TCP keepalive probes for a long-lived connection.
+
+    FTP control connections sit idle while a large listing or upload runs
+    over data connections, and NAT gateways and firewalls silently drop
+    idle TCP flows. Probing every few seconds keeps the flow alive, and a
+    dead peer is detected in under a minute instead of at the next command.
+    Options the platform lacks are skipped; anything that isn't a real
+    socket (e.g. a proxy command) is left alone.
+
+    Args:
+        sock: Connected socket.
+    """
+    if not isinstance(sock, socket.socket):
+        return
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        for name, value in _KEEPALIVE_OPTIONS:
+            option = getattr(socket, name, None)
+            if option is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, option, value)
+    except OSError:
+        pass
+
+
+def format_elapsed(elapsed: float) -> str:
+    """
+    Format a duration as e.g. "1h 2m 3.45s", omitting leading zero units.
+
+    Args:
+        elapsed: Duration in seconds.
+
+    Returns:
+        Human-readable duration.
+    """
+    minutes, seconds = divmod(elapsed, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    days, hours = divmod(hours, 24)
+
+    if days:
+        return f"{days}d {hours}h {minutes}m {seconds:.2f}s"
+    if hours:
+        return f"{hours}h {minutes}m {seconds:.2f}s"
+    if minutes:
+        return f"{minutes}m {seconds:.2f}s"
+    return f"{seconds:.2f}s"
+
+
 def calculate_remote_path(
     local_path: Path, local_basepath: Path, remote_basepath: str
 ) -> str:
@@ -44,19 +172,161 @@ def calculate_remote_path(
     Raises:
         SystemExit: If local_path is not within local_basepath.
     """
-    try:
-        relative_path = local_path.absolute().relative_to(local_basepath.absolute())
-    except ValueError:
-        click.echo(
-            f"Error: File '{local_path}' is not within local basepath '{local_basepath}'.",
-            err=True,
-        )
-        sys.exit(1)
-
     # Ensure remote_basepath doesn't end with slash unless it's root
     remote_base = remote_basepath.rstrip("/")
-    rel_path_str = str(relative_path).replace(os.sep, "/")
-    return f"{remote_base}/{rel_path_str}"
+
+    # Plain string slice when the file is spelled under the base; relative_to()
+    # only for the rest (and to report files outside it)
+    path_str = str(local_path.absolute())
+    base_str = str(local_basepath.absolute())
+    prefix = base_str if base_str.endswith(os.sep) else base_str + os.sep
+    if path_str.startswith(prefix):
+        rel_path_str = path_str[len(prefix) :]
+    else:
+        try:
+            rel_path_str = str(
+                local_path.absolute().relative_to(local_basepath.absolute())
+            )
+        except ValueError:
+            click.echo(
+                f"Error: File '{local_path}' is not within local basepath '{local_basepath}'.",
+                err=True,
+            )
+            sys.exit(1)
+
+    return f"{remote_base}/{rel_path_str.replace(os.sep, '/')}"
+
+
+def calculate_remote_paths(
+    local_paths: Iterable[Path], local_basepath: Path, remote_basepath: str
+) -> Dict[Path, str]:
+    """
+    Calculate the remote path of many local files at once.
+
+    Same result as calling calculate_remote_path() per file, but the base
+    paths are normalized once and each file inside local_basepath costs a
+    string slice instead of a Path.relative_to() call.
+
+    Args:
+        local_paths: Local file paths.
+        local_basepath: Local base directory.
+        remote_basepath: Remote base directory.
+
+    Returns:
+        Dict mapping each local path to its remote path.
+
+    Raises:
+        SystemExit: If a local path is not within local_basepath.
+    """
+    base_str = str(local_basepath.absolute())
+    prefix = base_str if base_str.endswith(os.sep) else base_str + os.sep
+    remote_base = remote_basepath.rstrip("/")
+
+    remote_paths: Dict[Path, str] = {}
+    for local_path in local_paths:
+        path_str = str(
+            local_path if local_path.is_absolute() else local_path.absolute()
+        )
+        if path_str.startswith(prefix):
+            rel_path_str = path_str[len(prefix) :].replace(os.sep, "/")
+            remote_paths[local_path] = f"{remote_base}/{rel_path_str}"
+        else:
+            # Anything unusual (or outside the base) takes the exact path
+            remote_paths[local_path] = calculate_remote_path(
+                local_path, local_basepath, remote_basepath
+            )
+    return remote_paths
+
+
+def sort_upload_order(files: List[Path], local_basepath: Path) -> List[Path]:
+    """
+    Sort files by depth (external first) then alphabetically.
+
+    Files are bucketed by depth and each bucket is sorted on its lowercased
+    path string, so the sort compares plain strings instead of key tuples.
+
+    Args:
+        files: Local file paths.
+        local_basepath: Local base directory.
+
+    Returns:
+        New list of files in upload order.
+    """
+    prefix = str(local_basepath).rstrip(os.sep) + os.sep
+    prefix_len = len(prefix)
+
+    by_depth: Dict[int, List[Tuple[str, Path]]] = {}
+    for f in files:
+        path_str = str(f)
+        if path_str.startswith(prefix):
+            rel_path = path_str[prefix_len:]
+            depth = rel_path.count(os.sep)
+            key = rel_path.lower()
+        else:
+            depth = 999
+            key = path_str.lower()
+        bucket = by_depth.get(depth)
+        if bucket is None:
+            by_depth[depth] = bucket = []
+        bucket.append((key, f))
+
+    ordered: List[Path] = []
+    for depth in sorted(by_depth):
+        bucket = by_depth[depth]
+        bucket.sort(key=itemgetter(0))
+        ordered.extend(f for _, f in bucket)
+    return ordered
+
+
+def _is_name_pattern(pattern: str) -> bool:
+    """Check if a pattern only matches file names (no path components)."""
+    return _PATH_PATTERN_RE.search(pattern) is None
+
+
+def _recursive_search_root(cwd: Path, local_basepath: Path) -> Optional[str]:
+    """
+    Pick the directory to search recursively for name patterns.
+
+    Only files within local_basepath are ever uploaded, so the walk from cwd
+    is narrowed to local_basepath when cwd is above it, and skipped entirely
+    when the two trees don't overlap.
+
+    Args:
+        cwd: Current working directory.
+        local_basepath: Resolved local base directory.
+
+    Returns:
+        Directory to walk, or None if nothing under cwd can be uploaded.
+    """
+    cwd_str = str(cwd.resolve())
+    base_str = str(local_basepath)
+    if cwd_str == base_str or cwd_str.startswith(base_str.rstrip(os.sep) + os.sep):
+        return cwd_str
+    if base_str.startswith(cwd_str.rstrip(os.sep) + os.sep):
+        return base_str
+    return None
+
+
+def _real_path(path_str: str, is_link: bool, real_dirs: Dict[str, str]) -> str:
+    """
+    Return an absolute path with symlinks resolved, like Path.resolve().
+
+    Args:
+        path_str: Absolute, normalized path.
+        is_link: Whether path_str itself is a symlink.
+        real_dirs: Memo of resolved parent directories, filled in as needed,
+            so files sharing a directory cost one realpath() between them.
+
+    Returns:
+        The resolved path.
+    """
+    if is_link:
+        return os.path.realpath(path_str)
+    parent, name = os.path.split(path_str)
+    real_parent = real_dirs.get(parent)
+    if real_parent is None:
+        real_parent = real_dirs[parent] = os.path.realpath(parent)
+    return os.path.join(real_parent, name)
 
 
 def expand_patterns(
@@ -64,6 +334,8 @@ def expand_patterns(
     excludes: List[str],
     local_basepath: Path,
     recursive: bool = False,
+    max_workers: int = 1,
+    cwd: Optional[Path] = None,
 ) -> List[Path]:
     """
     Expand glob patterns to a list of files.
@@ -73,64 +345,159 @@ def expand_patterns(
         excludes: List of exclude patterns.
         local_basepath: Base directory for relative path calculation.
         recursive: If True, search recursively for patterns without path separators.
+        max_workers: Number of threads listing directories during the
+            recursive search and directory walks (default: 1).
+        cwd: Directory relative patterns are resolved against (default: the
+            process working directory).
 
     Returns:
         List of resolved file paths.
     """
-    files: List[Path] = []
-    seen: set = set()
+    return list(
+        iter_patterns(patterns, excludes, local_basepath, recursive, max_workers, cwd)
+    )
+
+
+def iter_patterns(
+    patterns: List[str],
+    excludes: List[str],
+    local_basepath: Path,
+    recursive: bool = False,
+    max_workers: int = 1,
+    cwd: Optional[Path] = None,
+) -> Iterator[Path]:
+    """
+    Expand glob patterns lazily, yielding each file as soon as it is found.
+
+    Same arguments and filtering as expand_patterns(); files are yielded once
+    each, in discovery order.
+    """
+    seen: Set[str] = set()
+    # Resolved parent directories of matches, shared by the containment check
+    real_dirs: Dict[str, str] = {}
+
+    # Resolve the base once (a no-op for callers that already did, like the
+    # CLI); matches are compared against it as strings. normcase() makes the
+    # comparison case-insensitive on Windows, as relative_to() is, and is a
+    # no-op elsewhere.
+    base_resolved = local_basepath.resolve()
+    base_canon = os.fspath(base_resolved)
+    base_canon_prefix = base_canon.rstrip(os.sep) + os.sep
+    base_str = os.path.normcase(base_canon)
+    base_prefix = base_str.rstrip(os.sep) + os.sep
+
+    # If recursive flag is set, patterns without a path separator are searched
+    # recursively from cwd. Walk the tree once for all of them instead of once
+    # per pattern.
+    name_matches: Dict[str, List[str]] = {}
+    if recursive:
+        name_patterns = [p for p in patterns if _is_name_pattern(p)]
+        search_root = _recursive_search_root(
+            Path.cwd() if cwd is None else cwd, base_resolved
+        )
+        if name_patterns and search_root is not None:
+            name_matches = find_files_by_name(
+                Path(search_root), name_patterns, excludes, base_resolved, max_workers
+            )
 
     for pattern in patterns:
-        matched: List[str] = []
+        matched: List[str] = list(name_matches.get(pattern, []))
+        # The recursive search only returns regular files, so its matches
+        # need no stat() to tell files from directories
+        known_files = bool(matched)
 
-        # If recursive flag is set and pattern has no path separator, search recursively from cwd
-        if recursive and "/" not in pattern and "\\" not in pattern:
-            cwd = Path.cwd()
-            try:
-                # Use rglob for recursive matching
-                matched = [str(p) for p in cwd.rglob(pattern) if p.is_file()]
-            except Exception:
-                matched = []
+        # Relative patterns are anchored to cwd when one is given; absolute
+        # ones are left alone by join()
+        if cwd is None:
+            path_pattern = glob_pattern = pattern
+        else:
+            path_pattern = os.path.join(cwd, pattern)
+            glob_pattern = os.path.join(glob.escape(os.fspath(cwd)), pattern)
 
         if not matched:
-            # Fall back to standard glob
-            matched = glob.glob(pattern, recursive=True)
+            if _GLOB_MAGIC_RE.search(pattern):
+                # Fall back to standard glob
+                matched = glob.glob(glob_pattern, recursive=True)
+            elif os.path.lexists(path_pattern):
+                # Literal path: nothing to scan, just check it's there
+                matched = [path_pattern]
 
         if not matched:
             # Maybe it's a file that doesn't exist yet? Or just a typo.
             # Or maybe it's a directory.
-            if os.path.exists(pattern):
-                matched = [pattern]
+            if os.path.exists(path_pattern):
+                matched = [path_pattern]
             else:
                 click.echo(f"Warning: No files found for pattern '{pattern}'", err=True)
                 continue
 
         for m in matched:
-            path = Path(m).resolve()
+            path_str = os.path.abspath(m)
+
+            # One lstat tells whether the match itself is a symlink, and for
+            # anything else also answers the exclude check's directory test
+            # and the file/directory dispatch below
+            try:
+                mode = os.lstat(path_str).st_mode
+                is_link = stat.S_ISLNK(mode)
+                if is_link and not known_files:
+                    mode = os.stat(path_str).st_mode
+            except OSError:
+                continue
+            if known_files:
+                is_file, is_dir = True, False
+            else:
+                is_file, is_dir = stat.S_ISREG(mode), stat.S_ISDIR(mode)
 
-            # Skip if already processed (deduplication)
-            if path in seen:
+            # Filter: only include files whose resolved path is within
+            # local_basepath, so a symlink inside it pointing elsewhere is
+            # rejected
+            real_cmp = os.path.normcase(_real_path(path_str, is_link, real_dirs))
+            if real_cmp != base_str and not real_cmp.startswith(base_prefix):
                 continue
 
-            # Filter: only include files within local_basepath
-            try:
-                path.relative_to(local_basepath.resolve())
-            except ValueError:
-                # File is outside local_basepath, skip it
+            # Matches inside local_basepath keep the path they were found
+            # under, like files found by the directory walk; a link outside
+            # it that points in is used by its resolved path
+            cmp_str = os.path.normcase(path_str)
+            if cmp_str != base_str and not cmp_str.startswith(base_prefix):
+                path_str = _real_path(path_str, is_link, real_dirs)
+                cmp_str = real_cmp
+
+            # Spell the base part as local_basepath does, so a match written
+            # in another case on Windows still slices and sorts against it
+            if cmp_str == base_str:
+                path_str = base_canon
+            else:
+                path_str = base_canon_prefix + path_str[len(base_prefix) :]
+
+            # Skip if already processed (deduplication); checked on the
+            # normcased string so duplicates never get a Path built for them
+            key = os.path.normcase(path_str)
+            if key in seen:
                 continue
 
-            if is_excluded(path, excludes, local_basepath):
+            # Excluded matches never get a Path built for them
+            if is_excluded_str(path_str, excludes, base_resolved, is_dir=is_dir):
                 continue
 
-            if path.is_file():
-                files.append(path)
-                seen.add(path)
-            elif path.is_dir():
+            if is_file:
+                seen.add(key)
+                yield Path(path_str)
+            elif is_dir:
                 # Recursively add all files in directory
-                dir_files = walk_directory(path, excludes, local_basepath)
-                for f in dir_files:
-                    if f not in seen:
-                        files.append(f)
-                        seen.add(f)
-
-    return files
+                dir_files = walk_directory_strs(
+                    Path(path_str), excludes, base_resolved, max_workers
+                )
+                dir_keys = [os.path.normcase(f_str) for f_str in dir_files]
+                if seen.isdisjoint(dir_keys):
+                    # Usual case: nothing from this directory was seen yet,
+                    # so record the whole batch at once
+                    seen.update(dir_keys)
+                    for f_str in dir_files:
+                        yield Path(f_str)
+                    continue
+                for f_str, f_key in zip(dir_files, dir_keys):
+                    if f_key not in seen:
+                        seen.add(f_key)
+                        yield Path(f_str)
@@ -3,6 +3,7 @@ Shared pytest fixtures for gsupload tests.
 """
 
 import json
+import shutil
 import tempfile
 from pathlib import Path
 from typing import Any, Dict, Generator
@@ -55,24 +56,44 @@ def config_file(temp_dir: Path, sample_config: Dict[str, Any]) -> Path:
     return config_path
 
 
-@pytest.fixture
-def sample_file_structure(temp_dir: Path) -> Path:
-    """Create a sample file structure for testing."""
+@pytest.fixture(scope="session")
+def outside_basepath_file(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create one file that lies outside every per-test temp_dir."""
+    path = tmp_path_factory.mktemp("outside_basepath") / "other.txt"
+    path.touch()
+    return path
+
+
+@pytest.fixture(scope="session")
+def _sample_file_structure_template(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Build the sample file structure once per session."""
+    root = tmp_path_factory.mktemp("sample_file_structure")
+
     # Create directories
-    (temp_dir / "src").mkdir()
-    (temp_dir / "src" / "components").mkdir()
-    (temp_dir / "assets").mkdir()
+    (root / "src").mkdir()
+    (root / "src" / "components").mkdir()
+    (root / "assets").mkdir()
 
     # Create files
-    (temp_dir / "index.html").write_text("<html></html>")
-    (temp_dir / "style.css").write_text("body {}")
-    (temp_dir / "src" / "app.js").write_text("console.log('app');")
-    (temp_dir / "src" / "components" / "header.js").write_text("// header")
-    (temp_dir / "assets" / "logo.png").write_bytes(b"\x89PNG")
+    (root / "index.html").write_text("<html></html>")
+    (root / "style.css").write_text("body {}")
+    (root / "src" / "app.js").write_text("console.log('app');")
+    (root / "src" / "components" / "header.js").write_text("// header")
+    (root / "assets" / "logo.png").write_bytes(b"\x89PNG")
 
     # Create files that should be excluded
-    (temp_dir / "__pycache__").mkdir()
-    (temp_dir / "__pycache__" / "module.pyc").write_bytes(b"")
-    (temp_dir / "temp.tmp").write_text("temporary")
+    (root / "__pycache__").mkdir()
+    (root / "__pycache__" / "module.pyc").write_bytes(b"")
+    (root / "temp.tmp").write_text("temporary")
 
+    return root
+
+
+@pytest.fixture
+def sample_file_structure(
+    temp_dir: Path, _sample_file_structure_template: Path
+) -> Path:
+    """Create a sample file structure for testing."""
+    # Each test gets its own copy, so tests may add or change files freely
+    shutil.copytree(_sample_file_structure_template, temp_dir, dirs_exist_ok=True)
     return temp_dir
@@ -39,6 +39,30 @@ class TestCli:
         assert result.exit_code == 0
         assert "Usage:" in result.output
 
+    def test_import_does_not_load_paramiko(self) -> None:
+        """Test that paramiko is only imported once an SFTP host is used."""
+        import subprocess
+        import sys
+
+        code = "import sys, gsupload.cli; print('paramiko' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "False"
+
+    def test_import_does_not_load_ftplib(self) -> None:
+        """Test that ftplib (and the ssl module it pulls in) loads on demand."""
+        import subprocess
+        import sys
+
+        code = "import sys, gsupload.cli; print('ftplib' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "False"
+
     def test_show_config_flag(
         self, temp_dir: Path, sample_config: Dict[str, Any]
     ) -> None:
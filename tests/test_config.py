@@ -47,6 +47,23 @@ class TestLoadConfig:
         assert "global_excludes" in config
         assert "*.pyc" in config["global_excludes"]
 
+    def test_load_config_deduplicates_global_excludes(
+        self, temp_dir: Path, sample_config: Dict[str, Any]
+    ) -> None:
+        """Test that patterns repeated across config levels appear once."""
+        with open(temp_dir / ".gsupload.json", "w") as f:
+            json.dump({"global_excludes": ["*.pyc", "*.log"]}, f)
+        project = temp_dir / "project"
+        project.mkdir()
+        with open(project / ".gsupload.json", "w") as f:
+            json.dump(sample_config, f)
+
+        with patch.object(Path, "cwd", return_value=project):
+            config = load_config()
+
+        assert config["global_excludes"].count("*.pyc") == 1
+        assert config["global_excludes"][:2] == ["*.pyc", "*.log"]
+
 
 class TestGetHostConfig:
     """Tests for get_host_config function."""
@@ -93,3 +110,43 @@ class TestAutoDetectBinding:
         config: Dict[str, Any] = {"bindings": {}}
         binding = auto_detect_binding(config)
         assert binding is None
+
+    def test_auto_detect_prefers_deepest_binding(
+        self, temp_dir: Path, sample_config: Dict[str, Any]
+    ) -> None:
+        """Test that the deepest matching local_basepath wins."""
+        nested = temp_dir / "site"
+        nested.mkdir()
+        sample_config["bindings"]["test-ftp"]["local_basepath"] = str(temp_dir)
+        sample_config["bindings"]["test-sftp"]["local_basepath"] = str(nested)
+
+        with patch.object(Path, "cwd", return_value=nested):
+            binding = auto_detect_binding(sample_config)
+
+        assert binding == "test-sftp"
+
+    def test_auto_detect_ignores_sibling_prefix(
+        self, temp_dir: Path, sample_config: Dict[str, Any]
+    ) -> None:
+        """Test that a basepath sharing only a name prefix does not match."""
+        (temp_dir / "site").mkdir()
+        (temp_dir / "site-old").mkdir()
+        sample_config["bindings"]["test-ftp"]["local_basepath"] = str(temp_dir / "site")
+
+        with patch.object(Path, "cwd", return_value=temp_dir / "site-old"):
+            binding = auto_detect_binding(sample_config)
+
+        assert binding is None
+
+    def test_auto_detect_relative_basepath_follows_cwd(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a relative basepath resolves against each cwd in turn."""
+        config: Dict[str, Any] = {"bindings": {"x": {"local_basepath": "."}}}
+        for name in ("a", "b"):
+            site = temp_dir / name / "site"
+            site.mkdir(parents=True)
+            monkeypatch.chdir(site)
+
+            with patch.object(Path, "cwd", return_value=site.resolve()):
+                assert auto_detect_binding(config) == "x"
@@ -4,11 +4,17 @@ Tests for gsupload.excludes module.
 
 from pathlib import Path
 
+import pytest
+
 from gsupload.excludes import (
     collect_ignore_patterns,
+    find_files_by_name,
     is_excluded,
+    is_excluded_str,
     load_ignore_file,
+    show_ignored_files,
     walk_directory,
+    walk_directory_strs,
 )
 
 
@@ -37,6 +43,34 @@ class TestLoadIgnoreFile:
         patterns = load_ignore_file(ignore_file)
         assert patterns == []
 
+    def test_reload_after_modification(self, temp_dir: Path) -> None:
+        """Test that cached patterns are refreshed when the file changes."""
+        import os
+
+        ignore_file = temp_dir / ".gsupload_ignore"
+        ignore_file.write_text("*.log\n")
+        assert load_ignore_file(ignore_file) == ["*.log"]
+
+        ignore_file.write_text("*.tmp\n")
+        st = ignore_file.stat()
+        os.utime(ignore_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert load_ignore_file(ignore_file) == ["*.tmp"]
+
+    def test_reload_when_size_changes_within_same_mtime(self, temp_dir: Path) -> None:
+        """Test that a rewrite keeping the old mtime is still picked up."""
+        import os
+
+        ignore_file = temp_dir / ".gsupload_ignore"
+        ignore_file.write_text("*.log\n")
+        mtime_ns = ignore_file.stat().st_mtime_ns
+        assert load_ignore_file(ignore_file) == ["*.log"]
+
+        ignore_file.write_text("*.log\n*.tmp\n")
+        os.utime(ignore_file, ns=(mtime_ns, mtime_ns))
+
+        assert load_ignore_file(ignore_file) == ["*.log", "*.tmp"]
+
 
 class TestIsExcluded:
     """Tests for is_excluded function."""
@@ -65,6 +99,14 @@ class TestIsExcluded:
         excludes = ["node_modules/"]
         assert is_excluded(node_modules, excludes, temp_dir) is True
 
+    def test_directory_pattern_uses_given_is_dir(self, temp_dir: Path) -> None:
+        """Test that a caller-supplied is_dir is used instead of the disk."""
+        not_created = temp_dir / "node_modules"
+
+        excludes = ["node_modules/"]
+        assert is_excluded(not_created, excludes, temp_dir, is_dir=True) is True
+        assert is_excluded(not_created, excludes, temp_dir, is_dir=False) is False
+
     def test_path_pattern(self, temp_dir: Path) -> None:
         """Test path-based pattern matching."""
         subdir = temp_dir / "src"
@@ -75,17 +117,80 @@ class TestIsExcluded:
         excludes = ["/src/*.tmp"]
         assert is_excluded(test_file, excludes, temp_dir) is True
 
-    def test_file_outside_basepath(self, temp_dir: Path) -> None:
-        """Test file outside basepath is not excluded."""
-        import tempfile
+    def test_path_pattern_wildcard_stays_in_segment(self, temp_dir: Path) -> None:
+        """Test path pattern wildcards do not match across directories."""
+        nested = temp_dir / "src" / "sub"
+        nested.mkdir(parents=True)
+        test_file = nested / "test.tmp"
+        test_file.touch()
+
+        assert is_excluded(test_file, ["/src/*.tmp"], temp_dir) is False
+        assert is_excluded(test_file, ["/src/*/*.tmp"], temp_dir) is True
+
+    def test_directory_only_path_pattern(self, temp_dir: Path) -> None:
+        """Test that path patterns with a trailing slash only match directories."""
+        excludes = ["/docs/_build/"]
+        build = temp_dir / "docs" / "_build"
+
+        assert is_excluded(build, excludes, temp_dir, is_dir=True) is True
+        assert is_excluded(build, excludes, temp_dir, is_dir=False) is False
+        top_level = temp_dir / "_build"
+        assert is_excluded(top_level, excludes, temp_dir, is_dir=True) is False
+
+    def test_unanchored_path_pattern_matches_from_base(self, temp_dir: Path) -> None:
+        """Test path patterns without a leading slash are anchored to the base."""
+        excludes = ["src/*.tmp"]
+
+        assert is_excluded(temp_dir / "src" / "a.tmp", excludes, temp_dir) is True
+        assert (
+            is_excluded(temp_dir / "lib" / "src" / "a.tmp", excludes, temp_dir) is False
+        )
+
+    def test_many_wildcard_patterns_share_one_regex(self, temp_dir: Path) -> None:
+        """Test that hundreds of multi-wildcard patterns compile and match."""
+        excludes = [f"*cache{i}*.tmp*" for i in range(300)]
+
+        assert is_excluded(temp_dir / "a.cache299.tmp.x", excludes, temp_dir) is True
+        assert is_excluded(temp_dir / "a.cache300.log", excludes, temp_dir) is False
 
-        with tempfile.NamedTemporaryFile(delete=False) as f:
-            other_file = Path(f.name)
+    def test_wildcard_heavy_pattern_does_not_backtrack(self, temp_dir: Path) -> None:
+        """Test that a near-miss on a many-wildcard pattern returns promptly."""
+        name = "a" * 2000
 
+        assert is_excluded(temp_dir / name, ["*a" * 10 + "*b"], temp_dir) is False
+
+    def test_file_outside_basepath(
+        self, temp_dir: Path, outside_basepath_file: Path
+    ) -> None:
+        """Test file outside basepath is not excluded."""
         excludes = ["*"]
-        assert is_excluded(other_file, excludes, temp_dir) is False
+        assert is_excluded(outside_basepath_file, excludes, temp_dir) is False
+
+
+class TestIsExcludedStr:
+    """Tests for is_excluded_str function."""
+
+    def test_matches_path_variant(self, temp_dir: Path) -> None:
+        """Test that the string variant agrees with is_excluded."""
+        excludes = ["*.log", "build/", "/src/*.tmp"]
+        cases = [
+            (temp_dir / "a.log", False),
+            (temp_dir / "a.txt", False),
+            (temp_dir / "build", True),
+            (temp_dir / "src" / "x.tmp", False),
+            (temp_dir / "lib" / "x.tmp", False),
+        ]
+
+        for path, is_dir in cases:
+            assert is_excluded_str(
+                str(path), excludes, temp_dir, is_dir=is_dir
+            ) == is_excluded(path, excludes, temp_dir, is_dir=is_dir)
 
-        other_file.unlink()
+    def test_path_outside_basepath(self, temp_dir: Path) -> None:
+        """Test that paths outside the base are never excluded."""
+        other = str(temp_dir.parent / "elsewhere.log")
+
+        assert is_excluded_str(other, ["*.log"], temp_dir) is False
 
 
 class TestWalkDirectory:
@@ -111,6 +216,139 @@ class TestWalkDirectory:
         # Should include all files
         assert len(files) > 0
 
+    def test_walk_strs_matches_walk_directory(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test that the string variant returns the same files as strings."""
+        excludes = ["*.tmp"]
+
+        paths = walk_directory(sample_file_structure, excludes, sample_file_structure)
+        strs = walk_directory_strs(
+            sample_file_structure, excludes, sample_file_structure
+        )
+
+        assert all(isinstance(s, str) for s in strs)
+        assert [Path(s) for s in strs] == paths
+
+    def test_walk_parallel_matches_serial(self, sample_file_structure: Path) -> None:
+        """Test that listing with worker threads finds the same files."""
+        (sample_file_structure / "src" / ".gsupload_ignore").write_text("*.js\n")
+
+        serial = walk_directory(sample_file_structure, [], sample_file_structure)
+        parallel = walk_directory(
+            sample_file_structure, [], sample_file_structure, max_workers=4
+        )
+
+        assert sorted(parallel) == sorted(serial)
+        assert "app.js" not in [f.name for f in parallel]
+
+    def test_walk_includes_symlinked_files(self, sample_file_structure: Path) -> None:
+        """Test that symlinks to files are uploaded like regular files."""
+        (sample_file_structure / "link.html").symlink_to(
+            sample_file_structure / "index.html"
+        )
+
+        files = walk_directory(sample_file_structure, [], sample_file_structure)
+
+        assert sample_file_structure / "link.html" in files
+
+    def test_walk_applies_nested_ignore_file(self, sample_file_structure: Path) -> None:
+        """Test that a subdirectory's .gsupload_ignore applies below it only."""
+        src = sample_file_structure / "src"
+        (src / ".gsupload_ignore").write_text("*.js\n/components\n")
+        (sample_file_structure / "root.js").write_text("// root")
+
+        files = walk_directory(sample_file_structure, [], sample_file_structure)
+        filenames = [f.name for f in files]
+
+        assert "root.js" in filenames
+        assert "app.js" not in filenames
+        assert "header.js" not in filenames
+
+    def test_walk_does_not_list_excluded_directories(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that excluded directories are pruned, not listed and filtered."""
+        import os
+
+        listed = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.append(os.path.basename(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+
+        walk_directory(sample_file_structure, ["__pycache__/"], sample_file_structure)
+
+        assert "src" in listed
+        assert "__pycache__" not in listed
+
+    def test_walk_prunes_directories_from_nested_ignore_file(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that directories excluded by a nested ignore file aren't listed."""
+        import os
+
+        vendor = sample_file_structure / "src" / "vendor"
+        vendor.mkdir()
+        (vendor / "lib.js").write_text("// vendor")
+        (sample_file_structure / "src" / ".gsupload_ignore").write_text("vendor/\n")
+
+        listed = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.append(os.path.basename(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+
+        files = walk_directory(sample_file_structure, [], sample_file_structure)
+
+        assert "vendor" not in listed
+        assert "lib.js" not in [f.name for f in files]
+
+    def test_walk_takes_directory_type_from_scandir(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that directory-only patterns don't cost a stat() per entry."""
+        import os
+
+        def no_is_dir(*args, **kwargs):
+            raise AssertionError("type checked outside the scandir entry")
+
+        monkeypatch.setattr(Path, "is_dir", no_is_dir)
+        monkeypatch.setattr(os.path, "isdir", no_is_dir)
+
+        files = walk_directory(
+            sample_file_structure, ["__pycache__/", "assets/"], sample_file_structure
+        )
+
+        assert "module.pyc" not in [f.name for f in files]
+        assert "logo.png" not in [f.name for f in files]
+
+    def test_walk_matches_each_entry_once(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that no path, parent directories included, is matched twice."""
+        from gsupload import excludes as excludes_module
+
+        matched = []
+        real_matches = excludes_module._matches_excludes
+
+        def recording_matches(compiled, rel_path, name, is_dir):
+            matched.append(rel_path)
+            return real_matches(compiled, rel_path, name, is_dir)
+
+        monkeypatch.setattr(excludes_module, "_matches_excludes", recording_matches)
+
+        walk_directory(sample_file_structure, ["*.tmp"], sample_file_structure)
+
+        assert "src" in matched
+        assert len(matched) == len(set(matched))
+
 
 class TestCollectIgnorePatterns:
     """Tests for collect_ignore_patterns function."""
@@ -136,3 +374,109 @@ class TestCollectIgnorePatterns:
         patterns = collect_ignore_patterns(subdir, temp_dir)
 
         assert "*.log" in patterns
+
+    def test_walk_loads_each_ignore_file_once(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a walk reads every ignore file once, not once per file."""
+        from gsupload import excludes as excludes_module
+
+        (sample_file_structure / ".gsupload_ignore").write_text("*.tmp\n")
+        (sample_file_structure / "src" / ".gsupload_ignore").write_text("*.log\n")
+
+        loaded = []
+        real_load = excludes_module.load_ignore_file
+
+        def recording_load(path):
+            loaded.append(path)
+            return real_load(path)
+
+        monkeypatch.setattr(excludes_module, "load_ignore_file", recording_load)
+
+        walk_directory(sample_file_structure, [], sample_file_structure)
+
+        assert len(loaded) == len(set(loaded)) == 2
+
+
+class TestFindFilesByName:
+    """Tests for find_files_by_name function."""
+
+    def test_matches_names_at_any_depth(self, sample_file_structure: Path) -> None:
+        """Test that name patterns match files in subdirectories."""
+        results = find_files_by_name(
+            sample_file_structure, ["*.js"], [], sample_file_structure
+        )
+        names = sorted(Path(p).name for p in results["*.js"])
+
+        assert names == ["app.js", "header.js"]
+
+    def test_file_matching_several_patterns(self, sample_file_structure: Path) -> None:
+        """Test that a file is reported under every pattern it matches."""
+        results = find_files_by_name(
+            sample_file_structure, ["app.*", "*.js"], [], sample_file_structure
+        )
+
+        assert [Path(p).name for p in results["app.*"]] == ["app.js"]
+        assert sorted(Path(p).name for p in results["*.js"]) == [
+            "app.js",
+            "header.js",
+        ]
+
+    def test_prunes_excluded_directories(self, sample_file_structure: Path) -> None:
+        """Test that excluded directories are not descended into."""
+        vendor = sample_file_structure / "node_modules" / "lib"
+        vendor.mkdir(parents=True)
+        (vendor / "vendor.js").write_text("// vendor")
+
+        results = find_files_by_name(
+            sample_file_structure, ["*.js"], ["node_modules/"], sample_file_structure
+        )
+        names = sorted(Path(p).name for p in results["*.js"])
+
+        assert names == ["app.js", "header.js"]
+
+    def test_does_not_follow_symlinked_directories(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test that, like Path.rglob(), symlinked directories are skipped."""
+        (sample_file_structure / "linked").symlink_to(sample_file_structure / "src")
+
+        results = find_files_by_name(
+            sample_file_structure, ["*.js"], [], sample_file_structure
+        )
+
+        assert not [p for p in results["*.js"] if "linked" in Path(p).parts]
+
+    def test_parallel_listing_matches_serial(self, sample_file_structure: Path) -> None:
+        """Test that listing with worker threads finds the same files."""
+        serial = find_files_by_name(
+            sample_file_structure, ["*.js", "*.css"], [], sample_file_structure
+        )
+        parallel = find_files_by_name(
+            sample_file_structure,
+            ["*.js", "*.css"],
+            [],
+            sample_file_structure,
+            max_workers=4,
+        )
+
+        assert {k: sorted(v) for k, v in parallel.items()} == {
+            k: sorted(v) for k, v in serial.items()
+        }
+
+
+class TestShowIgnoredFiles:
+    """Tests for show_ignored_files function."""
+
+    def test_lists_ignored_items_in_tree_order(
+        self, sample_file_structure: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test ignored items are listed depth-first and not descended into."""
+        (sample_file_structure / "src" / "debug.log").write_text("log")
+
+        show_ignored_files(sample_file_structure, ["*.log", "__pycache__/"])
+        out = capsys.readouterr().out
+
+        listing = out.split("Found 2 ignored items:")[1]
+        assert listing.index("__pycache__") < listing.index("debug.log")
+        assert "module.pyc" not in listing
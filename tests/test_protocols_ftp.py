@@ -36,6 +36,161 @@ class TestListRemoteFtp:
         assert "index.html" in files
         assert "style.css" in files
 
+    def test_list_remote_ftp_falls_back_to_list(self) -> None:
+        """Test that servers without MLSD are scanned from one LIST per directory."""
+        import ftplib
+
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "LIST /var/www": [
+                "drwxr-xr-x   2 user group     4096 Jan 01 10:00 css",
+                "-rw-r--r--   1 user group      120 Jan 01 10:00 my page.html",
+                "lrwxrwxrwx   1 user group        9 Jan 01 10:00 home -> index.html",
+            ],
+            "LIST /var/www/css": ["01-01-24  10:00AM                  512 site.css"],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = ftplib.error_perm("500 Unknown command")
+        mock_ftp.retrlines.side_effect = lambda cmd, callback: [
+            callback(line) for line in listings[cmd]
+        ]
+        mock_ftp.pwd.return_value = "/"
+        mock_ftp.cwd.side_effect = ftplib.error_perm("550 Not a directory")
+
+        files = list_remote_ftp(mock_ftp, "/var/www")
+
+        assert files == {"my page.html", "home", "css/site.css"}
+        # Only the symlink needs a CWD probe
+        mock_ftp.cwd.assert_called_once_with("/var/www/home")
+
+    def test_list_remote_ftp_parses_list_without_group_column(self) -> None:
+        """Test that 8-column LIST lines (no group) are parsed."""
+        import ftplib
+
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "LIST /var/www": [
+                "total 12",
+                "drwxr-xr-x    2 user         4096 Jan  1 10:00 css",
+                "-rw-r--r--    1 user          120 Jan  1  2024 my page.html",
+                "lrwxrwxrwx    1 user            9 Jan  1 10:00 home -> index.html",
+            ],
+            "LIST /var/www/css": [
+                "-rw-r--r--    1 1000          512 Feb 29 09:15 site.css"
+            ],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = ftplib.error_perm("500 Unknown command")
+        mock_ftp.retrlines.side_effect = lambda cmd, callback: [
+            callback(line) for line in listings[cmd]
+        ]
+
+        mock_ftp.pwd.return_value = "/"
+        mock_ftp.cwd.side_effect = ftplib.error_perm("550 Not a directory")
+
+        files = list_remote_ftp(mock_ftp, "/var/www")
+
+        assert files == {"my page.html", "home", "css/site.css"}
+        mock_ftp.nlst.assert_not_called()
+        mock_ftp.cwd.assert_called_once_with("/var/www/home")
+
+    def test_list_remote_ftp_descends_into_symlinked_directories(self) -> None:
+        """Test that a LIST symlink to a directory is probed and listed."""
+        import ftplib
+
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "LIST /var/www": [
+                "drwxr-xr-x   2 user group     4096 Jan 01 10:00 public_html",
+                "lrwxrwxrwx   1 user group       11 Jan 01 10:00 www -> public_html",
+            ],
+            "LIST /var/www/public_html": [
+                "-rw-r--r--   1 user group      120 Jan 01 10:00 index.html",
+            ],
+            "LIST /var/www/www": [
+                "-rw-r--r--   1 user group      120 Jan 01 10:00 index.html",
+            ],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = ftplib.error_perm("500 Unknown command")
+        mock_ftp.retrlines.side_effect = lambda cmd, callback: [
+            callback(line) for line in listings[cmd]
+        ]
+        mock_ftp.pwd.return_value = "/"
+
+        files = list_remote_ftp(mock_ftp, "/var/www")
+
+        assert files == {"public_html/index.html", "www/index.html"}
+        probed = [c.args[0] for c in mock_ftp.cwd.call_args_list if c.args[0] != "/"]
+        assert probed == ["/var/www/www"]
+
+    def test_list_remote_ftp_probes_unparsed_list_entries(self) -> None:
+        """Test that entries in an unknown LIST format are probed, not dropped."""
+        import ftplib
+
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "LIST /var/www": [
+                "-rw-r--r--   1 user group      120 Jan 01 10:00 index.html",
+                "+i8388621.29609,m824255902,/,\tdocs",
+                "+i8388621.44468,m839956783,r,s10376,\tnotes.txt",
+            ],
+            "LIST /var/www/docs": [],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = ftplib.error_perm("500 Unknown command")
+        mock_ftp.retrlines.side_effect = lambda cmd, callback: [
+            callback(line) for line in listings[cmd]
+        ]
+        mock_ftp.pwd.return_value = "/"
+        mock_ftp.nlst.return_value = ["index.html", "docs", "notes.txt"]
+
+        def cwd(path: str) -> None:
+            if path == "/var/www/notes.txt":
+                raise ftplib.error_perm("550 Not a directory")
+
+        mock_ftp.cwd.side_effect = cwd
+
+        files = list_remote_ftp(mock_ftp, "/var/www")
+
+        assert files == {"index.html", "notes.txt"}
+        probed = [c.args[0] for c in mock_ftp.cwd.call_args_list if c.args[0] != "/"]
+        assert probed == ["/var/www/docs", "/var/www/notes.txt"]
+
+    def test_list_remote_ftp_parallel_connections(self) -> None:
+        """Test that extra connections list the same tree as a single one."""
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "/var/www": [("a", {"type": "dir"}), ("b", {"type": "dir"})],
+            "/var/www/a": [("one.txt", {"type": "file"}), ("c", {"type": "dir"})],
+            "/var/www/b": [("two.txt", {"type": "file"})],
+            "/var/www/a/c": [("three.txt", {"type": "file"})],
+        }
+
+        def make_conn() -> MagicMock:
+            conn = MagicMock()
+            conn.mlsd.side_effect = lambda path: listings[path]
+            return conn
+
+        extra = []
+
+        def connect() -> MagicMock:
+            conn = make_conn()
+            extra.append(conn)
+            return conn
+
+        files = list_remote_ftp(make_conn(), "/var/www", max_workers=3, connect=connect)
+
+        assert files == {"a/one.txt", "b/two.txt", "a/c/three.txt"}
+        assert len(extra) <= 2
+        for conn in extra:
+            conn.quit.assert_called_once()
+
 
 class TestUploadFtp:
     """Tests for upload_ftp function."""
@@ -69,3 +224,318 @@ class TestUploadFtp:
             # Verify connection was attempted
             mock_ftp.connect.assert_called_once()
             mock_ftp.login.assert_called_once()
+
+    def test_upload_ftp_reuses_connection_per_worker(self, temp_dir: Path) -> None:
+        """Test that one worker logs in once for several files."""
+        from gsupload.protocols.ftp import upload_ftp
+
+        files = []
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class:
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+
+            upload_ftp(host_config, files, temp_dir)
+
+            mock_ftp.login.assert_called_once()
+            assert mock_ftp.transfercmd.call_count == 3
+            mock_ftp.quit.assert_called_once()
+
+    def test_upload_ftp_parallel_workers_keep_their_connections(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that logins are bounded by workers, not by files."""
+        from gsupload.protocols.ftp import upload_ftp
+
+        files = []
+        for i in range(8):
+            (temp_dir / f"f{i}.txt").write_text(str(i))
+            files.append(temp_dir / f"f{i}.txt")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 2,
+        }
+
+        with patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class:
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+
+            upload_ftp(host_config, files, temp_dir)
+
+            assert 1 <= mock_ftp.login.call_count <= 2
+            assert mock_ftp.quit.call_count == mock_ftp.login.call_count
+            assert mock_ftp.transfercmd.call_count == 8
+
+    def test_upload_ftp_creates_each_directory_once(self, temp_dir: Path) -> None:
+        """Test that shared directories are created once, before uploading."""
+        import ftplib
+
+        from gsupload.protocols.ftp import upload_ftp
+
+        nested = temp_dir / "a" / "b"
+        nested.mkdir(parents=True)
+        files = [temp_dir / "a" / "x.txt", temp_dir / "a" / "y.txt", nested / "z.txt"]
+        for f in files:
+            f.write_text(f.name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 2,
+        }
+
+        with patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class:
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+            mock_ftp.cwd.side_effect = ftplib.error_perm("550 No such directory")
+
+            upload_ftp(host_config, files, temp_dir)
+
+            mock_ftp.cwd.assert_called_once_with("/srv")
+            created = [c.args[0] for c in mock_ftp.mkd.call_args_list]
+            assert created == ["/srv", "/srv/a", "/srv/a/b"]
+            assert mock_ftp.transfercmd.call_count == 3
+
+    def test_upload_ftp_data_timeout_keeps_connection(self, temp_dir: Path) -> None:
+        """Test that a stalled data transfer doesn't force a new login."""
+        import socket
+
+        from gsupload.protocols.ftp import upload_ftp
+
+        files = []
+        for name in ("a.txt", "b.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+            "data_timeout": 5,
+        }
+
+        with (
+            patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class,
+            patch("gsupload.protocols.ftp.time.sleep") as mock_sleep,
+        ):
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+            stalled, retried, ok = MagicMock(), MagicMock(), MagicMock()
+            stalled.sendall.side_effect = socket.timeout()
+            # Copy the data: the send buffer is reused for the next file
+            sent = []
+            ok.sendall.side_effect = lambda data: sent.append(("ok", bytes(data)))
+            retried.sendall.side_effect = lambda data: sent.append(
+                ("retry", bytes(data))
+            )
+            mock_ftp.transfercmd.side_effect = [stalled, retried, ok]
+
+            upload_ftp(host_config, files, temp_dir)
+
+            stalled.settimeout.assert_called_once_with(5)
+            stalled.close.assert_called()
+            mock_ftp.getresp.assert_called_once()
+            mock_ftp.login.assert_called_once()
+            mock_sleep.assert_called_once()
+            assert sent == [("retry", b"a.txt"), ("ok", b"b.txt")]
+
+    def test_upload_ftp_transfer_error_discards_connection(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that a failed transfer closes both sockets before retrying."""
+        from gsupload.protocols.ftp import upload_ftp
+
+        test_file = temp_dir / "a.txt"
+        test_file.write_text("a")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class,
+            patch("gsupload.protocols.ftp.time.sleep"),
+        ):
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+            reset, ok = MagicMock(), MagicMock()
+            reset.sendall.side_effect = ConnectionResetError(104, "Reset")
+            mock_ftp.transfercmd.side_effect = [reset, ok]
+
+            uploaded = upload_ftp(host_config, [test_file], temp_dir)
+
+            assert uploaded == ["/var/www/a.txt"]
+            reset.close.assert_called_once()
+            mock_ftp.getresp.assert_not_called()
+            # The control connection waiting on the aborted STOR is replaced
+            assert mock_ftp.login.call_count == 2
+            assert mock_ftp.close.call_count >= 1
+            ok.sendall.assert_called_once()
+
+    def test_upload_ftp_does_not_retry_permanent_errors(self, temp_dir: Path) -> None:
+        """Test that a 5xx refusal is reported without retrying."""
+        import ftplib
+
+        from gsupload.protocols.ftp import upload_ftp
+
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class,
+            patch("gsupload.protocols.ftp.time.sleep") as mock_sleep,
+        ):
+            mock_ftp = mock_ftp_class.return_value
+            mock_ftp.transfercmd.side_effect = ftplib.error_perm("553 Not allowed")
+
+            uploaded = upload_ftp(host_config, [test_file], temp_dir)
+
+            assert uploaded == []
+            mock_ftp.transfercmd.assert_called_once()
+            mock_sleep.assert_not_called()
+
+    def test_upload_ftp_sends_megabyte_blocks(self, temp_dir: Path) -> None:
+        """Test that file data is sent in 1 MiB blocks that reassemble."""
+        from gsupload.protocols.ftp import upload_ftp
+
+        content = bytes(range(256)) * (10 * 1024)  # 2.5 MiB
+        test_file = temp_dir / "big.bin"
+        test_file.write_bytes(content)
+        sent = []
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class:
+            conn = mock_ftp_class.return_value.transfercmd.return_value
+            conn.sendall.side_effect = lambda data: sent.append(bytes(data))
+
+            upload_ftp(host_config, [test_file], temp_dir)
+
+        assert [len(block) for block in sent] == [1 << 20, 1 << 20, 1 << 19]
+        assert b"".join(sent) == content
+
+    def test_upload_ftp_sends_largest_files_first(self, temp_dir: Path) -> None:
+        """Test that uploads are dispatched in decreasing size order."""
+        from gsupload.protocols.ftp import upload_ftp
+
+        sizes = {"small.txt": 10, "large.bin": 5000, "medium.css": 500}
+        files = []
+        for name, size in sizes.items():
+            (temp_dir / name).write_bytes(b"x" * size)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/var/www",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.ftp.ftplib.FTP") as mock_ftp_class:
+            mock_ftp = MagicMock()
+            mock_ftp_class.return_value = mock_ftp
+
+            upload_ftp(host_config, files, temp_dir)
+
+            stored = [c.args[0] for c in mock_ftp.transfercmd.call_args_list]
+            assert stored == [
+                "STOR /var/www/large.bin",
+                "STOR /var/www/medium.css",
+                "STOR /var/www/small.txt",
+            ]
+
+
+class TestListRemoteFtpDirs:
+    """Tests for list_remote_ftp_dirs function."""
+
+    def test_lists_only_requested_directories(self) -> None:
+        """Test that only the given directories are listed, without recursion."""
+        from gsupload.protocols.ftp import list_remote_ftp_dirs
+
+        listings = {
+            "/var/www": [("index.html", {"type": "file"}), ("css", {"type": "dir"})],
+            "/var/www/js": [("app.js", {"type": "file"})],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = lambda path: listings[path]
+
+        files = list_remote_ftp_dirs(mock_ftp, "/var/www/", ["", "js", "js"])
+
+        assert files == {"index.html", "js/app.js"}
+        assert mock_ftp.mlsd.call_count == 2
+
+    def test_lists_directories_over_extra_connections(self) -> None:
+        """Test that target directories are spread over extra connections."""
+        from gsupload.protocols.ftp import list_remote_ftp_dirs
+
+        listings = {
+            "/var/www/css": [("site.css", {"type": "file"})],
+            "/var/www/js": [("app.js", {"type": "file"})],
+            "/var/www/img": [("logo.png", {"type": "file"})],
+        }
+        conns = [MagicMock(), MagicMock(), MagicMock()]
+        for conn in conns:
+            conn.mlsd.side_effect = lambda path: listings[path]
+        connect = MagicMock(side_effect=conns[1:])
+
+        files = list_remote_ftp_dirs(
+            conns[0], "/var/www", ["css", "js", "img"], max_workers=2, connect=connect
+        )
+
+        assert files == {"css/site.css", "js/app.js", "img/logo.png"}
+        assert sum(c.mlsd.call_count for c in conns) == 3
+        assert connect.call_count <= 1
+        conns[0].quit.assert_not_called()
+
+    def test_paths_relative_to_root_basepath(self) -> None:
+        """Test that a "/" remote_basepath yields clean relative paths."""
+        from gsupload.protocols.ftp import list_remote_ftp
+
+        listings = {
+            "/": [("index.html", {"type": "file"}), ("js", {"type": "dir"})],
+            "/js": [("app.js", {"type": "file"})],
+        }
+        mock_ftp = MagicMock()
+        mock_ftp.mlsd.side_effect = lambda path: listings[path]
+
+        files = list_remote_ftp(mock_ftp, "/")
+
+        assert files == {"index.html", "js/app.js"}
@@ -3,9 +3,12 @@ Tests for gsupload.protocols.sftp module.
 """
 
 from pathlib import Path
+from types import SimpleNamespace
 from typing import Any, Dict
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 
 class TestListRemoteSftp:
     """Tests for list_remote_sftp function."""
@@ -15,7 +18,7 @@ class TestListRemoteSftp:
         from gsupload.protocols.sftp import list_remote_sftp
 
         mock_sftp = MagicMock()
-        mock_sftp.listdir_attr.return_value = []
+        mock_sftp.listdir_iter.return_value = []
         mock_sftp.get_channel.return_value = None
 
         files = list_remote_sftp(mock_sftp, "/home/user")
@@ -28,16 +31,11 @@ class TestListRemoteSftp:
 
         mock_sftp = MagicMock()
 
-        # Create mock file attributes
-        mock_file1 = MagicMock()
-        mock_file1.filename = "index.html"
-        mock_file1.st_mode = 0o100644  # Regular file
-
-        mock_file2 = MagicMock()
-        mock_file2.filename = "style.css"
-        mock_file2.st_mode = 0o100644  # Regular file
+        # Listing entries are plain attribute stubs (regular files)
+        mock_file1 = SimpleNamespace(filename="index.html", st_mode=0o100644)
+        mock_file2 = SimpleNamespace(filename="style.css", st_mode=0o100644)
 
-        mock_sftp.listdir_attr.return_value = [mock_file1, mock_file2]
+        mock_sftp.listdir_iter.return_value = [mock_file1, mock_file2]
         mock_sftp.get_channel.return_value = None
 
         files = list_remote_sftp(mock_sftp, "/home/user")
@@ -45,6 +43,25 @@ class TestListRemoteSftp:
         assert "index.html" in files
         assert "style.css" in files
 
+    def test_list_remote_sftp_stats_entry_without_mode(self) -> None:
+        """Test that an entry missing its mode is typed by stat, not listdir."""
+        from gsupload.protocols.sftp import list_remote_sftp
+
+        mock_sftp = MagicMock()
+
+        mock_entry = SimpleNamespace(filename="assets", st_mode=None)
+
+        mock_sftp.listdir_iter.side_effect = [[mock_entry], []]
+        mock_sftp.stat.return_value = SimpleNamespace(st_mode=0o040755)  # Directory
+        mock_sftp.get_channel.return_value = None
+
+        files = list_remote_sftp(mock_sftp, "/home/user")
+
+        assert files == set()
+        mock_sftp.stat.assert_called_once_with("/home/user/assets")
+        mock_sftp.listdir.assert_not_called()
+        assert mock_sftp.listdir_iter.call_count == 2
+
 
 class TestUploadSftp:
     """Tests for upload_sftp function."""
@@ -78,6 +95,295 @@ class TestUploadSftp:
             mock_ssh.connect.assert_called_once()
             mock_ssh.open_sftp.assert_called_once()
 
+    def test_upload_sftp_reconnects_after_dropped_session(self, temp_dir: Path) -> None:
+        """Test that a worker reuses its session until the transport dies."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class,
+            patch("gsupload.protocols.sftp.time.sleep"),
+        ):
+            mock_ssh = MagicMock()
+            mock_ssh_class.return_value = mock_ssh
+            mock_sftp = MagicMock()
+            mock_ssh.open_sftp.return_value = mock_sftp
+            mock_ssh.get_transport.return_value.is_active.return_value = False
+            mock_sftp.open.side_effect = [
+                MagicMock(),
+                EOFError(),
+                MagicMock(),
+                MagicMock(),
+            ]
+
+            upload_sftp(host_config, files, temp_dir)
+
+            # b.txt is retried once on the new connection
+            assert mock_sftp.open.call_count == 4
+            assert mock_ssh.connect.call_count == 2
+            assert mock_ssh.close.call_count == 2
+
+    def test_upload_sftp_does_not_retry_permission_errors(self, temp_dir: Path) -> None:
+        """Test that only transient errors are retried, with a backoff."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        for name in ("a.txt", "b.txt"):
+            (temp_dir / name).write_text(name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        def open_remote(path: str, mode: str) -> MagicMock:
+            if path.endswith("a.txt"):
+                raise PermissionError(13, "Permission denied")
+            raise EOFError()
+
+        with (
+            patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class,
+            patch("gsupload.protocols.sftp.time.sleep") as mock_sleep,
+        ):
+            mock_sftp = mock_ssh_class.return_value.open_sftp.return_value
+            mock_sftp.open.side_effect = open_remote
+
+            upload_sftp(host_config, [temp_dir / "a.txt", temp_dir / "b.txt"], temp_dir)
+
+            opened = [c.args[0] for c in mock_sftp.open.call_args_list]
+            assert sorted(opened) == ["/srv/a.txt"] + ["/srv/b.txt"] * 3
+            assert mock_sleep.call_count == 2
+
+    def test_upload_sftp_workers_share_one_connection(self, temp_dir: Path) -> None:
+        """Test that parallel workers open channels on a single SSH connection."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.txt", "b.txt", "c.txt", "d.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 3,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+
+            upload_sftp(host_config, files, temp_dir)
+
+            mock_ssh.connect.assert_called_once()
+            mock_ssh.close.assert_called_once()
+            assert 1 <= mock_ssh.open_sftp.call_count <= 3
+
+    def test_upload_sftp_caps_channels_per_connection(self, temp_dir: Path) -> None:
+        """Test that workers beyond channels_per_connection get a new connection."""
+        import threading
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.txt", "b.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 2,
+            "channels_per_connection": 1,
+        }
+        # Both workers must hold a channel at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def open_remote(path: str, mode: str) -> MagicMock:
+            barrier.wait()
+            return MagicMock()
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            clients = [MagicMock(), MagicMock()]
+            mock_ssh_class.side_effect = clients
+            for client in clients:
+                client.open_sftp.return_value.open.side_effect = open_remote
+
+            upload_sftp(host_config, files, temp_dir)
+
+            for client in clients:
+                client.connect.assert_called_once()
+                client.open_sftp.assert_called_once()
+                client.close.assert_called_once()
+
+    def test_upload_sftp_connects_without_blocking_other_workers(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that SSH handshakes for new connections can run concurrently."""
+        import threading
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.txt", "b.txt", "c.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 3,
+            "channels_per_connection": 1,
+        }
+        # All three workers hold a channel at once, each on its own
+        # connection. The bootstrap connects alone; then the two workers
+        # without it are mid-handshake at once, which a lock held across
+        # connect() would prevent.
+        open_barrier = threading.Barrier(3, timeout=5)
+        connect_barrier = threading.Barrier(2, timeout=5)
+        connects = iter([lambda: None] + [connect_barrier.wait] * 2)
+
+        def connect(*args: Any, **kwargs: Any) -> None:
+            next(connects)()
+
+        def open_remote(path: str, mode: str) -> MagicMock:
+            open_barrier.wait()
+            return MagicMock()
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            clients = [MagicMock(), MagicMock(), MagicMock()]
+            mock_ssh_class.side_effect = clients
+            for client in clients:
+                client.connect.side_effect = connect
+                client.open_sftp.return_value.open.side_effect = open_remote
+
+            upload_sftp(host_config, files, temp_dir)
+
+            assert not connect_barrier.broken
+            for client in clients:
+                client.connect.assert_called_once()
+
+    def test_upload_sftp_closes_client_when_connect_fails(self, temp_dir: Path) -> None:
+        """Test that a failed connect doesn't leave a half-open client behind."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        (temp_dir / "a.txt").write_text("a")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class,
+            patch("gsupload.protocols.sftp.time.sleep"),
+        ):
+            mock_ssh = mock_ssh_class.return_value
+            mock_ssh.connect.side_effect = OSError("Connection refused")
+
+            upload_sftp(host_config, [temp_dir / "a.txt"], temp_dir)
+
+            assert mock_ssh.connect.call_count >= 1
+            assert mock_ssh.close.call_count == mock_ssh.connect.call_count
+
+    def test_upload_sftp_opens_connection_when_channel_refused(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that a refused channel moves the worker to a new connection."""
+        import threading
+
+        import paramiko
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.txt", "b.txt"):
+            (temp_dir / name).write_text(name)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 2,
+        }
+        barrier = threading.Barrier(2, timeout=5)
+
+        def open_remote(path: str, mode: str) -> MagicMock:
+            barrier.wait()
+            return MagicMock()
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            first, second = MagicMock(), MagicMock()
+            mock_ssh_class.side_effect = [first, second]
+            sftp = MagicMock()
+            sftp.open.side_effect = open_remote
+            first.open_sftp.side_effect = [
+                sftp,
+                paramiko.ChannelException(1, "Administratively prohibited"),
+            ]
+            second.open_sftp.return_value = sftp
+
+            upload_sftp(host_config, files, temp_dir)
+
+            assert first.open_sftp.call_count == 2
+            second.open_sftp.assert_called_once()
+            assert sorted(c.args[0] for c in sftp.open.call_args_list) == [
+                "/srv/a.txt",
+                "/srv/b.txt",
+            ]
+
+    def test_upload_sftp_skips_compression_for_compressed_media(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that compression is off when most bytes are already compressed."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        (temp_dir / "photo.jpg").write_bytes(b"x" * 4096)
+        (temp_dir / "index.html").write_text("<html></html>")
+        files = [temp_dir / "photo.jpg", temp_dir / "index.html"]
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+
+            upload_sftp(host_config, files, temp_dir)
+            assert mock_ssh.connect.call_args[1]["compress"] is False
+
+            mock_ssh.connect.reset_mock()
+            upload_sftp({**host_config, "compress": True}, files, temp_dir)
+            assert mock_ssh.connect.call_args[1]["compress"] is True
+
     def test_upload_sftp_with_key_file(self, temp_dir: Path) -> None:
         """Test SFTP upload with key file authentication."""
         from gsupload.protocols.sftp import upload_sftp
@@ -106,3 +412,384 @@ class TestUploadSftp:
             # Verify key_filename was passed
             call_kwargs = mock_ssh.connect.call_args[1]
             assert call_kwargs.get("key_filename") == "/path/to/key"
+
+    def test_upload_sftp_writes_pipelined_chunks(self, temp_dir: Path) -> None:
+        """Test that file contents are written through a pipelined remote file."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_sftp = mock_ssh_class.return_value.open_sftp.return_value
+            remote = mock_sftp.open.return_value.__enter__.return_value
+
+            uploaded = upload_sftp(host_config, [test_file], temp_dir)
+
+            assert uploaded == ["/srv/test.txt"]
+            mock_sftp.open.assert_called_once_with("/srv/test.txt", "wb")
+            remote.set_pipelined.assert_called_once_with(True)
+            remote.write.assert_called_once_with(b"test content")
+
+    def test_upload_sftp_splits_large_files(self, temp_dir: Path) -> None:
+        """Test that large files are written as byte ranges that reassemble."""
+        import io
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        content = bytes(range(256)) * 4
+        test_file = temp_dir / "big.bin"
+        test_file.write_bytes(content)
+        writes = []
+
+        class FakeRemoteFile(io.BytesIO):
+            def set_pipelined(self, pipelined: bool) -> None:
+                pass
+
+            def write(self, data: bytes) -> int:  # type: ignore[override]
+                writes.append((self.tell(), bytes(data)))
+                return super().write(data)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 3,
+            "split_threshold_mb": 0.0005,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_sftp = mock_ssh_class.return_value.open_sftp.return_value
+            mock_sftp.open.side_effect = lambda path, mode: FakeRemoteFile()
+
+            upload_sftp(host_config, [test_file], temp_dir)
+
+        assert b"".join(data for _, data in sorted(writes)) == content
+        modes = [c.args[1] for c in mock_sftp.open.call_args_list]
+        assert modes == ["wb", "r+b", "r+b", "r+b"]
+        # Parts run on connections of their own, all closed at the end
+        mock_ssh = mock_ssh_class.return_value
+        assert 2 <= mock_ssh.connect.call_count <= 4
+        assert mock_ssh.close.call_count == mock_ssh.connect.call_count
+
+    def test_upload_sftp_bounds_parts_across_files(self, temp_dir: Path) -> None:
+        """Test that parts of concurrent large files share max_workers connections."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        files = []
+        for name in ("a.bin", "b.bin"):
+            (temp_dir / name).write_bytes(b"x" * 1024)
+            files.append(temp_dir / name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 2,
+            "split_threshold_mb": 0.0005,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            upload_sftp(host_config, files, temp_dir)
+
+            modes = [c.args[1] for c in mock_sftp.open.call_args_list]
+            assert sorted(modes) == ["r+b"] * 4 + ["wb"] * 2
+            # One connection for the workers, at most two for the parts
+            assert mock_ssh.connect.call_count <= 3
+            assert mock_ssh.close.call_count == mock_ssh.connect.call_count
+
+    def test_upload_sftp_batches_small_files_into_tar(self, temp_dir: Path) -> None:
+        """Test that small files are streamed as one tar and large ones put."""
+        import io
+        import tarfile
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        (temp_dir / "src").mkdir()
+        (temp_dir / "a.txt").write_text("a")
+        (temp_dir / "src" / "b.txt").write_text("b")
+        (temp_dir / "big.bin").write_bytes(b"x" * 4096)
+        files = [temp_dir / "a.txt", temp_dir / "src" / "b.txt", temp_dir / "big.bin"]
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+            "batch_threshold_kb": 1,
+        }
+
+        stream = io.BytesIO()
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+            stdin, stdout, stderr = MagicMock(), MagicMock(), MagicMock()
+            stdin.write.side_effect = stream.write
+            stdout.channel.recv_exit_status.return_value = 0
+            mock_ssh.exec_command.return_value = (stdin, stdout, stderr)
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            upload_sftp(host_config, files, temp_dir)
+
+        # The tar stream is sent before the directory listing
+        tar_call = mock_ssh.exec_command.call_args_list[0]
+        assert tar_call.args == ("tar -xmf - -C /srv/www",)
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            members = list(tar)
+        assert sorted(m.name for m in members) == ["a.txt", "src/b.txt"]
+        assert {m.mode for m in members} == {0o644}
+        uploaded = [c.args[0] for c in mock_sftp.open.call_args_list]
+        assert uploaded == ["/srv/www/big.bin"]
+
+    def test_upload_sftp_tar_batch_falls_back_on_failure(
+        self, temp_dir: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test that a failed tar extraction re-sends the files one by one."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        (temp_dir / "a.txt").write_text("a")
+        (temp_dir / "b.txt").write_text("b")
+        files = [temp_dir / "a.txt", temp_dir / "b.txt"]
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+            "batch_threshold_kb": 1,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+            stdin, stdout, stderr = MagicMock(), MagicMock(), MagicMock()
+            stdout.channel.recv_exit_status.return_value = 2
+            stderr.read.return_value = b"tar: command not found"
+            mock_ssh.exec_command.return_value = (stdin, stdout, stderr)
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            uploaded = upload_sftp(host_config, files, temp_dir)
+
+        assert "Tar batch failed (tar: command not found)" in capsys.readouterr().err
+        opened = sorted(c.args[0] for c in mock_sftp.open.call_args_list)
+        assert opened == ["/srv/www/a.txt", "/srv/www/b.txt"]
+        assert sorted(uploaded) == opened
+
+    def test_upload_sftp_tar_batch_follows_symlinks(self, temp_dir: Path) -> None:
+        """Test that a symlinked file is sent as its contents, not as a link."""
+        import io
+        import tarfile
+
+        from gsupload.protocols.sftp import upload_sftp
+
+        target = temp_dir / "shared" / "real.txt"
+        target.parent.mkdir()
+        target.write_text("real contents")
+        (temp_dir / "link.txt").symlink_to(target)
+        (temp_dir / "a.txt").write_text("a")
+        files = [temp_dir / "a.txt", temp_dir / "link.txt"]
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+            "batch_threshold_kb": 1,
+        }
+
+        stream = io.BytesIO()
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+            stdin, stdout, stderr = MagicMock(), MagicMock(), MagicMock()
+            stdin.write.side_effect = stream.write
+            stdout.channel.recv_exit_status.return_value = 0
+            mock_ssh.exec_command.return_value = (stdin, stdout, stderr)
+
+            upload_sftp(host_config, files, temp_dir)
+
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            members = {}
+            for member in tar:
+                extracted = tar.extractfile(member)
+                members[member.name] = (
+                    member.isfile(),
+                    extracted.read() if extracted else None,
+                )
+        assert members["link.txt"] == (True, b"real contents")
+
+    def test_upload_sftp_skips_stat_below_missing_dir(self, temp_dir: Path) -> None:
+        """Test that descendants of a missing directory are created without probing."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        nested = temp_dir / "a" / "b"
+        nested.mkdir(parents=True)
+        test_file = nested / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "port": 22,
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = MagicMock()
+            mock_ssh_class.return_value = mock_ssh
+            mock_sftp = MagicMock()
+            mock_ssh.open_sftp.return_value = mock_sftp
+            mock_sftp.stat.side_effect = IOError("No such file")
+
+            upload_sftp(host_config, [test_file], temp_dir)
+
+            # Only the first missing component is probed
+            mock_sftp.stat.assert_called_once_with("/srv")
+            created = [c.args[0] for c in mock_sftp.mkdir.call_args_list]
+            assert created == ["/srv", "/srv/a", "/srv/a/b"]
+
+    def test_upload_sftp_probes_each_directory_once(self, temp_dir: Path) -> None:
+        """Test that directories shared by many files are probed only once."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        nested = temp_dir / "a" / "b"
+        nested.mkdir(parents=True)
+        files = [temp_dir / "a" / "x.txt", temp_dir / "a" / "y.txt", nested / "z.txt"]
+        for f in files:
+            f.write_text(f.name)
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "port": 22,
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv",
+            "max_workers": 2,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = MagicMock()
+            mock_ssh_class.return_value = mock_ssh
+            mock_sftp = MagicMock()
+            mock_ssh.open_sftp.return_value = mock_sftp
+
+            upload_sftp(host_config, files, temp_dir)
+
+            probed = [c.args[0] for c in mock_sftp.stat.call_args_list]
+            assert probed == ["/srv", "/srv/a", "/srv/a/b"]
+            mock_sftp.mkdir.assert_not_called()
+
+    def test_upload_sftp_seeds_directories_from_find(self, temp_dir: Path) -> None:
+        """Test that one remote find replaces per-directory stat() probes."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        nested = temp_dir / "a" / "b"
+        nested.mkdir(parents=True)
+        test_file = nested / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class,
+            patch("gsupload.protocols.sftp._FIND_MIN_DIRS", 1),
+        ):
+            mock_ssh = mock_ssh_class.return_value
+            stdout = MagicMock()
+            stdout.read.return_value = b"/srv/www\n/srv/www/a\n/srv/www/img\n"
+            stdout.channel.recv_exit_status.return_value = 0
+            mock_ssh.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            upload_sftp(host_config, [test_file], temp_dir)
+
+            command = mock_ssh.exec_command.call_args[0][0]
+            assert "find /srv/www -maxdepth 2 -type d" in command
+            mock_sftp.stat.assert_not_called()
+            mock_sftp.mkdir.assert_called_once_with("/srv/www/a/b")
+
+    def test_upload_sftp_probes_few_directories_without_find(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that a small upload doesn't run a remote find."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+        }
+
+        with patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class:
+            mock_ssh = mock_ssh_class.return_value
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            upload_sftp(host_config, [test_file], temp_dir)
+
+            mock_ssh.exec_command.assert_not_called()
+            probed = [c.args[0] for c in mock_sftp.stat.call_args_list]
+            assert probed == ["/srv", "/srv/www"]
+
+    def test_upload_sftp_probes_when_find_fails(self, temp_dir: Path) -> None:
+        """Test that a find exiting non-zero falls back to stat() probes."""
+        from gsupload.protocols.sftp import upload_sftp
+
+        nested = temp_dir / "a"
+        nested.mkdir()
+        test_file = nested / "test.txt"
+        test_file.write_text("test content")
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "password": "pass",
+            "remote_basepath": "/srv/www",
+            "max_workers": 1,
+        }
+
+        with (
+            patch("gsupload.protocols.sftp.paramiko.SSHClient") as mock_ssh_class,
+            patch("gsupload.protocols.sftp._FIND_MIN_DIRS", 1),
+        ):
+            mock_ssh = mock_ssh_class.return_value
+            stdout = MagicMock()
+            # Partial output from a find that hit an unreadable directory
+            stdout.read.return_value = b"/srv/www\n"
+            stdout.channel.recv_exit_status.return_value = 1
+            mock_ssh.exec_command.return_value = (MagicMock(), stdout, MagicMock())
+            mock_sftp = mock_ssh.open_sftp.return_value
+
+            upload_sftp(host_config, [test_file], temp_dir)
+
+            mock_ssh.exec_command.assert_called_once()
+            probed = [c.args[0] for c in mock_sftp.stat.call_args_list]
+            assert probed == ["/srv", "/srv/www", "/srv/www/a"]
+            mock_sftp.mkdir.assert_not_called()
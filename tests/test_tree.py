@@ -3,7 +3,7 @@ Tests for gsupload.tree module.
 """
 
 from pathlib import Path
-from typing import Any, Dict, Set
+from typing import Any, Dict
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -13,13 +13,18 @@ class TestDisplayTreeComparison:
     """Tests for display_tree_comparison function."""
 
     def test_display_tree_handles_connection_error(
-        self, temp_dir: Path, capsys: pytest.CaptureFixture
+        self,
+        temp_dir: Path,
+        capsys: pytest.CaptureFixture,
+        monkeypatch: pytest.MonkeyPatch,
     ) -> None:
         """Test that connection errors are handled gracefully."""
         import ftplib
 
         from gsupload.tree import display_tree_comparison
 
+        monkeypatch.delenv("GSUPLOAD_DEBUG", raising=False)
+
         # Create test file
         test_file = temp_dir / "test.txt"
         test_file.touch()
@@ -47,17 +52,271 @@ class TestDisplayTreeComparison:
                         "test-binding",
                     )
 
-    def test_display_tree_categorizes_files(self) -> None:
-        """Test that files are correctly categorized."""
-        # This is more of an integration test concept
-        # Testing the categorization logic
-        local_rel_paths: Set[str] = {"new.html", "existing.css", "local_only.js"}
-        remote_files: Set[str] = {"existing.css", "remote_only.txt"}
+        err = capsys.readouterr().err
+        assert "Exception: Connection failed" in err
+        assert "Traceback" not in err
+
+    def test_display_tree_categorizes_files(self, temp_dir: Path) -> None:
+        """Test that local files are split into new and overwrite in one pass."""
+        from gsupload.tree import display_tree_comparison
+
+        local_files = [temp_dir / n for n in ("new.html", "existing.css", "a.js")]
+        remote_files = {"existing.css", "remote_only.txt", "sub/other.txt"}
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "remote_basepath": "/var/www",
+        }
+
+        with patch("gsupload.tree._list_remote_files", return_value=remote_files):
+            complete = display_tree_comparison(
+                host_config,
+                local_files,
+                temp_dir,
+                "ftp",
+                "test-binding",
+                summary_only=True,
+                complete_tree=True,
+            )
+            changes_only = display_tree_comparison(
+                host_config,
+                local_files,
+                temp_dir,
+                "ftp",
+                "test-binding",
+                summary_only=True,
+            )
+
+        assert complete == (2, 1, 2)
+        # Remote-only files are only counted for complete trees
+        assert changes_only == (2, 1, 0)
+
+    def test_complete_listing_runs_on_calling_thread(self, temp_dir: Path) -> None:
+        """Test that the listing isn't moved off-thread, where Ctrl-C can't stop it."""
+        import threading
+
+        from gsupload.tree import display_tree_comparison
+
+        (temp_dir / "index.html").touch()
+        host_config: Dict[str, Any] = {
+            "hostname": "ftp.example.com",
+            "username": "user",
+            "remote_basepath": "/var/www",
+        }
+        listing_threads = []
+
+        def fake_listing(*args: Any) -> set:
+            listing_threads.append(threading.current_thread())
+            return {"index.html"}
+
+        with patch("gsupload.tree._list_remote_files", side_effect=fake_listing):
+            result = display_tree_comparison(
+                host_config,
+                [temp_dir / "index.html"],
+                temp_dir,
+                "ftp",
+                "test-binding",
+                summary_only=True,
+                complete_tree=True,
+            )
+
+        assert result == (0, 1, 0)
+        assert listing_threads == [threading.main_thread()]
+
+
+class TestDisplayTree:
+    """Tests for the _display_tree renderer."""
+
+    def test_directories_listed_before_files(
+        self, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test that directories sort before files at each level."""
+        from gsupload.tree import _display_tree
+
+        _display_tree({"b.txt", "a/c.txt"}, set(), set(), Path("/l"), "/r", 20, False)
+        out = capsys.readouterr().out
+
+        assert "├── a/\n│   └── c.txt [NEW]\n└── b.txt [NEW]" in out
+
+    def test_depth_limit_counts_hidden_files(
+        self, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test that files beyond max_depth are counted, not displayed."""
+        from gsupload.tree import _display_tree
+
+        _display_tree(
+            {"a/b/c.txt", "a/b/d/e.txt"}, set(), set(), Path("/l"), "/r", 1, False
+        )
+        out = capsys.readouterr().out
+
+        assert "c.txt" not in out
+        assert "(2 more files beyond depth 1)" in out
+
+    def test_deep_tree_does_not_recurse(self, capsys: pytest.CaptureFixture) -> None:
+        """Test that trees deeper than the recursion limit still render."""
+        import sys
+
+        from gsupload.tree import _display_tree
+
+        depth = sys.getrecursionlimit() + 100
+        deep_path = "/".join(["d"] * depth) + "/leaf.txt"
+
+        _display_tree({deep_path}, set(), set(), Path("/l"), "/r", depth, False)
+        _display_tree({deep_path}, set(), set(), Path("/l"), "/r", 1, False)
+        out = capsys.readouterr().out
+
+        assert "leaf.txt [NEW]" in out
+        assert "(1 more files beyond depth 1)" in out
+
+
+class TestRemoteListingCache:
+    """Tests for the on-disk remote listing cache."""
+
+    def test_complete_listing_reused_until_invalidated(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a cached listing skips the scan until it is discarded."""
+        from gsupload.tree import display_tree_comparison, invalidate_remote_listing
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir / "cache"))
+        (temp_dir / "index.html").touch()
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "remote_basepath": "/srv",
+            "cache_ttl": 300,
+        }
+
+        def compare(**kwargs: Any) -> Any:
+            return display_tree_comparison(
+                host_config,
+                [temp_dir / "index.html"],
+                temp_dir,
+                "sftp",
+                "test-binding",
+                summary_only=True,
+                complete_tree=True,
+                **kwargs,
+            )
+
+        with patch(
+            "gsupload.tree._list_remote_files", return_value={"index.html", "a.css"}
+        ) as mock_list:
+            assert compare() == (0, 1, 1)
+            assert compare() == (0, 1, 1)
+            assert mock_list.call_count == 1
+
+            compare(use_cache=False)
+            assert mock_list.call_count == 2
+
+            invalidate_remote_listing(host_config, "sftp")
+            compare()
+            assert mock_list.call_count == 3
+
+    def test_uploaded_files_are_added_to_cached_listing(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a preview, upload, preview cycle reuses the listing."""
+        from gsupload.tree import (
+            _listing_cache_file,
+            display_tree_comparison,
+            invalidate_remote_listing,
+            update_remote_listing,
+        )
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir / "cache"))
+        (temp_dir / "css").mkdir()
+        (temp_dir / "index.html").touch()
+        (temp_dir / "css" / "new.css").touch()
+        local_files = [temp_dir / "index.html", temp_dir / "css" / "new.css"]
+
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "remote_basepath": "/srv/",
+            "cache_ttl": 300,
+        }
+
+        def compare() -> Any:
+            return display_tree_comparison(
+                host_config,
+                local_files,
+                temp_dir,
+                "sftp",
+                "test-binding",
+                summary_only=True,
+                complete_tree=True,
+            )
+
+        with patch(
+            "gsupload.tree._list_remote_files", return_value={"index.html"}
+        ) as mock_list:
+            assert compare() == (1, 1, 0)
+            cache_file = _listing_cache_file(host_config, "sftp")
+            scanned_at = cache_file.stat().st_mtime
+
+            listing = invalidate_remote_listing(host_config, "sftp")
+            assert listing is not None
+            assert not cache_file.exists()
+            update_remote_listing(
+                host_config, "sftp", listing, ["/srv/index.html", "/srv/css/new.css"]
+            )
+
+            assert compare() == (0, 2, 0)
+            assert mock_list.call_count == 1
+            # The listing still ages from the scan, not from the upload
+            assert cache_file.stat().st_mtime == pytest.approx(scanned_at, abs=0.01)
+
+    def test_expired_listing_is_not_written_back(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that invalidating without a fresh listing returns nothing."""
+        from gsupload.tree import invalidate_remote_listing
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(temp_dir / "cache"))
+        host_config: Dict[str, Any] = {
+            "hostname": "sftp.example.com",
+            "username": "user",
+            "remote_basepath": "/srv",
+            "cache_ttl": 300,
+        }
+
+        assert invalidate_remote_listing(host_config, "sftp") is None
+
+
+class TestLocalRelPaths:
+    """Tests for local relative path extraction."""
+
+    def test_paths_outside_basepath_are_skipped(self, temp_dir: Path) -> None:
+        """Test that only files under local_basepath are yielded."""
+        from gsupload.tree import _iter_local_rel_paths
+
+        base = temp_dir / "site"
+        files = [
+            base / "index.html",
+            base / "css" / "main.css",
+            temp_dir / "site-old" / "index.html",
+            temp_dir / "other.txt",
+        ]
+
+        rel_paths = list(_iter_local_rel_paths(files, base))
+
+        assert rel_paths == ["index.html", "css/main.css"]
+
+    def test_relative_local_files_are_made_absolute(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that files given relative to the cwd still match the prefix."""
+        from gsupload.tree import _iter_local_rel_paths
+
+        base = temp_dir / "site"
+        (base / "css").mkdir(parents=True)
+        monkeypatch.chdir(base)
 
-        new_files = local_rel_paths - remote_files
-        overwrite_files = local_rel_paths & remote_files
-        remote_only = remote_files - local_rel_paths
+        files = [Path("index.html"), Path("css") / "main.css"]
 
-        assert new_files == {"new.html", "local_only.js"}
-        assert overwrite_files == {"existing.css"}
-        assert remote_only == {"remote_only.txt"}
+        assert list(_iter_local_rel_paths(files, base)) == [
+            "index.html",
+            "css/main.css",
+        ]
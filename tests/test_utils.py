@@ -6,7 +6,16 @@ from pathlib import Path
 
 import pytest
 
-from gsupload.utils import calculate_remote_path, expand_patterns
+from gsupload.utils import (
+    calculate_remote_path,
+    calculate_remote_paths,
+    echo_upload_results,
+    enable_keepalive,
+    expand_patterns,
+    format_elapsed,
+    retry_delay,
+    sort_upload_order,
+)
 
 
 class TestCalculateRemotePath:
@@ -41,17 +50,149 @@ class TestCalculateRemotePath:
 
         assert remote_path == "/var/www/style.css"
 
-    def test_file_outside_basepath_exits(self, temp_dir: Path) -> None:
+    def test_file_outside_basepath_exits(
+        self, temp_dir: Path, outside_basepath_file: Path
+    ) -> None:
         """Test that file outside basepath causes exit."""
-        import tempfile
+        with pytest.raises(SystemExit):
+            calculate_remote_path(outside_basepath_file, temp_dir, "/var/www")
+
+
+class TestCalculateRemotePaths:
+    """Tests for calculate_remote_paths function."""
+
+    def test_batch_matches_single_calculation(self, temp_dir: Path) -> None:
+        """Test that the batch variant agrees with calculate_remote_path."""
+        files = [
+            temp_dir / "index.html",
+            temp_dir / "src" / "components" / "header.js",
+        ]
+
+        remote_paths = calculate_remote_paths(files, temp_dir, "/var/www/")
+
+        assert remote_paths == {
+            f: calculate_remote_path(f, temp_dir, "/var/www/") for f in files
+        }
+        assert remote_paths[files[1]] == "/var/www/src/components/header.js"
 
-        with tempfile.NamedTemporaryFile(delete=False) as f:
-            other_file = Path(f.name)
+    def test_relative_paths_resolved_against_cwd(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that relative local paths are made absolute before slicing."""
+        monkeypatch.chdir(temp_dir)
+        local_file = Path("src") / "app.js"
+
+        remote_paths = calculate_remote_paths([local_file], temp_dir, "/var/www")
 
+        assert remote_paths == {local_file: "/var/www/src/app.js"}
+
+    def test_file_outside_basepath_exits(self, temp_dir: Path) -> None:
+        """Test that a file outside the basepath still causes exit."""
         with pytest.raises(SystemExit):
-            calculate_remote_path(other_file, temp_dir, "/var/www")
+            calculate_remote_paths(
+                [temp_dir / "index.html", temp_dir.parent / "other.html"],
+                temp_dir,
+                "/var/www",
+            )
+
+
+class TestFormatElapsed:
+    """Tests for format_elapsed function."""
+
+    def test_seconds_only(self) -> None:
+        """Test that short durations show only seconds."""
+        assert format_elapsed(3.456) == "3.46s"
+
+    def test_larger_units_keep_zero_parts(self) -> None:
+        """Test that lower units are kept once a larger unit is shown."""
+        assert format_elapsed(3600 + 5) == "1h 0m 5.00s"
+        assert format_elapsed(2 * 86400 + 61.5) == "2d 0h 1m 1.50s"
+
+
+class TestEchoUploadResults:
+    """Tests for echo_upload_results function."""
+
+    def test_numbers_results_and_reports_failures(
+        self, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test progress numbering continues and failures go to stderr."""
+        results = [
+            (True, "a.txt", "/srv/a.txt"),
+            (False, "b.txt", "denied"),
+            (True, "c.txt", "/srv/c.txt"),
+        ]
+
+        completed = echo_upload_results(results, 5, completed=1)
+        captured = capsys.readouterr()
+
+        assert completed == 4
+        assert captured.out == (
+            "[2/5] ✅ a.txt → /srv/a.txt\n[3/5] [4/5] ✅ c.txt → /srv/c.txt\n"
+        )
+        assert captured.err == "❌ b.txt (denied)\n"
+
+
+class TestRetryDelay:
+    """Tests for retry_delay function."""
+
+    def test_delay_doubles_with_jitter(self) -> None:
+        """Test that each retry waits twice as long, plus a little jitter."""
+        for attempt, base in ((1, 0.5), (2, 1.0), (3, 2.0)):
+            assert base <= retry_delay(attempt) <= base + 0.2
+
+
+class TestEnableKeepalive:
+    """Tests for enable_keepalive function."""
+
+    def test_sets_keepalive_options(self) -> None:
+        """Test that keepalive and the available probe timings are set."""
+        import socket
+
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            enable_keepalive(sock)
 
-        other_file.unlink()
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+            if hasattr(socket, "TCP_KEEPIDLE"):
+                assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE) == 30
+
+    def test_ignores_non_sockets(self) -> None:
+        """Test that socket-like objects such as proxy commands are skipped."""
+        from unittest.mock import MagicMock
+
+        proxy = MagicMock()
+
+        enable_keepalive(proxy)
+
+        proxy.setsockopt.assert_not_called()
+
+
+class TestSortUploadOrder:
+    """Tests for sort_upload_order function."""
+
+    def test_shallow_files_first_then_alphabetical(self, temp_dir: Path) -> None:
+        """Test files are ordered by depth, then case-insensitively by path."""
+        files = [
+            temp_dir / "src" / "b.js",
+            temp_dir / "Z.html",
+            temp_dir / "src" / "A.js",
+            temp_dir / "a.css",
+        ]
+
+        ordered = sort_upload_order(files, temp_dir)
+
+        assert ordered == [
+            temp_dir / "a.css",
+            temp_dir / "Z.html",
+            temp_dir / "src" / "A.js",
+            temp_dir / "src" / "b.js",
+        ]
+
+    def test_files_outside_basepath_go_last(self, temp_dir: Path) -> None:
+        """Test that files outside local_basepath sort after all others."""
+        outside = temp_dir.parent / "outside.txt"
+        inside = temp_dir / "a" / "b" / "c" / "deep.txt"
+
+        assert sort_upload_order([outside, inside], temp_dir) == [inside, outside]
 
 
 class TestExpandPatterns:
@@ -59,94 +200,286 @@ class TestExpandPatterns:
 
     def test_expand_specific_file(self, sample_file_structure: Path) -> None:
         """Test expanding a specific filename."""
-        import os
+        files = expand_patterns(
+            ["index.html"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
 
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(sample_file_structure)
-            files = expand_patterns(
-                ["index.html"], [], sample_file_structure, recursive=False
-            )
-            filenames = [f.name for f in files]
+        assert "index.html" in filenames
 
-            assert "index.html" in filenames
-        finally:
-            os.chdir(original_cwd)
+    def test_expand_literal_path_skips_glob(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that patterns without wildcards never reach the glob engine."""
+        import glob
+
+        def no_glob(*args, **kwargs):
+            raise AssertionError("glob.glob called for a literal path")
+
+        monkeypatch.setattr(glob, "glob", no_glob)
+        files = expand_patterns(
+            ["index.html", "src"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+
+        assert sorted(f.name for f in files) == ["app.js", "header.js", "index.html"]
 
     def test_expand_glob_pattern(self, sample_file_structure: Path) -> None:
         """Test expanding a glob pattern."""
-        import os
-
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(sample_file_structure)
-            files = expand_patterns(
-                ["*.css"], [], sample_file_structure, recursive=False
-            )
-            filenames = [f.name for f in files]
+        files = expand_patterns(
+            ["*.css"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
 
-            assert "style.css" in filenames
-        finally:
-            os.chdir(original_cwd)
+        assert "style.css" in filenames
 
     def test_expand_recursive(self, sample_file_structure: Path) -> None:
         """Test recursive pattern expansion."""
+        files = expand_patterns(
+            ["*.js"],
+            [],
+            sample_file_structure,
+            recursive=True,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
+
+        assert "app.js" in filenames
+        assert "header.js" in filenames
+
+    def test_expand_recursive_multiple_patterns(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test that several name patterns are all matched recursively."""
+        files = expand_patterns(
+            ["*.js", "*.png", "*.html"],
+            [],
+            sample_file_structure,
+            recursive=True,
+            cwd=sample_file_structure,
+        )
+        filenames = sorted(f.name for f in files)
+
+        assert filenames == ["app.js", "header.js", "index.html", "logo.png"]
+
+    def test_expand_recursive_matches_skip_stat(
+        self, sample_file_structure: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that files found by the recursive search are not stat() again."""
         import os
 
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(sample_file_structure)
-            files = expand_patterns(["*.js"], [], sample_file_structure, recursive=True)
-            filenames = [f.name for f in files]
+        stat_calls = []
+        real_stat = os.stat
+
+        def recording_stat(path, *args, **kwargs):
+            stat_calls.append(os.fspath(path))
+            return real_stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", recording_stat)
+        files = expand_patterns(
+            ["*.js"],
+            [],
+            sample_file_structure,
+            recursive=True,
+            cwd=sample_file_structure,
+        )
 
-            assert "app.js" in filenames
-            assert "header.js" in filenames
-        finally:
-            os.chdir(original_cwd)
+        assert sorted(f.name for f in files) == ["app.js", "header.js"]
+        assert not [p for p in stat_calls if p.endswith(".js")]
 
     def test_expand_with_excludes(self, sample_file_structure: Path) -> None:
         """Test pattern expansion with excludes."""
-        import os
-
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(sample_file_structure)
-            # Test that directory expansion respects excludes
-            # The src directory should be walked but __pycache__ excluded
-            files = expand_patterns(
-                ["src"], ["__pycache__/"], sample_file_structure, recursive=False
-            )
-            filenames = [f.name for f in files]
+        # Test that directory expansion respects excludes
+        # The src directory should be walked but __pycache__ excluded
+        files = expand_patterns(
+            ["src"],
+            ["__pycache__/"],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
 
-            # Should have JS files but not pyc files
-            assert "app.js" in filenames
-            assert "header.js" in filenames
-        finally:
-            os.chdir(original_cwd)
+        # Should have JS files but not pyc files
+        assert "app.js" in filenames
+        assert "header.js" in filenames
 
     def test_expand_directory(self, sample_file_structure: Path) -> None:
         """Test expanding a directory path."""
-        import os
+        files = expand_patterns(
+            ["src"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
+
+        assert "app.js" in filenames
+        assert "header.js" in filenames
 
-        original_cwd = os.getcwd()
-        try:
-            os.chdir(sample_file_structure)
-            files = expand_patterns(["src"], [], sample_file_structure, recursive=False)
-            filenames = [f.name for f in files]
+    def test_expand_overlapping_patterns_deduplicates(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test files matched by several patterns are returned once, in order."""
+        files = expand_patterns(
+            ["src/app.js", "src", "src/components"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+        filenames = [f.name for f in files]
 
-            assert "app.js" in filenames
-            assert "header.js" in filenames
-        finally:
-            os.chdir(original_cwd)
+        assert filenames == ["app.js", "header.js"]
+
+    def test_expand_deduplicates_differently_spelled_paths(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test that spellings of the same path are deduplicated as one."""
+        files = expand_patterns(
+            ["index.html", "./index.html", "src/../index.html"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+
+        assert files == [sample_file_structure / "index.html"]
+
+    def test_expand_rejects_symlink_pointing_outside_basepath(
+        self, temp_dir: Path, outside_basepath_file: Path
+    ) -> None:
+        """Test that containment is checked on the resolved path of a match."""
+        site = temp_dir / "site"
+        site.mkdir()
+        (site / "index.html").write_text("<html></html>")
+        (site / "leak.txt").symlink_to(outside_basepath_file)
+        (site / "leaked").symlink_to(outside_basepath_file.parent)
+
+        files = expand_patterns(["*", "leaked/*"], [], site, recursive=False, cwd=site)
+
+        assert files == [site / "index.html"]
+
+    def test_expand_keeps_symlink_inside_basepath_under_link_path(
+        self, temp_dir: Path
+    ) -> None:
+        """Test that links resolving inside the basepath are kept or resolved."""
+        site = temp_dir / "site"
+        (site / "css").mkdir(parents=True)
+        (site / "css" / "main.css").write_text("body {}")
+        (site / "style.css").symlink_to(site / "css" / "main.css")
+        (temp_dir / "outside.css").symlink_to(site / "css" / "main.css")
+
+        files = expand_patterns(
+            ["style.css", "../outside.css"], [], site, recursive=False, cwd=site
+        )
+
+        # A link found inside keeps its own path; one outside that points in
+        # is used by its target, as Path.resolve() would give
+        assert files == [site / "style.css", site / "css" / "main.css"]
+
+    def test_expand_spells_case_insensitive_matches_like_basepath(
+        self, temp_dir: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that a match in another case comes back under the basepath."""
+        site = temp_dir / "Site"
+        (site / "css").mkdir(parents=True)
+        (site / "css" / "main.css").write_text("body {}")
+        # Stand in for a case-insensitive filesystem: "site" reaches "Site"
+        # and normcase() folds case as it does on Windows
+        (temp_dir / "site").symlink_to(site)
+        monkeypatch.setattr("os.path.normcase", str.lower)
+
+        files = expand_patterns(
+            ["site/css/main.css", "Site/css/main.css"],
+            [],
+            site,
+            recursive=False,
+            cwd=temp_dir,
+        )
+
+        assert files == [site / "css" / "main.css"]
+
+    def test_expand_relative_to_given_cwd(self, temp_dir: Path) -> None:
+        """Test patterns resolve against cwd, even one with glob characters."""
+        cwd = temp_dir / "site [v2]"
+        (cwd / "css").mkdir(parents=True)
+        (cwd / "css" / "main.css").write_text("body {}")
+
+        files = expand_patterns(
+            ["css/*.css", "css/main.css"], [], temp_dir, recursive=False, cwd=cwd
+        )
+
+        assert files == [cwd / "css" / "main.css"]
 
     def test_expand_nonexistent_pattern_warns(
         self, sample_file_structure: Path, capsys: pytest.CaptureFixture
     ) -> None:
         """Test that nonexistent pattern produces warning."""
         files = expand_patterns(
-            ["nonexistent*.xyz"], [], sample_file_structure, recursive=False
+            ["nonexistent*.xyz"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
         )
 
         assert len(files) == 0
         captured = capsys.readouterr()
         assert "Warning" in captured.err or "nonexistent" in captured.err
+
+    def test_expand_missing_prefix_directory_costs_one_lookup(
+        self,
+        sample_file_structure: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture,
+    ) -> None:
+        """Test that a pattern under a missing directory fails after one lookup."""
+        import os
+
+        listed = []
+        real_scandir = os.scandir
+
+        def recording_scandir(path):
+            listed.append(os.fspath(path))
+            return real_scandir(path)
+
+        monkeypatch.setattr(os, "scandir", recording_scandir)
+        files = expand_patterns(
+            ["missing/components/*.js"],
+            [],
+            sample_file_structure,
+            recursive=False,
+            cwd=sample_file_structure,
+        )
+
+        assert files == []
+        assert listed == [str(sample_file_structure / "missing" / "components")]
+        assert "missing/components/*.js" in capsys.readouterr().err
+
+    def test_expand_recursive_from_parent_of_basepath(
+        self, sample_file_structure: Path
+    ) -> None:
+        """Test recursive search when cwd is above local_basepath."""
+        files = expand_patterns(
+            ["*.js"],
+            [],
+            sample_file_structure / "src",
+            recursive=True,
+            cwd=sample_file_structure,
+        )
+        filenames = sorted(f.name for f in files)
+
+        assert filenames == ["app.js", "header.js"]